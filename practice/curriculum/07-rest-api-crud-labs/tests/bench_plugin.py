@@ -0,0 +1,200 @@
+"""Pytest plugin: microbenchmarks against a stored baseline.
+
+A trimmed copy of the capstone's appcore.monitoring.pytest_bench. This lab
+is a standalone project and cannot import the capstone package, so only
+what the lab uses is kept: no --bench-baseline / --bench-threshold options,
+no ini settings and no per-test thresholds. Fixes to the timing or the
+comparison belong in both files.
+
+A test that takes the `bench` fixture is a benchmark:
+
+    def test_get(bench):
+        bench(db.get, 1)
+
+Benchmarks are skipped in a normal run (they take seconds). Run them with:
+
+    pytest --bench            time them and print a table
+    pytest --bench-save       ... and record the timings in BASELINE
+    pytest --bench-compare    ... and fail every benchmark that got slower
+
+Each benchmark runs ROUNDS rounds of enough calls to take ≥ 10 ms, with
+the GC off. It regresses if its median is more than THRESHOLD above the
+baseline's *and* the interquartile ranges do not overlap. Baseline timings
+are rescaled by a reference workload timed in every session, so a
+baseline saved on another machine still applies.
+"""
+
+import gc
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import pytest
+
+BASELINE = "benchmarks/baseline.json"  # relative to the rootdir
+ROUNDS = 20
+THRESHOLD = 0.2
+MIN_ROUND_SECONDS = 0.01
+
+
+@dataclass
+class Timing:
+    """Per-call seconds: median and interquartile range over the rounds."""
+
+    median: float
+    q1: float
+    q3: float
+    rounds: int
+    loops: int
+
+    def scaled(self, factor: float) -> "Timing":
+        return Timing(self.median * factor, self.q1 * factor, self.q3 * factor,
+                      self.rounds, self.loops)
+
+
+def _time_loops(fn, args, kwargs, loops: int) -> float:
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn(*args, **kwargs)
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def measure(fn, *args, rounds: int = ROUNDS, **kwargs) -> Timing:
+    """Time fn(*args, **kwargs): calibrate the loop count, then `rounds` rounds."""
+    loops = 1
+    while (elapsed := _time_loops(fn, args, kwargs, loops)) < MIN_ROUND_SECONDS:
+        loops *= 10 if elapsed < MIN_ROUND_SECONDS / 10 else 2
+    samples = [_time_loops(fn, args, kwargs, loops) / loops for _ in range(rounds)]
+    q1, median, q3 = statistics.quantiles(samples, n=4, method="inclusive")
+    return Timing(median, q1, q3, rounds, loops)
+
+
+def _reference_workload() -> None:
+    data = {str(i): i for i in range(200)}
+    sorted(k for k, v in data.items() if v % 3)
+
+
+def compare(current: Timing, baseline: Timing) -> tuple[float, bool]:
+    """Relative change of the median, and whether it is a regression."""
+    change = current.median / baseline.median - 1
+    return change, change > THRESHOLD and current.q1 > baseline.q3
+
+
+class BenchSession:
+    """Timings of this run and the loaded baseline."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.results: dict[str, Timing] = {}
+        self._reference: Timing | None = None
+        self.baseline: dict = json.loads(path.read_text()) if path.exists() else {}
+
+    @property
+    def reference(self) -> Timing:
+        if self._reference is None:
+            # More rounds than a benchmark: its noise goes into every comparison
+            self._reference = measure(_reference_workload, rounds=3 * ROUNDS)
+        return self._reference
+
+    def baseline_for(self, key: str) -> Timing | None:
+        """The stored timing, rescaled to this machine's speed."""
+        entry = self.baseline.get("benchmarks", {}).get(key)
+        if entry is None:
+            return None
+        return Timing(**entry).scaled(self.reference.q1 / self.baseline["reference"]["q1"])
+
+    def save(self) -> None:
+        """Write this run's timings, keeping (rescaled) entries it did not run."""
+        benchmarks = {key: asdict(self.baseline_for(key))
+                      for key in self.baseline.get("benchmarks", {})}
+        benchmarks.update((key, asdict(timing)) for key, timing in self.results.items())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "reference": asdict(self.reference),
+            "benchmarks": dict(sorted(benchmarks.items())),
+        }, indent=2) + "\n")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "microbenchmarks")
+    group.addoption("--bench", action="store_true", help="Run benchmarks (tests using `bench`)")
+    group.addoption("--bench-save", action="store_true", help="Run benchmarks and save the baseline")
+    group.addoption("--bench-compare", action="store_true",
+                    help="Run benchmarks and fail those slower than the baseline")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: a microbenchmark (uses the bench fixture)")
+    opt = config.getoption
+    config._bench = None
+    if opt("--bench") or opt("--bench-save") or opt("--bench-compare"):
+        config._bench = BenchSession(config.rootpath / BASELINE)
+
+
+def pytest_collection_modifyitems(config, items):
+    skip = pytest.mark.skip(reason="benchmark; run with --bench, --bench-save or --bench-compare")
+    for item in items:
+        if "bench" in getattr(item, "fixturenames", ()):
+            item.add_marker(pytest.mark.benchmark)
+            if config._bench is None:
+                item.add_marker(skip)
+
+
+@pytest.fixture
+def bench(request):
+    """Call bench(fn, *args, **kwargs) once per test to time fn."""
+    session: BenchSession = request.config._bench
+    key = f"{request.node.path.stem}::{request.node.name}"
+
+    def run(fn, *args, **kwargs) -> Timing:
+        timing = session.results[key] = measure(fn, *args, **kwargs)
+        baseline = session.baseline_for(key)
+        if baseline is not None and request.config.getoption("--bench-compare"):
+            change, regressed = compare(timing, baseline)
+            if regressed:
+                pytest.fail(
+                    f"{key}: median {timing.median * 1e6:.2f} µs is {change:+.1%} vs baseline "
+                    f"{baseline.median * 1e6:.2f} µs (threshold {THRESHOLD:.0%})",
+                    pytrace=False,
+                )
+        return timing
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    bench = session.config._bench
+    if bench is not None and bench.results and session.config.getoption("--bench-save"):
+        bench.save()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    bench = config._bench
+    if bench is None or not bench.results:
+        return
+    tr = terminalreporter
+    tr.section("benchmarks (per call)")
+    tr.write_line(f"{'benchmark':<50} {'median':>10} {'IQR':>10} {'baseline':>10}  change")
+    for key, timing in sorted(bench.results.items()):
+        baseline = bench.baseline_for(key)
+        line = f"{key:<50} {timing.median * 1e6:8.2f}µs {(timing.q3 - timing.q1) * 1e6:8.2f}µs "
+        if baseline is None:
+            line += f"{'-':>10}  new"
+        else:
+            change, regressed = compare(timing, baseline)
+            verdict = "regressed" if regressed else ""
+            line += f"{baseline.median * 1e6:8.2f}µs  {change:+.1%} {verdict}"
+        tr.write_line(line)
+    if config.getoption("--bench-save"):
+        tr.write_line(f"baseline saved to {bench.path}")
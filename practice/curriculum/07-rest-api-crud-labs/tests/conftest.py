@@ -6,6 +6,8 @@ from fastapi.testclient import TestClient
 from src.crud_api.main import app
 from src.crud_api.database import db
 
+pytest_plugins = ["tests.bench_plugin"]
+
 
 @pytest.fixture(autouse=True)
 def reset_db():
@@ -0,0 +1,48 @@
+"""Benchmarks for the CRUD API hot paths (baseline: benchmarks/baseline.json).
+
+Run: pytest tests/test_bench.py --bench-compare
+     pytest tests/test_bench.py --bench-save   (after an intended change)
+"""
+
+import itertools
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from src.crud_api.database import InMemoryDB
+from src.crud_api.rate_limiter import RateLimiter
+from src.crud_api.schemas import UserCreate
+
+
+@pytest.fixture
+def users():
+    """A store with 1,000 users (list() sorts all of them on every call)."""
+    store = InMemoryDB()
+    for i in range(1000):
+        store.create(UserCreate(username=f"user{i}", email=f"user{i}@example.com", full_name=f"User {i}"))
+    return store
+
+
+def test_rate_limiter_allow(bench):
+    limiter = RateLimiter(max_requests=100, window_seconds=60)
+    clients = itertools.cycle([f"10.0.{i // 256}.{i % 256}" for i in range(1000)])
+    bench(lambda: limiter.allow(next(clients)))
+
+
+def test_db_get(bench, users):
+    bench(users.get, 500)
+
+
+def test_db_list(bench, users):
+    bench(users.list, page=50, size=10)
+
+
+def test_db_create(bench):
+    store = InMemoryDB()
+    data = UserCreate(username="newuser", email="new@example.com", full_name="New User")
+    bench(store.create, data)
+
+
+def test_serialize_user_page(bench, users):
+    page = users.list(page=1, size=100)
+    bench(lambda: JSONResponse(page.model_dump(mode="json")))
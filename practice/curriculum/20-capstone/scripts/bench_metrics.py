@@ -0,0 +1,80 @@
+"""
+Capstone — Metric primitive microbenchmark
+
+Hammers one counter and one histogram from N threads and reports the
+per-call cost of appcore's sharded metrics against the stock
+prometheus_client (which takes a lock on every inc()/observe()).
+
+Run: PYTHONPATH=src python scripts/bench_metrics.py [--threads 8] [--ops 200000]
+"""
+
+import argparse
+import threading
+import time
+
+from appcore.monitoring import metrics
+
+
+def run(threads: int, ops: int, inc, observe) -> float:
+    """Seconds for `threads` threads to each do `ops` inc() + observe() calls."""
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        barrier.wait()
+        for i in range(ops):
+            inc()
+            observe(0.001 * (i % 100))
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def bench_appcore(threads: int, ops: int) -> float:
+    registry = metrics.MetricRegistry()
+    counter = metrics.Counter("bench_total", "Bench", ["route"], registry=registry).labels("/predict")
+    hist = metrics.Histogram("bench_seconds", "Bench", ["route"], registry=registry).labels("/predict")
+    seconds = run(threads, ops, counter.inc, hist.observe)
+    assert counter.get() == threads * ops, "lost increments"
+    return seconds
+
+
+def bench_prometheus_client(threads: int, ops: int) -> float | None:
+    try:
+        import prometheus_client
+    except ImportError:
+        return None
+    registry = prometheus_client.CollectorRegistry()
+    counter = prometheus_client.Counter(
+        "bench", "Bench", ["route"], registry=registry
+    ).labels("/predict")
+    hist = prometheus_client.Histogram(
+        "bench_seconds", "Bench", ["route"], registry=registry
+    ).labels("/predict")
+    return run(threads, ops, counter.inc, hist.observe)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark metric primitives")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    calls = args.threads * args.ops * 2
+    print(f"{args.threads} threads x {args.ops} x (inc + observe)")
+    for name, bench in (("appcore (sharded)", bench_appcore),
+                        ("prometheus_client", bench_prometheus_client)):
+        seconds = bench(args.threads, args.ops)
+        if seconds is None:
+            print(f"{name:>20}: not installed")
+            continue
+        print(f"{name:>20}: {seconds:7.3f}s  {seconds / calls * 1e9:7.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Capstone — Middleware overhead benchmark
+
+Times GET /ping through two apps doing the same work per request with five
+concerns (request ID, logging, metrics, security headers, rate limiting):
+
+- stacked: each hook in its own @app.middleware("http") layer
+  (BaseHTTPMiddleware), the way the app used to be wired
+- fused:   all hooks in one ObservabilityMiddleware
+
+Requests go straight to the ASGI app (no sockets), so the difference is
+middleware overhead alone.
+
+Run: PYTHONPATH=src python scripts/bench_middleware.py [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from appcore.api import rate_limiter as rate_limiting
+from appcore.api.middleware import (
+    LoggingHook,
+    MetricsHook,
+    ObservabilityMiddleware,
+    RequestContext,
+    RequestIdHook,
+    SecurityHeadersHook,
+)
+
+
+def hooks():
+    return [MetricsHook(), LoggingHook(), RequestIdHook(), SecurityHeadersHook(),
+            rate_limiting.RateLimitHook()]
+
+
+def as_http_middleware(hook):
+    """Run one hook as its own BaseHTTPMiddleware layer."""
+
+    async def layer(request: Request, call_next):
+        ctx = RequestContext(request.scope)
+        try:
+            response = hook.before(ctx) or await call_next(request)
+            ctx.status_code = response.status_code
+            hook.on_headers(ctx, response.headers)
+            return response
+        finally:
+            hook.after(ctx)
+
+    return layer
+
+
+def make_app(fused: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return PlainTextResponse("pong")
+
+    if fused:
+        app.add_middleware(ObservabilityMiddleware, hooks=hooks())
+    else:
+        for hook in reversed(hooks()):  # registered inner → outer
+            app.middleware("http")(as_http_middleware(hook))
+    return app
+
+
+async def run(app, requests: int) -> float:
+    """Seconds to serve `requests` sequential GET /ping calls."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/ping", "raw_path": b"/ping",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):  # warm up
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark middleware overhead")
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    logging.getLogger("appcore.access").disabled = True  # time the hooks, not I/O
+    rate_limiting.rate_limiter = rate_limiting.InMemoryRateLimiter(10**9, 60)
+
+    results = {}
+    for name, fused in (("stacked (5 x http)", False), ("fused (1 ASGI)", True)):
+        results[name] = asyncio.run(run(make_app(fused), args.requests))
+        print(f"{name:>20}: {results[name] / args.requests * 1e6:8.1f} us/request")
+
+    bare = asyncio.run(run(FastAPI(routes=make_app(False).router.routes), args.requests))
+    print(f"{'no middleware':>20}: {bare / args.requests * 1e6:8.1f} us/request")
+    for name, seconds in results.items():
+        print(f"{name:>20}: {(seconds - bare) / args.requests * 1e6:8.1f} us overhead")
+
+
+if __name__ == "__main__":
+    main()
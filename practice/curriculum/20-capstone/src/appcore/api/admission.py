@@ -0,0 +1,225 @@
+"""
+Capstone — Admission control (adaptive concurrency limit + load shedding)
+
+uvicorn accepts every connection; past saturation requests just queue in
+the event loop until they all time out. AdmissionMiddleware instead caps
+how many requests run at once and answers the rest with a fast
+503 + Retry-After, so the requests it does admit still finish in time.
+
+The cap adapts to measured latency (AIMD):
+
+    latency <= target  →  limit += 1 / limit   (≈ +1 per "round" of requests)
+    latency >  target  →  limit *= backoff     (at most once per target interval)
+    target = tolerance x baseline + slack
+
+The baseline is the route's lowest recent latency (per route template, as
+/predict and /models differ by orders of magnitude): it tracks the minimum
+and creeps up slowly so a permanently slower service is re-learned. 5xx
+responses count as congestion too.
+
+Routes have a priority class (ROUTE_PRIORITY, longest prefix wins):
+CRITICAL is never shed or counted (/health, /ready, /metrics, /debug), NORMAL may
+wait up to ADMISSION_QUEUE_TIMEOUT_MS for a slot, LOW is shed at once when
+the limit is reached.
+"""
+
+import asyncio
+import enum
+import os
+import time
+from collections import deque
+
+from starlette.responses import JSONResponse
+
+from appcore.api.middleware import route_template
+from appcore.monitoring.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_LIMIT,
+    ADMISSION_QUEUE_TIME,
+    ADMISSION_REJECTED,
+)
+
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "20"))
+ADMISSION_MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "2"))
+ADMISSION_MAX_LIMIT = int(os.getenv("ADMISSION_MAX_LIMIT", "500"))
+ADMISSION_LATENCY_TOLERANCE = float(os.getenv("ADMISSION_LATENCY_TOLERANCE", "2.0"))
+ADMISSION_LATENCY_SLACK_MS = float(os.getenv("ADMISSION_LATENCY_SLACK_MS", "5"))
+ADMISSION_BACKOFF = float(os.getenv("ADMISSION_BACKOFF", "0.9"))
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "50"))
+ADMISSION_RETRY_AFTER_S = int(os.getenv("ADMISSION_RETRY_AFTER_S", "1"))
+
+# Per-sample growth of the latency baseline, so it can move up again
+BASELINE_DRIFT = 0.001
+
+
+class Priority(enum.IntEnum):
+    LOW = 0
+    NORMAL = 1
+    CRITICAL = 2
+
+
+ROUTE_PRIORITY = {
+    "/health": Priority.CRITICAL,
+    "/ready": Priority.CRITICAL,
+    "/metrics": Priority.CRITICAL,
+    "/debug": Priority.CRITICAL,
+    "/predictions": Priority.LOW,
+}
+
+
+def priority_for(path: str, table: dict[str, Priority] = ROUTE_PRIORITY) -> Priority:
+    """The class of the longest matching path prefix (NORMAL if none)."""
+    best, best_len = Priority.NORMAL, -1
+    for prefix, priority in table.items():
+        if (path == prefix or path.startswith(prefix + "/")) and len(prefix) > best_len:
+            best, best_len = priority, len(prefix)
+    return best
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a FIFO of waiters for a slot."""
+
+    def __init__(
+        self,
+        initial_limit: int = ADMISSION_INITIAL_LIMIT,
+        min_limit: int = ADMISSION_MIN_LIMIT,
+        max_limit: int = ADMISSION_MAX_LIMIT,
+        tolerance: float = ADMISSION_LATENCY_TOLERANCE,
+        slack_ms: float = ADMISSION_LATENCY_SLACK_MS,
+        backoff: float = ADMISSION_BACKOFF,
+        clock=time.monotonic,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.slack = slack_ms / 1000
+        self.backoff = backoff
+        self.in_flight = 0
+        self.baselines: dict[str, float] = {}
+        self._clock = clock
+        self._last_decrease = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+        ADMISSION_LIMIT.set(self.limit)
+
+    def try_acquire(self) -> bool:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            ADMISSION_IN_FLIGHT.set(self.in_flight)
+            return True
+        return False
+
+    async def acquire(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a slot; False if none came."""
+        if self.try_acquire():
+            return True
+        if timeout <= 0 or len(self._waiters) >= int(self.limit):
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True  # release() handed its slot over
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1  # handed a slot we will never use
+                self._handoff()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, route: str, latency: float, ok: bool = True) -> None:
+        """Give the slot back and adapt the limit to the observed latency."""
+        self.in_flight -= 1
+        self._update(route, latency, ok)
+        self._handoff()
+
+    def _handoff(self) -> None:
+        # Pass free slots straight to waiters so newcomers cannot jump the queue
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+
+    def _update(self, route: str, latency: float, ok: bool) -> None:
+        baseline = self.baselines.get(route)
+        if baseline is None or latency < baseline:
+            baseline = latency
+        else:
+            baseline *= 1 + BASELINE_DRIFT
+        self.baselines[route] = baseline
+        target = self.tolerance * baseline + self.slack
+        now = self._clock()
+        if not ok or latency > target:
+            # One decrease per target interval: a burst of slow completions
+            # is one congestion signal, not many
+            if now - self._last_decrease >= target:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        ADMISSION_LIMIT.set(self.limit)
+
+
+def _rejection() -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is overloaded. Try again later."},
+        headers={"Retry-After": str(ADMISSION_RETRY_AFTER_S)},
+    )
+
+
+class AdmissionMiddleware:
+    """Pure-ASGI admission control in front of the app's routes."""
+
+    def __init__(
+        self,
+        app,
+        limiter: AdaptiveLimiter | None = None,
+        queue_timeout_ms: float = ADMISSION_QUEUE_TIMEOUT_MS,
+        priorities: dict[str, Priority] = ROUTE_PRIORITY,
+    ):
+        self.app = app
+        self.limiter = limiter or AdaptiveLimiter()
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.priorities = priorities
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        priority = priority_for(scope["path"], self.priorities)
+        if priority is Priority.CRITICAL:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter
+        queued_at = time.perf_counter()
+        if priority is Priority.LOW:
+            admitted = limiter.try_acquire()
+        else:
+            admitted = await limiter.acquire(self.queue_timeout)
+        started = time.perf_counter()
+        ADMISSION_QUEUE_TIME.labels(priority=priority.name.lower()).observe(started - queued_at)
+        if not admitted:
+            ADMISSION_REJECTED.labels(priority=priority.name.lower()).inc()
+            await _rejection()(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(route_template(scope), time.perf_counter() - started, ok=status < 500)
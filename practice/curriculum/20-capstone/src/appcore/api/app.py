@@ -3,25 +3,117 @@ Capstone — Main FastAPI Application
 Guide: docs/curriculum/20-capstone-project.md
 """
 
-# TODO: Build the complete application
-# from fastapi import FastAPI
-# from contextlib import asynccontextmanager
+import logging
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI
 
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     # Startup: Load model, initialize metrics
-#     yield
-#     # Shutdown: Cleanup
+from appcore.api.admission import AdmissionMiddleware
+from appcore.api.dependencies import get_prediction_store
+from appcore.api.debug import debug_router
+from appcore.api.middleware import (
+    DeadlineMiddleware,
+    LoggingHook,
+    MetricsHook,
+    ObservabilityMiddleware,
+    RequestIdHook,
+    SecurityHeadersHook,
+    TracingHook,
+)
+from appcore.api.rate_limiter import RateLimitHook
+from appcore.api.routes import router
+from appcore.api.shutdown import DrainHook, drain
+from appcore.db.cache import get_redis_client
+from appcore.db.write_buffer import prediction_buffer
+from appcore.models.registry import MODEL_VERSION, model_registry
+from appcore.monitoring.logging_config import setup_logging, shutdown_logging
+from appcore.monitoring.loop_monitor import loop_monitor
+from appcore.monitoring.metrics import REGISTRY
+from appcore.monitoring.readiness import readiness
+from appcore.monitoring.startup import startup_profiler
 
+logger = logging.getLogger("appcore")
 
-# app = FastAPI(
-#     title="Practical Production Service",
-#     version="1.0.0",
-#     lifespan=lifespan,
-# )
 
-# TODO: Add middleware (logging, request ID, CORS, metrics)
-# TODO: Include routers
-# TODO: Add /metrics endpoint
+async def _model_loaded():
+    if model_registry.active_version is None:
+        raise RuntimeError("model not loaded")
+
+
+async def _write_buffer_running():
+    if not prediction_buffer.running:
+        raise RuntimeError("write buffer stopped")
+
+
+def _cache_reachable():
+    client = get_redis_client()
+    if client is not None:  # no Redis configured: nothing to check
+        client.ping()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: only what /health needs blocks; the model loads in the
+    # background and /predict waits for it. Each step is timed (see
+    # `python -m appcore.monitoring.startup`).
+    startup_profiler.reset()
+    with startup_profiler.step("logging"):
+        setup_logging()
+    startup_profiler.watch("model", model_registry.start_loading(MODEL_VERSION))
+    with startup_profiler.step("database"):
+        store = get_prediction_store()
+        store.init_db()
+    with startup_profiler.step("write_buffer"):
+        prediction_buffer.writer = store.save_predictions
+        await prediction_buffer.start()
+    with startup_profiler.step("readiness"):
+        readiness.register("database", lambda: store.list_predictions(limit=1))
+        readiness.register("model", _model_loaded)
+        readiness.register("write_buffer", _write_buffer_running)
+        readiness.register("cache", _cache_reachable, required=False)
+        await readiness.start()
+    await loop_monitor.start()
+    await drain.start(on_drain=[readiness.drain])
+    logger.info("Startup steps: %s", startup_profiler.report())
+    yield
+    # Shutdown: /ready already fails (since SIGTERM, see appcore.api.shutdown);
+    # let in-flight requests finish, then flush buffered prediction rows,
+    # metrics and finally the queued log lines
+    await drain.stop()
+    await readiness.stop()
+    await loop_monitor.stop()
+    await prediction_buffer.stop()
+    REGISTRY.flush()
+    logger.info("Shutdown complete")
+    shutdown_logging()
+
+
+app = FastAPI(
+    title="Practical Production Service",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
+# TODO: Add middleware (CORS)
+# Admission control and deadlines sit inside the hooks, so shed 503s and
+# 504s are logged and counted; time queued for admission uses up the deadline
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(DeadlineMiddleware)
+# One ASGI layer; hooks listed outer → inner: tracing wraps rate limiting
+# so it shows up in the trace, and DrainHook counts every request in flight
+app.add_middleware(
+    ObservabilityMiddleware,
+    hooks=[
+        DrainHook(),
+        MetricsHook(),
+        LoggingHook(),
+        RequestIdHook(),
+        SecurityHeadersHook(),
+        TracingHook(),
+        RateLimitHook(),
+    ],
+)
 # TODO: Add exception handlers
+
+app.include_router(router)
+app.include_router(debug_router)
@@ -1,28 +1,33 @@
-# =============================================================================
-# Section 11 — FastAPI Auth Dependency
-# Guide: docs/curriculum/20-capstone-project.md
-#
-# Exercise: Create a FastAPI dependency for API key authentication.
-#
-# TODO:
-# 1. Create APIKeyHeader instance (header name: "X-API-Key")
-# 2. Implement require_api_key dependency:
-#    - Extract key from header
-#    - Call verify_api_key()
-#    - Raise HTTPException(403) if invalid
-#    - Return the key if valid
-# 3. Apply to protected routes via Depends(require_api_key)
-# =============================================================================
+"""
+Capstone — API Key Auth Dependencies
+
+require_api_key guards the API routes (403 for a missing or wrong
+X-API-Key). require_admin_key guards operator endpoints (/debug/*, model
+activation): 401 without a key, 403 with a non-admin one.
+"""
 
 from fastapi import Depends, HTTPException
 from fastapi.security import APIKeyHeader
 
-from appcore.api.security import verify_api_key
+from appcore.api.security import verify_admin_key, verify_api_key
+from appcore.monitoring.tracing import span
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
 async def require_api_key(api_key: str = Depends(api_key_header)) -> str:
     """FastAPI dependency that enforces API key authentication."""
-    # TODO: Validate key, raise 403 if missing/invalid
-    pass
+    with span("auth"):
+        if not verify_api_key(api_key):
+            raise HTTPException(status_code=403, detail="Invalid or missing API key")
+        return api_key
+
+
+async def require_admin_key(api_key: str = Depends(api_key_header)) -> str:
+    """Dependency for operator-only endpoints (/debug/*, model activation)."""
+    with span("auth"):
+        if not api_key:
+            raise HTTPException(status_code=401, detail="Admin API key required")
+        if not verify_admin_key(api_key):
+            raise HTTPException(status_code=403, detail="Admin API key required")
+        return api_key
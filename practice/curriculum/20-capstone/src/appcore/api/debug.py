@@ -0,0 +1,85 @@
+"""
+Capstone — Debug endpoints (admin key required)
+"""
+
+import asyncio
+import threading
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from appcore import deadline
+from appcore.api.auth import require_admin_key
+from appcore.monitoring import profiler
+from appcore.monitoring.loop_monitor import loop_monitor
+from appcore.monitoring.memory import memory_tracker
+from appcore.monitoring.tracing import slowest_traces
+
+# Time kept back from the request deadline to render and send the profile
+PROFILE_DEADLINE_MARGIN_S = 0.25
+
+debug_router = APIRouter(prefix="/debug", dependencies=[Depends(require_admin_key)])
+
+
+@debug_router.get("/traces")
+async def traces(reset: bool = False):
+    """Slowest sampled request traces, slowest first."""
+    result = {"traces": slowest_traces.slowest()}
+    if reset:
+        slowest_traces.clear()
+    return result
+
+
+@debug_router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=60),
+    hz: int = Query(profiler.PROFILE_DEFAULT_HZ, ge=1, le=1000),
+):
+    """Sample every thread's stack; returns collapsed stacks for flamegraphs.
+
+    The sampler runs in a worker thread, so the event loop keeps serving
+    (and shows up in the profile as MainThread). `seconds` is cut to what
+    the request deadline leaves, so the profile is returned instead of a
+    504; if the request is cancelled anyway, sampling stops with it.
+    """
+    left = deadline.remaining()
+    if left is not None:
+        seconds = max(0.0, min(seconds, left - PROFILE_DEADLINE_MARGIN_S))
+    stop = threading.Event()
+    try:
+        collapsed = await asyncio.to_thread(profiler.profile, seconds, hz, stop)
+    finally:
+        stop.set()  # a cancelled request must not keep the profiler busy
+    if collapsed is None:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return collapsed
+
+
+@debug_router.post("/memory/snapshot")
+async def memory_snapshot(top: int = Query(20, ge=1, le=200)):
+    """Start tracemalloc if needed and record the baseline for /memory/diff."""
+    return await asyncio.to_thread(memory_tracker.take_snapshot, top)
+
+
+@debug_router.get("/memory/diff")
+async def memory_diff(top: int = Query(20, ge=1, le=200)):
+    """Top allocation sites and object types by growth since the snapshot."""
+    try:
+        return await asyncio.to_thread(memory_tracker.diff, top)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@debug_router.delete("/memory/snapshot", status_code=204)
+async def memory_stop():
+    """Drop the baseline and stop tracemalloc (it slows every allocation)."""
+    await asyncio.to_thread(memory_tracker.stop)
+
+
+@debug_router.get("/loop/stalls")
+async def loop_stalls():
+    """Recent event-loop stalls with the stack that was blocking the loop."""
+    return {
+        "threshold_ms": loop_monitor.threshold * 1000,
+        "stalls": list(loop_monitor.stalls),
+    }
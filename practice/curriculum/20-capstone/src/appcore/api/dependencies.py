@@ -2,8 +2,26 @@
 Capstone — Dependencies (DI)
 """
 
-# from functools import lru_cache
-# from pydantic_settings import BaseSettings
+import os
+from functools import lru_cache
+
+from appcore.db import repository
+from appcore.db.partitions import PartitionRouter
+
+# "none" keeps the single data/predictions.db; "day" / "hour" partition it
+PREDICTION_PARTITIONING = os.getenv("PREDICTION_PARTITIONING", "none")
+
+
+@lru_cache(maxsize=1)
+def get_prediction_store():
+    """Return the prediction store: the repository module or a PartitionRouter.
+
+    Both expose init_db, save_prediction(s), get_prediction, list_predictions
+    and encode_cursor.
+    """
+    if PREDICTION_PARTITIONING == "none":
+        return repository
+    return PartitionRouter(granularity=PREDICTION_PARTITIONING)
 
 
 # TODO: Create Settings, get_settings, get_model
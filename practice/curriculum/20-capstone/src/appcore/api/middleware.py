@@ -1,12 +1,339 @@
 """
-Capstone — Middleware (logging, request ID, metrics)
+Capstone — Middleware (request ID, logging, metrics, tracing, security headers)
+
+Every `@app.middleware("http")` layer is a BaseHTTPMiddleware: its own task
+per request, a Request wrapper and a streaming response hop. Five concerns
+stacked that way cost five of each. Instead, one pure-ASGI middleware runs
+a list of hooks around a single call into the app:
+
+    ObservabilityMiddleware(app, hooks=[MetricsHook(), LoggingHook(), ...])
+
+    before(ctx)           outer → inner; may return a Response to answer early
+    on_headers(ctx, hdrs) inner → outer, as http.response.start goes out
+    after(ctx)            inner → outer, always (status 500 if the app raised)
+
+Only hooks whose before() ran get on_headers()/after(). Run
+`PYTHONPATH=src python scripts/bench_middleware.py` for the overhead.
+
+DeadlineMiddleware runs each request under its deadline (appcore.deadline)
+and cancels the handler when it passes (504) or the client goes away.
 """
 
-# import time
-# import uuid
-# from fastapi import Request
+import asyncio
+import logging
+import time
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse, Response
+
+from appcore import deadline
+from appcore.monitoring import tracing
+from appcore.monitoring.metrics import (
+    ACTIVE_REQUESTS,
+    REQUEST_COUNT,
+    REQUEST_DURATION,
+    REQUESTS_CANCELLED,
+)
+
+
+# Label for requests that matched no route (404 scans, typos): one series
+# for all of them instead of one per URL
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Status recorded for requests whose client went away before a response
+# (nginx's "client closed request"); never sent
+CLIENT_CLOSED_REQUEST = 499
+
+# Scope key DeadlineMiddleware sets to "deadline" or "disconnect"
+CANCELLED_SCOPE_KEY = "appcore.cancelled"
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Referrer-Policy": "no-referrer",
+    "Cache-Control": "no-store",
+}
+
+
+access_logger = logging.getLogger("appcore.access")
+
+
+def route_template(scope: dict) -> str:
+    """The matched route's path template, e.g. /predictions/{prediction_id}.
+
+    Labelling by the URL path would create a time series per id.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ENDPOINT
+
+
+class RequestContext:
+    """Per-request state shared by the hooks."""
+
+    __slots__ = ("scope", "method", "path", "start", "status_code", "request_id", "state")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.method: str = scope["method"]
+        self.path: str = scope["path"]
+        self.start = time.perf_counter()
+        self.status_code = 500
+        self.request_id: str | None = None
+        self.state: dict = {}
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope)
+
+    @property
+    def client_host(self) -> str:
+        client = self.scope.get("client")
+        return client[0] if client else "unknown"
+
+    def header(self, name: bytes) -> str | None:
+        """A request header by lower-case name (first value wins)."""
+        for key, value in self.scope["headers"]:
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+class RequestHook:
+    """Base hook: override any of the three stages."""
+
+    def before(self, ctx: RequestContext) -> Response | None:
+        return None
+
+    def on_headers(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        pass
+
+    def after(self, ctx: RequestContext) -> None:
+        pass
+
+
+class ObservabilityMiddleware:
+    """Pure-ASGI middleware running `hooks` around each HTTP request."""
+
+    def __init__(self, app, hooks: list[RequestHook] = ()):
+        self.app = app
+        self.hooks = list(hooks)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        ctx = RequestContext(scope)
+        entered: list[RequestHook] = []
+        try:
+            early = None
+            for hook in self.hooks:
+                early = hook.before(ctx)
+                entered.append(hook)
+                if early is not None:
+                    break
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    ctx.status_code = message["status"]
+                    headers = MutableHeaders(scope=message)
+                    for hook in reversed(entered):
+                        hook.on_headers(ctx, headers)
+                await send(message)
+
+            if early is not None:
+                await early(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+            if scope.get(CANCELLED_SCOPE_KEY) == "disconnect":
+                ctx.status_code = CLIENT_CLOSED_REQUEST
+        finally:
+            for hook in reversed(entered):
+                hook.after(ctx)
+
+
+class RequestIdHook(RequestHook):
+    """Echo the caller's X-Request-ID, or mint one; exposed as ctx.request_id."""
+
+    def before(self, ctx):
+        ctx.request_id = ctx.header(b"x-request-id") or uuid.uuid4().hex
+
+    def on_headers(self, ctx, headers):
+        headers[REQUEST_ID_HEADER] = ctx.request_id
+
+
+class LoggingHook(RequestHook):
+    """One structured line per request (formatted off the event loop)."""
+
+    def after(self, ctx):
+        duration = ctx.elapsed()
+        access_logger.info(
+            "%s %s → %d (%.3fs)",
+            ctx.method,
+            ctx.path,
+            ctx.status_code,
+            duration,
+            extra={
+                "method": ctx.method,
+                "path": ctx.path,
+                "route": ctx.route,
+                "status_code": ctx.status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "request_id": ctx.request_id,
+            },
+        )
+
+
+class MetricsHook(RequestHook):
+    """Count and time every request except the scrape itself."""
+
+    def before(self, ctx):
+        if ctx.path != "/metrics":
+            ACTIVE_REQUESTS.inc()
+
+    def after(self, ctx):
+        if ctx.path == "/metrics":
+            return
+        ACTIVE_REQUESTS.dec()
+        endpoint = ctx.route
+        REQUEST_COUNT.labels(
+            method=ctx.method,
+            endpoint=endpoint,
+            status_code=ctx.status_code,
+        ).inc()
+        REQUEST_DURATION.labels(method=ctx.method, endpoint=endpoint).observe(ctx.elapsed())
+
+
+class TracingHook(RequestHook):
+    """Trace sampled requests (or any sent with `X-Trace: 1`).
+
+    Adds a Server-Timing header and offers the trace to /debug/traces.
+    """
+
+    def before(self, ctx):
+        trace, token = tracing.start_trace(
+            f"{ctx.method} {ctx.path}", force=ctx.header(b"x-trace") == "1"
+        )
+        if trace is not None:
+            ctx.state["trace"] = (trace, token)
+
+    def on_headers(self, ctx, headers):
+        if "trace" in ctx.state:
+            trace, _ = ctx.state["trace"]
+            trace.finish(f"{ctx.method} {ctx.route}", ctx.status_code)
+            headers["Server-Timing"] = trace.server_timing()
+
+    def after(self, ctx):
+        if "trace" in ctx.state:
+            trace, token = ctx.state.pop("trace")
+            tracing.end_trace(token)
+            if not trace.total:  # the app raised before responding
+                trace.finish(f"{ctx.method} {ctx.route}", ctx.status_code)
+            tracing.slowest_traces.record(trace)
+
+
+class SecurityHeadersHook(RequestHook):
+    """Add SECURITY_HEADERS to every response that does not set its own."""
+
+    def __init__(self, headers: dict[str, str] | None = None):
+        self.headers = SECURITY_HEADERS if headers is None else headers
+
+    def on_headers(self, ctx, headers):
+        for name, value in self.headers.items():
+            headers.setdefault(name, value)
+
+
+def _deadline_exceeded() -> JSONResponse:
+    return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+
+
+class DeadlineMiddleware:
+    """Run the app under the request's deadline; stop work nobody awaits.
+
+    The handler runs as its own task, cancelled when the deadline passes
+    (answered with 504 if no response started yet) or when the client
+    disconnects after sending its body. DeadlineExceeded raised by
+    deadline.check() anywhere below is answered with 504 as well.
+    """
+
+    def __init__(self, app, default_timeout: float = deadline.REQUEST_TIMEOUT_S):
+        self.app = app
+        self.default_timeout = default_timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        budget = deadline.parse_timeout(
+            _decode(headers.get(b"x-request-timeout")),
+            _decode(headers.get(b"x-request-deadline")),
+            self.default_timeout,
+        )
+        loop = asyncio.get_running_loop()
+        started = finished = False
+        watcher: asyncio.Task | None = None
+
+        def cancel(reason: str) -> None:
+            if not handler.done() and CANCELLED_SCOPE_KEY not in scope:
+                scope[CANCELLED_SCOPE_KEY] = reason
+                handler.cancel()
+
+        async def watch_disconnect():
+            message = await receive()
+            if message["type"] == "http.disconnect" and not finished:
+                cancel("disconnect")
+
+        async def receive_wrapper():
+            nonlocal watcher
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                if watcher is None:  # body done: the next message can only be a disconnect
+                    watcher = loop.create_task(watch_disconnect())
+            return message
+
+        async def send_wrapper(message):
+            nonlocal started, finished
+            if message["type"] == "http.response.start":
+                started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = True
+            await send(message)
+
+        token = deadline.set_timeout(budget)
+        try:
+            # The task copies the context, deadline included
+            handler = loop.create_task(self.app(scope, receive_wrapper, send_wrapper))
+        finally:
+            deadline.reset(token)
+        timer = loop.call_later(max(budget, 0.0), cancel, "deadline") if budget is not None else None
+        try:
+            await handler
+        except asyncio.CancelledError:
+            reason = scope.get(CANCELLED_SCOPE_KEY)
+            if reason is None or not handler.cancelled():
+                raise  # we were cancelled ourselves
+            REQUESTS_CANCELLED.labels(reason=reason).inc()
+            if reason == "deadline" and not started:
+                await _deadline_exceeded()(scope, receive, send)
+        except deadline.DeadlineExceeded:
+            REQUESTS_CANCELLED.labels(reason="deadline").inc()
+            if started:
+                raise
+            await _deadline_exceeded()(scope, receive, send)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if watcher is not None:
+                watcher.cancel()
+            if not handler.done():
+                handler.cancel()
 
 
-# TODO: Create request logging middleware
-# TODO: Create request ID middleware
-# TODO: Create metrics middleware
+def _decode(value: bytes | None) -> str | None:
+    return None if value is None else value.decode("latin-1")
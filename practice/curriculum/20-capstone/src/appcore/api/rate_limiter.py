@@ -1,24 +1,26 @@
-# =============================================================================
-# Section 11 — Rate Limiter
-# Guide: docs/curriculum/20-capstone-project.md
-#
-# Exercise: Implement a sliding window rate limiter.
-#
-# TODO:
-# 1. Implement InMemoryRateLimiter class:
-#    - __init__(max_requests: int, window_seconds: int)
-#    - is_allowed(client_id: str) -> bool
-#      - Track request timestamps per client_id
-#      - Remove expired entries outside the window
-#      - Return True if under limit, False otherwise
-# 2. Create a FastAPI middleware that:
-#    - Extracts client IP from request
-#    - Calls is_allowed()
-#    - Returns 429 Too Many Requests if rate limited
-# =============================================================================
+"""
+Capstone — Sliding Window Rate Limiter
 
+InMemoryRateLimiter allows RATE_LIMIT_REQUESTS per client per
+RATE_LIMIT_WINDOW_SECONDS. RateLimitHook applies it per client IP in the
+fused middleware and answers 429 past the limit; probes and /metrics are
+exempt.
+"""
+
+import os
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+
+from fastapi.responses import JSONResponse
+
+from appcore.api.middleware import RequestContext, RequestHook
+from appcore.monitoring.tracing import span
+
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
+RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+
+# Probes and scrapes must never be throttled
+EXEMPT_PATHS = ("/health", "/ready", "/metrics")
 
 
 class InMemoryRateLimiter:
@@ -27,9 +29,60 @@ class InMemoryRateLimiter:
     def __init__(self, max_requests: int = 60, window_seconds: int = 60):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests: dict[str, list[float]] = defaultdict(list)
+        self.requests: dict[str, deque[float]] = defaultdict(deque)
+        self._last_sweep = time.monotonic()
+
+    def _window(self, client_id: str) -> deque[float]:
+        timestamps = self.requests[client_id]
+        window_start = time.monotonic() - self.window_seconds
+        while timestamps and timestamps[0] <= window_start:
+            timestamps.popleft()
+        return timestamps
+
+    def _sweep(self) -> None:
+        """Forget clients idle for a whole window (else the dict only grows)."""
+        now = time.monotonic()
+        if now - self._last_sweep < self.window_seconds:
+            return
+        self._last_sweep = now
+        cutoff = now - self.window_seconds
+        idle = [client for client, ts in self.requests.items() if not ts or ts[-1] <= cutoff]
+        for client_id in idle:
+            del self.requests[client_id]
 
     def is_allowed(self, client_id: str) -> bool:
         """Check if the client is within the rate limit."""
-        # TODO: Implement sliding window logic
-        pass
+        self._sweep()
+        timestamps = self._window(client_id)
+        if len(timestamps) >= self.max_requests:
+            return False
+        timestamps.append(time.monotonic())
+        return True
+
+    def remaining(self, client_id: str) -> int:
+        """Requests left for the client in the current window."""
+        return max(0, self.max_requests - len(self._window(client_id)))
+
+
+rate_limiter = InMemoryRateLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW_SECONDS)
+
+
+class RateLimitHook(RequestHook):
+    """Rate limit requests by client IP (a hook for ObservabilityMiddleware)."""
+
+    def before(self, ctx: RequestContext):
+        if ctx.path in EXEMPT_PATHS:
+            return None
+        ctx.state["client_ip"] = ctx.client_host
+        with span("ratelimit"):
+            allowed = rate_limiter.is_allowed(ctx.state["client_ip"])
+        if not allowed:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded. Try again later."},
+            )
+        return None
+
+    def on_headers(self, ctx: RequestContext, headers) -> None:
+        if "client_ip" in ctx.state and ctx.status_code != 429:
+            headers["X-RateLimit-Remaining"] = str(rate_limiter.remaining(ctx.state["client_ip"]))
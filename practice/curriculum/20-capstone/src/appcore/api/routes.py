@@ -2,13 +2,142 @@
 Capstone — Route Handlers
 """
 
-# from fastapi import APIRouter, Depends
-# from .schemas import PredictionRequest, PredictionResponse, HealthResponse
-# from .dependencies import get_settings, get_model
+import json
+import time
 
-# router = APIRouter()
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+
+from appcore.api.auth import require_admin_key, require_api_key
+from appcore.api.dependencies import get_prediction_store
+from appcore.api.schemas import (
+    HealthResponse,
+    ModelList,
+    PredictionPage,
+    PredictionRecord,
+    PredictionRequest,
+    PredictionResponse,
+    ReadinessResponse,
+)
+from appcore.db.repository import MAX_ID
+from appcore.db.write_buffer import prediction_buffer
+from appcore.models.registry import model_registry
+from appcore.monitoring.exposition import accepts_gzip, exposition_cache
+from appcore.monitoring.metrics import CONTENT_TYPE, PREDICTION_CONFIDENCE, PREDICTION_COUNT
+from appcore.monitoring.readiness import readiness
+from appcore.monitoring.tracing import span
+
+router = APIRouter()
+
+_start_time = time.time()
+
+
+@router.get("/health", response_model=HealthResponse)
+async def health():
+    """Liveness: answers as soon as the app is up, even while the model loads."""
+    return HealthResponse(
+        status="healthy",
+        checks={
+            "model_loaded": model_registry.active_version is not None,
+            "uptime_seconds": round(time.time() - _start_time, 2),
+        },
+    )
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def ready(response: Response):
+    """Readiness: the background checker's last verdict (503 until ready)."""
+    snapshot = readiness.snapshot()
+    if snapshot["status"] != "ready":
+        response.status_code = 503
+    return snapshot
+
+
+@router.post(
+    "/predict",
+    response_model=PredictionResponse,
+    status_code=201,
+    dependencies=[Depends(require_api_key)],
+)
+async def predict(request: PredictionRequest):
+    """Run the active model and store the result (group-committed)."""
+    if not await model_registry.wait_active():
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    with model_registry.use() as model:
+        try:
+            output = model.predict(request.features)
+        except Exception:
+            PREDICTION_COUNT.labels(model_version=model.version, status="error").inc()
+            raise
+    PREDICTION_COUNT.labels(model_version=output["model_version"], status="success").inc()
+    PREDICTION_CONFIDENCE.labels(model_version=output["model_version"]).observe(output["confidence"])
+    with span("db"):  # queueing + group commit in the write buffer
+        prediction_id = await prediction_buffer.save(
+            json.dumps(request.features), str(output["prediction"]), output["confidence"]
+        )
+    return PredictionResponse(id=prediction_id, **output)
+
+
+@router.get("/predictions", response_model=PredictionPage)
+def list_predictions(
+    limit: int = Query(50, ge=1, le=500, description="Items per page"),
+    before: str | None = Query(None, description="Cursor from a previous page"),
+    store=Depends(get_prediction_store),
+):
+    """List predictions newest first, one keyset page at a time."""
+    try:
+        items = store.list_predictions(limit=limit, before=before)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    next_cursor = store.encode_cursor(items[-1]) if len(items) == limit else None
+    return PredictionPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/predictions/{prediction_id}", response_model=PredictionRecord)
+def get_prediction(
+    prediction_id: int = Path(..., ge=1, le=MAX_ID),
+    store=Depends(get_prediction_store),
+):
+    """Get a single prediction by ID. Returns 200 OK or 404 Not Found."""
+    prediction = store.get_prediction(prediction_id)
+    if not prediction:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    return prediction
+
+
+@router.get("/models", response_model=ModelList)
+async def list_models():
+    """List loaded model versions and their lifecycle state."""
+    return ModelList(
+        active_version=model_registry.active_version,
+        versions=model_registry.versions(),
+    )
+
+
+@router.post(
+    "/models/{version}:activate",
+    response_model=ModelList,
+    dependencies=[Depends(require_admin_key)],
+)
+async def activate_model(version: str):
+    """Load, warm and hot-swap to `version` without dropping requests (admin only)."""
+    try:
+        await model_registry.activate(version)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Model {version} not found")
+    except Exception as exc:
+        raise HTTPException(status_code=422, detail=f"Cannot load model {version}: {exc}")
+    return await list_models()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint; rendered off-loop and cached briefly."""
+    use_gzip = accepts_gzip(request.headers.get("accept-encoding", ""))
+    body = await exposition_cache.get(use_gzip)
+    headers = {"Vary": "Accept-Encoding"}
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type=CONTENT_TYPE, headers=headers)
 
 
-# TODO: @router.get("/health")
 # TODO: @router.get("/version")
-# TODO: @router.post("/predict")
@@ -2,7 +2,71 @@
 Capstone — Pydantic Schemas
 """
 
-# from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field
 
 
-# TODO: Define all request/response models
+class PredictionRequest(BaseModel):
+    """Input features for a prediction."""
+
+    features: list[float] = Field(..., min_length=1, description="Input features")
+
+
+class PredictionResponse(BaseModel):
+    """A prediction result with its stored ID."""
+
+    id: int
+    prediction: float
+    confidence: float
+    model_version: str
+
+
+class PredictionRecord(BaseModel):
+    """A stored prediction row."""
+
+    id: int
+    input_text: str
+    result: str
+    confidence: float
+    created_at: str
+
+
+class PredictionPage(BaseModel):
+    """One page of predictions; pass next_cursor as ?before= for the next."""
+
+    items: list[PredictionRecord]
+    next_cursor: str | None = None
+
+
+class ModelVersion(BaseModel):
+    """One model version known to the registry."""
+
+    version: str
+    state: str
+    active: bool
+    in_flight: int
+    loaded_at: float | None = None
+    error: str | None = None
+
+
+class ModelList(BaseModel):
+    """All model versions plus the one serving traffic."""
+
+    active_version: str | None
+    versions: list[ModelVersion]
+
+
+class HealthResponse(BaseModel):
+    """Liveness status; never waits on the model or other dependencies."""
+
+    status: str
+    checks: dict
+
+
+class ReadinessResponse(BaseModel):
+    """Cached dependency checks; see appcore.monitoring.readiness."""
+
+    status: str
+    checks: dict
+
+
+# TODO: Define remaining request/response models (version)
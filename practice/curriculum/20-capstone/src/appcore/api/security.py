@@ -1,21 +1,27 @@
-# =============================================================================
-# Section 11 — API Key Verification
-# Guide: docs/curriculum/20-capstone-project.md
-#
-# Exercise: Implement API key verification.
-#
-# TODO:
-# 1. Load API_KEY from environment variable
-# 2. Implement verify_api_key(api_key: str) -> bool
-#    - Compare securely using hmac.compare_digest
-#    - Return False if API_KEY env var is not set
-# =============================================================================
+"""
+Capstone — API Key Verification
+
+Keys come from API_KEY and ADMIN_API_KEY and are compared in constant time
+(hmac.compare_digest). An unset key disables that kind of access.
+"""
 
 import hmac
 import os
 
+API_KEY = os.getenv("API_KEY")
+# Separate key for operator endpoints (/debug/*, model activation)
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+
 
 def verify_api_key(api_key: str) -> bool:
     """Verify an API key against the stored secret."""
-    # TODO: Implement secure comparison
-    pass
+    if not API_KEY or not api_key:
+        return False
+    return hmac.compare_digest(api_key.encode(), API_KEY.encode())
+
+
+def verify_admin_key(api_key: str) -> bool:
+    """Verify an admin key; admin access is disabled when ADMIN_API_KEY is unset."""
+    if not ADMIN_API_KEY or not api_key:
+        return False
+    return hmac.compare_digest(api_key.encode(), ADMIN_API_KEY.encode())
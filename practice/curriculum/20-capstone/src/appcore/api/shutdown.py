@@ -0,0 +1,113 @@
+"""
+Capstone — Graceful shutdown (drain before exit)
+
+On SIGTERM uvicorn closes its listener at once, but the load balancer
+keeps sending traffic here until its next failed /ready probe, so those
+requests get connection errors. The drain phase closes that gap:
+
+    SIGTERM  →  /ready answers 503 "draining"; requests are still served,
+                with Connection: close so clients reconnect elsewhere
+    + SHUTDOWN_DRAIN_DELAY_S  →  uvicorn's own handler runs: stop accepting,
+                wait for open connections
+    lifespan shutdown  →  wait up to SHUTDOWN_GRACE_S for requests still in
+                flight, then flush the write buffer, metrics and logs
+
+A second SIGTERM skips the delay. Keep delay + grace under the
+orchestrator's kill timeout (Kubernetes: terminationGracePeriodSeconds,
+30 s by default). The delay also leaves room for a last metrics scrape.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import threading
+import time
+
+from appcore.api.middleware import RequestContext, RequestHook
+
+SHUTDOWN_DRAIN_DELAY_S = float(os.getenv("SHUTDOWN_DRAIN_DELAY_S", "5"))
+SHUTDOWN_GRACE_S = float(os.getenv("SHUTDOWN_GRACE_S", "20"))
+
+logger = logging.getLogger(__name__)
+
+
+class Drain:
+    """Tracks in-flight requests and turns SIGTERM into a drain phase."""
+
+    def __init__(self, delay_s: float = SHUTDOWN_DRAIN_DELAY_S, grace_s: float = SHUTDOWN_GRACE_S):
+        self.delay = delay_s
+        self.grace = grace_s
+        self.draining = False
+        self.in_flight = 0
+        self._on_drain: list = []
+        self._previous = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self, on_drain=()) -> None:
+        """Serve again; call each `on_drain()` once draining begins."""
+        self.draining = False
+        self._on_drain = list(on_drain)
+        self._loop = asyncio.get_running_loop()
+        # Signal handlers can only be set from the main thread (not under TestClient)
+        if threading.current_thread() is threading.main_thread():
+            self._previous = signal.signal(signal.SIGTERM, self._handle_sigterm)
+
+    def begin(self, reason: str) -> None:
+        if self.draining:
+            return
+        self.draining = True
+        logger.info("Draining (%s): %d request(s) in flight", reason, self.in_flight)
+        for callback in self._on_drain:
+            callback()
+
+    def _handle_sigterm(self, sig, frame) -> None:
+        if self.draining:  # second SIGTERM: stop waiting
+            self._forward(sig, frame)
+            return
+        self.begin("SIGTERM")
+        self._loop.call_soon_threadsafe(self._loop.call_later, self.delay, self._forward, sig, frame)
+
+    def _forward(self, sig, frame) -> None:
+        """Hand the signal to whoever handled it before us (uvicorn)."""
+        previous = self._restore()
+        if callable(previous):
+            previous(sig, frame)
+        elif previous == signal.SIG_DFL:
+            signal.raise_signal(sig)
+
+    def _restore(self):
+        previous, self._previous = self._previous, None
+        if previous is not None and signal.getsignal(signal.SIGTERM) == self._handle_sigterm:
+            signal.signal(signal.SIGTERM, previous)
+        return previous
+
+    async def stop(self) -> bool:
+        """Drain (if not already), then wait up to the grace period for idle."""
+        self.begin("shutdown")
+        self._restore()
+        deadline = time.monotonic() + self.grace
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self.in_flight:
+            logger.warning("Shutdown grace of %.1fs over with %d request(s) in flight",
+                           self.grace, self.in_flight)
+            return False
+        return True
+
+
+drain = Drain()
+
+
+class DrainHook(RequestHook):
+    """Count in-flight requests; ask clients to reconnect elsewhere while draining."""
+
+    def before(self, ctx: RequestContext):
+        drain.in_flight += 1
+
+    def on_headers(self, ctx: RequestContext, headers) -> None:
+        if drain.draining:
+            headers["Connection"] = "close"
+
+    def after(self, ctx: RequestContext) -> None:
+        drain.in_flight -= 1
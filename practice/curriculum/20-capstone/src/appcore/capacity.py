@@ -0,0 +1,338 @@
+"""
+Capstone — Saturation-point (knee) finder
+
+"How many requests per second can one instance take?" Answered by
+measurement instead of guesswork: for each route, offer an open-loop rate
+(appcore.loadgen), step it up geometrically until p99 latency or the
+error rate breaks the SLO, then bisect between the last good and the
+first bad step. The last good step's goodput is the route's maximum
+sustainable throughput.
+
+At every step the server's CPU %, RSS and event-loop lag (from its own
+/metrics) are recorded, so the report also says *why* it stopped scaling:
+CPU-bound, loop-blocked, or neither (a lock or a downstream).
+
+By default the service is started locally (uvicorn, in a scratch working
+directory) and stopped afterwards; --url targets one that is already
+running. Results are saved as JSON and can be compared with a previous
+release's file. Run: appcore knee --help (python -m appcore.cli knee).
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from appcore.loadgen import HttpClient, Stage, Target, run_stage
+from appcore.monitoring.memory import rss_bytes
+
+DEFAULT_TARGETS = ("GET /health", 'POST /predict {"features": [1.0, 2.0, 3.0]}')
+
+
+@dataclass
+class Slo:
+    p99_ms: float = 100.0
+    error_rate: float = 0.01
+
+
+@dataclass
+class Step:
+    rate: float
+    passed: bool
+    reason: str
+    goodput_rps: float
+    p99_ms: float
+    error_rate: float
+    cpu_percent: float | None
+    rss_mb: float | None
+    loop_lag_mean_ms: float | None
+    loop_lag_p99_ms: float | None
+
+
+@dataclass
+class RouteCapacity:
+    route: str
+    max_sustainable_rps: float = 0.0
+    steps: list[Step] = field(default_factory=list)
+
+
+# --- server-side probes ---------------------------------------------------------
+
+
+def process_tree(pid: int) -> list[int]:
+    """`pid` and its descendants (uvicorn --workers forks), Linux only."""
+    pids, i = [pid], 0
+    while i < len(pids):
+        try:
+            with open(f"/proc/{pids[i]}/task/{pids[i]}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+        i += 1
+    return pids
+
+
+def cpu_seconds(pid: int) -> float | None:
+    """User + system CPU time of `pid` and its children (Linux), or None."""
+    total = 0.0
+    try:
+        for member in process_tree(pid):
+            with open(f"/proc/{member}/stat") as f:
+                # The command name may contain spaces; fields resume after ")"
+                fields = f.read().rpartition(")")[2].split()
+            total += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+    return total
+
+
+def tree_rss_bytes(pid: int) -> int | None:
+    sizes = [rss_bytes(member) for member in process_tree(pid)]
+    return None if None in sizes else sum(sizes)
+
+
+def parse_histogram(text: str, name: str) -> tuple[list[tuple[float, float]], float, float]:
+    """Cumulative (le, count) buckets, sum and count of an unlabelled histogram."""
+    buckets, total, count = [], 0.0, 0.0
+    for line in text.splitlines():
+        if line.startswith(f"{name}_bucket"):
+            le = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets.append((float(le), float(line.rsplit(" ", 1)[1])))
+        elif line.startswith(f"{name}_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{name}_count"):
+            count = float(line.rsplit(" ", 1)[1])
+    return buckets, total, count
+
+
+def lag_between(before: str, after: str, name: str = "event_loop_lag_seconds"):
+    """Mean and p99 (bucket upper bound) loop lag, in ms, between two scrapes."""
+    old_buckets, old_sum, old_count = parse_histogram(before, name)
+    new_buckets, new_sum, new_count = parse_histogram(after, name)
+    count = new_count - old_count
+    if count <= 0:
+        return None, None
+    old = dict(old_buckets)
+    rank = 0.99 * count
+    p99 = None
+    for le, cumulative in new_buckets:
+        if cumulative - old.get(le, 0.0) >= rank:
+            p99 = le
+            break
+    mean = (new_sum - old_sum) / count * 1000
+    p99_ms = None if p99 is None or p99 == float("inf") else p99 * 1000
+    return round(mean, 3), p99_ms
+
+
+class ServiceProcess:
+    """A local uvicorn serving appcore, for the duration of a measurement."""
+
+    def __init__(self, port: int = 8765, workers: int = 1, env: dict | None = None):
+        self.port = port
+        self.workers = workers
+        self.api_key = secrets.token_urlsafe(16)
+        self.env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [str(Path(__file__).resolve().parents[1]), os.getenv("PYTHONPATH")])
+            ),
+            "API_KEY": self.api_key,
+            "RATE_LIMIT_REQUESTS": str(10**9),  # measure capacity, not the per-IP limit
+            "METRICS_CACHE_TTL_MS": "0",  # per-step scrapes must be fresh
+            "SHUTDOWN_DRAIN_DELAY_S": "0",  # no load balancer to wait for
+        }
+        self.url = f"http://127.0.0.1:{port}"
+        self._workdir = tempfile.TemporaryDirectory(prefix="appcore-knee-")
+        if workers > 1:  # so one /metrics scrape covers every worker
+            self.env["METRICS_MULTIPROC_DIR"] = str(Path(self._workdir.name) / "metrics")
+        self.env.update(env or {})
+        self.proc: subprocess.Popen | None = None
+
+    def __enter__(self) -> "ServiceProcess":
+        cmd = [sys.executable, "-m", "uvicorn", "appcore.api.app:app",
+               "--port", str(self.port), "--workers", str(self.workers), "--log-level", "warning"]
+        self._stderr = open(Path(self._workdir.name) / "stderr.log", "w+b")
+        self.proc = subprocess.Popen(
+            cmd, cwd=self._workdir.name, env=self.env,
+            stdout=subprocess.DEVNULL, stderr=self._stderr,
+        )
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        self._stderr.close()
+        self._workdir.cleanup()
+
+    @property
+    def pid(self) -> int | None:
+        return self.proc.pid if self.proc is not None else None
+
+    async def wait_ready(self, client: HttpClient, timeout: float = 30.0) -> None:
+        """Poll /ready until the service (model included) can take traffic."""
+        raw = Target("GET", "/ready").encode(client.netloc)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc is not None and self.proc.poll() is not None:
+                self._stderr.seek(0)
+                raise RuntimeError(f"server exited:\n{self._stderr.read().decode()}")
+            try:
+                status, _ = await client.request(raw)
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            await asyncio.sleep(0.2)
+        raise TimeoutError(f"{self.url} not ready after {timeout:g}s")
+
+
+async def _scrape(client: HttpClient) -> str:
+    """GET /metrics body (the loadgen client only reads statuses)."""
+    reader, writer = await asyncio.open_connection(client.host, client.port)
+    try:
+        writer.write(f"GET /metrics HTTP/1.1\r\nHost: {client.netloc}\r\n"
+                     "Connection: close\r\n\r\n".encode())
+        data = await reader.read()
+    finally:
+        writer.close()
+    return data.partition(b"\r\n\r\n")[2].decode(errors="replace")
+
+
+# --- search -------------------------------------------------------------------
+
+
+async def measure_step(client: HttpClient, target: Target, rate: float, seconds: float,
+                       slo: Slo, pid: int | None) -> Step:
+    before_metrics = await _scrape(client)
+    cpu_before = cpu_seconds(pid) if pid else None
+    result = await run_stage(client, [target], Stage(rate, rate, seconds))
+    cpu_after = cpu_seconds(pid) if pid else None
+    after_metrics = await _scrape(client)
+
+    stats = result.targets[target.name]
+    completed = stats.corrected.total
+    error_rate = (completed - stats.ok) / completed if completed else 1.0
+    p99_ms = stats.corrected.percentile(99) * 1000
+    if error_rate > slo.error_rate:
+        passed, reason = False, f"error rate {error_rate:.2%} > {slo.error_rate:.2%}"
+    elif p99_ms > slo.p99_ms:
+        passed, reason = False, f"p99 {p99_ms:.1f} ms > {slo.p99_ms:g} ms"
+    else:
+        passed, reason = True, "ok"
+    cpu = None
+    if cpu_before is not None and cpu_after is not None and result.elapsed:
+        cpu = round((cpu_after - cpu_before) / result.elapsed * 100, 1)
+    rss = tree_rss_bytes(pid) if pid else None
+    lag_mean, lag_p99 = lag_between(before_metrics, after_metrics)
+    return Step(
+        rate=rate,
+        passed=passed,
+        reason=reason,
+        goodput_rps=round(stats.ok / result.elapsed, 1) if result.elapsed else 0.0,
+        p99_ms=round(p99_ms, 3),
+        error_rate=round(error_rate, 6),
+        cpu_percent=cpu,
+        rss_mb=round(rss / 2**20, 1) if rss is not None else None,
+        loop_lag_mean_ms=lag_mean,
+        loop_lag_p99_ms=lag_p99,
+    )
+
+
+async def find_knee(
+    client: HttpClient,
+    target: Target,
+    slo: Slo,
+    start_rate: float = 50.0,
+    factor: float = 1.5,
+    max_rate: float = 20_000.0,
+    step_seconds: float = 5.0,
+    refine: int = 2,
+    pid: int | None = None,
+    on_step=None,
+) -> RouteCapacity:
+    """Step the rate up until the SLO breaks, then bisect `refine` times."""
+    capacity = RouteCapacity(target.name)
+
+    async def attempt(rate: float) -> Step:
+        step = await measure_step(client, target, rate, step_seconds, slo, pid)
+        capacity.steps.append(step)
+        if on_step is not None:
+            on_step(target, step)
+        if step.passed:
+            capacity.max_sustainable_rps = max(capacity.max_sustainable_rps, step.goodput_rps)
+        await asyncio.sleep(min(2.0, step_seconds))  # let the backlog drain
+        return step
+
+    good, bad, rate = 0.0, None, start_rate
+    while rate <= max_rate:
+        if (await attempt(rate)).passed:
+            good, rate = rate, rate * factor
+        else:
+            bad = rate
+            break
+    for _ in range(refine if bad is not None and good else 0):
+        middle = (good + bad) / 2
+        if (await attempt(middle)).passed:
+            good = middle
+        else:
+            bad = middle
+    return capacity
+
+
+def save_report(path: Path, label: str, slo: Slo, routes: list[RouteCapacity]) -> dict:
+    report = {
+        "label": label,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "slo": asdict(slo),
+        "routes": {
+            route.route: {
+                "max_sustainable_rps": route.max_sustainable_rps,
+                "steps": [asdict(step) for step in route.steps],
+            }
+            for route in routes
+        },
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+    return report
+
+
+def compare(previous: dict, current: dict) -> list[str]:
+    """One line per route: max sustainable rps then → now."""
+    lines = [f"{'route':<30} {previous['label']:>12} {current['label']:>12}  change"]
+    for route, now in current["routes"].items():
+        new = now["max_sustainable_rps"]
+        old = previous["routes"].get(route, {}).get("max_sustainable_rps")
+        if old is None:
+            lines.append(f"{route:<30} {'-':>12} {new:12.1f}  new")
+            continue
+        change = f"{(new - old) / old:+.1%}" if old else "n/a"
+        lines.append(f"{route:<30} {old:12.1f} {new:12.1f}  {change}")
+    return lines
+
+
+def format_step(target: Target, step: Step) -> str:
+    def show(value, fmt):
+        return format(value, fmt) if value is not None else "-".rjust(len(format(0, fmt)))
+
+    return (
+        f"{target.name:<30} {step.rate:9.1f} {step.goodput_rps:9.1f} {step.p99_ms:9.2f} "
+        f"{step.error_rate * 100:6.2f}% {show(step.cpu_percent, '6.1f')} "
+        f"{show(step.rss_mb, '7.1f')} {show(step.loop_lag_p99_ms, '8.2f')}  {step.reason}"
+    )
+
+
+STEP_HEADER = (
+    f"{'route':<30} {'rate':>9} {'goodput':>9} {'p99 ms':>9} {'errors':>7} {'cpu %':>6} "
+    f"{'rss MB':>7} {'lag p99':>8}  verdict"
+)
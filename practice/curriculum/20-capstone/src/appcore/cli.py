@@ -0,0 +1,132 @@
+"""
+Capstone — Command line
+
+    appcore serve [options]    pre-fork multi-worker server (appcore.server);
+                               also installed as `appcore-serve`
+    appcore knee [options]     find each route's saturation point (appcore.capacity)
+
+Run: python -m appcore.cli <command> --help
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from appcore import capacity, server
+from appcore.loadgen import HttpClient, Target, parse_headers
+
+
+def _serve(args) -> None:
+    sys.exit(server.run(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        keepalive_s=args.keepalive,
+        backlog=args.backlog,
+        limit_concurrency=args.limit_concurrency,
+        preload_app=args.preload,
+        log_level=args.log_level,
+    ))
+
+
+async def _knee(args, slo, url: str, headers: dict[str, str], pid: int | None, service) -> list:
+    client = HttpClient(url, args.max_connections)
+    try:
+        if service is not None:
+            await service.wait_ready(client)
+        print(capacity.STEP_HEADER)
+        routes = []
+        for spec in args.request or capacity.DEFAULT_TARGETS:
+            routes.append(await capacity.find_knee(
+                client, Target.parse(spec, headers), slo,
+                start_rate=args.start_rate, factor=args.factor, max_rate=args.max_rate,
+                step_seconds=args.step_seconds, refine=args.refine, pid=pid,
+                on_step=lambda target, step: print(capacity.format_step(target, step), flush=True),
+            ))
+        return routes
+    finally:
+        await client.close()
+
+
+def knee(args) -> None:
+    slo = capacity.Slo(args.slo_p99_ms, args.slo_error_rate)
+    headers = parse_headers(args.header)
+    if args.url:
+        routes = asyncio.run(_knee(args, slo, args.url, headers, args.pid, None))
+    else:
+        with capacity.ServiceProcess(args.port, args.workers) as service:
+            headers.setdefault("X-API-Key", service.api_key)
+            routes = asyncio.run(_knee(args, slo, service.url, headers, service.pid, service))
+
+    print(f"\nmax sustainable throughput (p99 <= {slo.p99_ms:g} ms, "
+          f"errors <= {slo.error_rate:.2%}):")
+    for route in routes:
+        print(f"  {route.route:<30} {route.max_sustainable_rps:9.1f} rps")
+
+    label = args.label or time.strftime("%Y%m%d-%H%M%S")
+    output = Path(args.output or f"capacity/{label}.json")
+    report = capacity.save_report(output, label, slo, routes)
+    print(f"results saved to {output}")
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        print()
+        print("\n".join(capacity.compare(previous, report)))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="appcore", description="appcore service tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    s = commands.add_parser("serve", help="run the API with pre-forked workers")
+    s.add_argument("--host", default=server.APP_HOST)
+    s.add_argument("--port", type=int, default=server.APP_PORT)
+    s.add_argument("--workers", type=int, default=server.WEB_CONCURRENCY,
+                   help="worker processes (default: WEB_CONCURRENCY, else one per CPU)")
+    s.add_argument("--keepalive", type=int, default=server.SERVER_KEEPALIVE_S,
+                   help="idle keep-alive timeout, seconds")
+    s.add_argument("--backlog", type=int, default=server.SERVER_BACKLOG)
+    s.add_argument("--limit-concurrency", type=int, default=server.SERVER_LIMIT_CONCURRENCY,
+                   help="per-worker connection cap (0: none)")
+    s.add_argument("--preload", action=argparse.BooleanOptionalAction, default=server.SERVER_PRELOAD,
+                   help="load app and model once in the master, then fork")
+    s.add_argument("--log-level", default="info")
+    s.set_defaults(func=_serve)
+
+    k = commands.add_parser("knee", help="step up load until the SLO breaks, per route")
+    k.add_argument("--url", help="measure a running service instead of starting one")
+    k.add_argument("--pid", type=int, help="with --url: server pid for CPU/RSS figures")
+    k.add_argument("--port", type=int, default=8765, help="port for the started service")
+    k.add_argument("--workers", type=int, default=1)
+    k.add_argument("--request", action="append", default=[],
+                   help='"METHOD /path [json body]" (repeatable; default /health and /predict)')
+    k.add_argument("--header", action="append", default=[], help='"Name: value"')
+    k.add_argument("--slo-p99-ms", type=float, default=100.0)
+    k.add_argument("--slo-error-rate", type=float, default=0.01)
+    k.add_argument("--start-rate", type=float, default=50.0)
+    k.add_argument("--factor", type=float, default=1.5, help="rate multiplier per step")
+    k.add_argument("--max-rate", type=float, default=20_000.0)
+    k.add_argument("--step-seconds", type=float, default=5.0)
+    k.add_argument("--refine", type=int, default=2, help="bisection steps past the knee")
+    k.add_argument("--max-connections", type=int, default=1000)
+    k.add_argument("--label", help="name for this run (default: timestamp)")
+    k.add_argument("--output", help="JSON results path (default: capacity/<label>.json)")
+    k.add_argument("--compare", help="previous results JSON to compare against")
+    k.set_defaults(func=knee)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+def serve() -> None:
+    """Console script `appcore-serve` (same as `appcore serve`)."""
+    main(["serve", *sys.argv[1:]])
+
+
+if __name__ == "__main__":
+    main()
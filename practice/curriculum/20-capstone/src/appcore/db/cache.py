@@ -2,34 +2,92 @@
 # Section 04 — Optional Redis Cache
 # Guide: docs/curriculum/20-capstone-project.md
 #
-# Exercise (Optional): Add Redis caching for predictions.
+# Optional Redis caching for predictions.
 #
-# TODO:
-# 1. Create a Redis client (handle connection failure gracefully)
-# 2. Implement cache_get(key) -> dict | None
-# 3. Implement cache_set(key, value, ttl=300)
-# 4. Use in routes to cache GET /predictions/{id} results
+# 1. get_redis_client() — connect lazily, return None if Redis (or the redis
+#    package) is unavailable; a failed connect is retried only after
+#    REDIS_RETRY_SECONDS, so an outage doesn't cost a timeout per call
+# 2. cache_get(key) -> dict | None  (a miss when Redis errors)
+# 3. cache_set(key, value, ttl=300)  (a no-op when Redis errors)
+#
+# `redis` is imported on first use, not at module import, so processes that
+# never touch the cache (and /health on a cold start) don't pay for it.
 # =============================================================================
 
 import json
+import logging
 import os
+import time
+
+from appcore import deadline
+from appcore.monitoring.tracing import traced
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_RETRY_SECONDS = float(os.getenv("REDIS_RETRY_SECONDS", "30"))
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_unavailable = False
+_retry_at = 0.0
+
+
+def _mark_down(exc: Exception) -> None:
+    """Forget the client and skip Redis until REDIS_RETRY_SECONDS have passed."""
+    global _client, _retry_at
+    _client = None
+    _retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+    logger.warning("Redis unavailable at %s: %s (retry in %.0fs)", REDIS_URL, exc,
+                   REDIS_RETRY_SECONDS)
 
 
 def get_redis_client():
     """Return a Redis client, or None if unavailable."""
-    # TODO: Connect to Redis, return None on failure
-    pass
+    global _client, _unavailable
+    if _client is not None or _unavailable or time.monotonic() < _retry_at:
+        return _client
+    try:
+        import redis
+    except ImportError:
+        _unavailable = True
+        return None
+    try:
+        client = redis.Redis.from_url(REDIS_URL, decode_responses=True, socket_timeout=0.5)
+        client.ping()
+    except redis.RedisError as exc:
+        _mark_down(exc)
+        return None
+    _client = client
+    return _client
 
 
+@traced("cache")
 def cache_get(key: str) -> dict | None:
-    """Retrieve cached value."""
-    # TODO: GET from Redis, deserialize JSON
-    pass
+    """Retrieve cached value; None on a miss or a Redis error."""
+    deadline.check("cache")
+    client = get_redis_client()
+    if client is None:
+        return None
+    import redis  # already imported by get_redis_client()
 
+    try:
+        cached = client.get(key)
+    except redis.RedisError as exc:
+        _mark_down(exc)
+        return None
+    return json.loads(cached) if cached else None
 
+
+@traced("cache")
 def cache_set(key: str, value: dict, ttl: int = 300) -> None:
-    """Store value in cache with TTL."""
-    # TODO: SET in Redis with expiration
-    pass
+    """Store value in cache with TTL; skipped on a Redis error."""
+    deadline.check("cache")
+    client = get_redis_client()
+    if client is None:
+        return
+    import redis
+
+    try:
+        client.setex(key, ttl, json.dumps(value))
+    except redis.RedisError as exc:
+        _mark_down(exc)
@@ -2,39 +2,88 @@
 # Section 04 — Database Connection Manager
 # Guide: docs/curriculum/20-capstone-project.md
 #
-# Exercise: Implement SQLite database with context manager.
+# SQLite database with a context-managed connection.
 #
-# TODO:
-# 1. Create DATABASE_PATH constant (use pathlib)
-# 2. Implement get_db() context manager that:
+# 1. DATABASE_PATH constant (pathlib) — tests monkeypatch it to a tmp file
+# 2. get_db() context manager that:
 #    - Opens a sqlite3 connection
 #    - Sets row_factory = sqlite3.Row
 #    - Yields the connection
 #    - Commits on success, rolls back on exception
 #    - Always closes the connection
-# 3. Implement init_db() that creates the predictions table:
+# 3. init_db() that creates the predictions table:
 #    - id INTEGER PRIMARY KEY AUTOINCREMENT
 #    - input_text TEXT NOT NULL
 #    - result TEXT NOT NULL
 #    - confidence REAL NOT NULL
 #    - created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+#    plus an index on (created_at, id) so list_predictions() walks the index
+#    in order instead of sorting the whole table on every call.
+#
+# The database runs in WAL mode so readers never block the (batched) writer,
+# and with synchronous=NORMAL so a commit costs one fsync per checkpoint
+# instead of one per transaction.
+#
+# Inside a request with a deadline (appcore.deadline), get_db() refuses to
+# start once it has passed, waits for locks at most until it, and a progress
+# handler interrupts a running query when it expires.
 # =============================================================================
 
 import sqlite3
 from contextlib import contextmanager
 from pathlib import Path
 
+from appcore import deadline
+
 DATABASE_PATH = Path("data/predictions.db")
+BUSY_TIMEOUT_SECONDS = 5.0
+# SQLite VM instructions between deadline checks while a query runs
+PROGRESS_OPCODES = 10_000
 
 
 @contextmanager
-def get_db():
-    """Yield a SQLite connection with automatic commit/rollback."""
-    # TODO: Implement context manager
-    pass
+def get_db(path: Path | None = None):
+    """Yield a SQLite connection with automatic commit/rollback.
+
+    `path` defaults to DATABASE_PATH; the partitioned store passes the file
+    of one time partition.
+    """
+    deadline.check("db")
+    conn = sqlite3.connect(
+        str(path or DATABASE_PATH), timeout=deadline.timeout(BUSY_TIMEOUT_SECONDS)
+    )
+    conn.row_factory = sqlite3.Row
+    if deadline.remaining() is not None:
+        conn.set_progress_handler(deadline.expired, PROGRESS_OPCODES)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    try:
+        yield conn
+        conn.commit()
+    except Exception as exc:
+        conn.rollback()
+        if isinstance(exc, sqlite3.OperationalError) and deadline.expired():
+            raise deadline.DeadlineExceeded("db") from exc
+        raise
+    finally:
+        conn.close()
 
 
-def init_db():
+def init_db(path: Path | None = None):
     """Create tables if they don't exist."""
-    # TODO: Create predictions table
-    pass
+    path = path or DATABASE_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with get_db(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                input_text TEXT NOT NULL,
+                result TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_predictions_created_at_id
+            ON predictions(created_at, id)
+        """)
@@ -0,0 +1,190 @@
+# =============================================================================
+# Section 04 — Time-Partitioned Prediction Storage
+# Guide: docs/curriculum/20-capstone-project.md
+#
+# A single data/predictions.db grows forever, and a retention DELETE over
+# millions of rows bloats the file and holds the write lock for seconds.
+# PartitionRouter stores one SQLite file per day (or hour) instead:
+#
+#    data/partitions/predictions-20261019.db      ← day partitions
+#    data/partitions/predictions-2026101914.db    ← hour partitions
+#
+# - Writes go to the partition of "now" (rotation happens on first write
+#   into a new period; the file is created lazily)
+# - Prediction IDs are global: (partition number << 32) | local row ID,
+#   so get_prediction() opens exactly one file
+# - list_predictions() walks partitions newest → oldest with the same
+#   keyset cursor as appcore.db.repository
+# - Retention is os.unlink() of whole files older than RETENTION_PERIODS
+#
+# It exposes the same functions as appcore.db.repository, so either can be
+# returned by appcore.api.dependencies.get_prediction_store().
+# =============================================================================
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from appcore.db.database import get_db, init_db as init_partition
+from appcore.db.repository import encode_cursor, decode_cursor
+
+PARTITION_DIR = Path(os.getenv("PARTITION_DIR", "data/partitions"))
+RETENTION_PERIODS = int(os.getenv("PARTITION_RETENTION_PERIODS", "30"))
+
+LOCAL_ID_BITS = 32
+LOCAL_ID_MASK = (1 << LOCAL_ID_BITS) - 1
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+GRANULARITIES = {
+    "day": (timedelta(days=1), "%Y%m%d"),
+    "hour": (timedelta(hours=1), "%Y%m%d%H"),
+}
+
+INSERT_PREDICTION = (
+    "INSERT INTO predictions (input_text, result, confidence, created_at) "
+    "VALUES (?, ?, ?, ?)"
+)
+
+
+class PartitionRouter:
+    """Route prediction reads/writes across per-period SQLite files."""
+
+    def __init__(
+        self,
+        directory: Path = PARTITION_DIR,
+        granularity: str = "day",
+        retention_periods: int = RETENTION_PERIODS,
+        clock=None,
+    ):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {sorted(GRANULARITIES)}")
+        self.directory = Path(directory)
+        self.granularity = granularity
+        self.period, self._name_format = GRANULARITIES[granularity]
+        self.retention_periods = retention_periods
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._lock = threading.Lock()
+        self._current: int | None = None
+
+    # --- partition bookkeeping ---------------------------------------------
+
+    def partition_number(self, moment: datetime) -> int:
+        """Periods since the Unix epoch (days or hours)."""
+        return (moment - EPOCH) // self.period
+
+    def partition_path(self, number: int) -> Path:
+        start = EPOCH + number * self.period
+        return self.directory / f"predictions-{start.strftime(self._name_format)}.db"
+
+    def partitions(self) -> list[int]:
+        """Existing partition numbers, newest first."""
+        numbers = []
+        for path in self.directory.glob("predictions-*.db"):
+            stamp = path.stem.removeprefix("predictions-")
+            try:
+                start = datetime.strptime(stamp, self._name_format)
+            except ValueError:
+                continue
+            numbers.append(self.partition_number(start.replace(tzinfo=timezone.utc)))
+        return sorted(numbers, reverse=True)
+
+    def init_db(self) -> None:
+        """Create the partition directory and the current partition."""
+        self._rotate(self.partition_number(self._clock()))
+
+    def _rotate(self, number: int) -> None:
+        """Make `number` the write partition; drop expired ones on change."""
+        if number == self._current:
+            return
+        with self._lock:
+            if number == self._current:
+                return
+            init_partition(self.partition_path(number))
+            self._current = number
+        self.drop_expired()
+
+    def drop_expired(self) -> list[Path]:
+        """Unlink partitions older than the retention window."""
+        cutoff = self.partition_number(self._clock()) - self.retention_periods
+        dropped = []
+        for number in self.partitions():
+            if number > cutoff:
+                continue
+            path = self.partition_path(number)
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{path}{suffix}").unlink(missing_ok=True)
+            dropped.append(path)
+        return dropped
+
+    # --- repository interface ----------------------------------------------
+
+    def save_prediction(self, input_text: str, result: str, confidence: float) -> int:
+        """Save a prediction in the current partition and return its global ID."""
+        return self.save_predictions([(input_text, result, confidence)])[0]
+
+    def save_predictions(self, rows: list[tuple[str, str, float]]) -> list[int]:
+        """Save many predictions in one transaction on the current partition."""
+        if not rows:
+            return []
+        now = self._clock()
+        number = self.partition_number(now)
+        self._rotate(number)
+        created_at = now.strftime("%Y-%m-%d %H:%M:%S")
+        with get_db(self.partition_path(number)) as conn:
+            conn.executemany(INSERT_PREDICTION, [(*row, created_at) for row in rows])
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        first_id = last_id - len(rows) + 1
+        return [(number << LOCAL_ID_BITS) | local for local in range(first_id, last_id + 1)]
+
+    def get_prediction(self, prediction_id: int) -> dict | None:
+        """Fetch a single prediction by global ID (opens one partition)."""
+        number, local_id = prediction_id >> LOCAL_ID_BITS, prediction_id & LOCAL_ID_MASK
+        try:
+            path = self.partition_path(number)
+        except (OverflowError, ValueError):  # no datetime for that period: not ours
+            return None
+        if not path.exists():
+            return None
+        with get_db(path) as conn:
+            row = conn.execute(
+                "SELECT * FROM predictions WHERE id = ?", (local_id,)
+            ).fetchone()
+        return self._globalize(number, row) if row else None
+
+    def list_predictions(self, limit: int = 50, before: str | None = None) -> list[dict]:
+        """List predictions newest first across partitions."""
+        cursor = None
+        if before is not None:
+            created_at, prediction_id = decode_cursor(before)
+            cursor = (prediction_id >> LOCAL_ID_BITS, created_at, prediction_id & LOCAL_ID_MASK)
+
+        results: list[dict] = []
+        for number in self.partitions():
+            if cursor is not None and number > cursor[0]:
+                continue
+            with get_db(self.partition_path(number)) as conn:
+                if cursor is not None and number == cursor[0]:
+                    rows = conn.execute(
+                        "SELECT * FROM predictions WHERE (created_at, id) < (?, ?) "
+                        "ORDER BY created_at DESC, id DESC LIMIT ?",
+                        (cursor[1], cursor[2], limit - len(results)),
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        "SELECT * FROM predictions ORDER BY created_at DESC, id DESC LIMIT ?",
+                        (limit - len(results),),
+                    ).fetchall()
+            results.extend(self._globalize(number, row) for row in rows)
+            if len(results) >= limit:
+                break
+        return results
+
+    def encode_cursor(self, prediction: dict) -> str:
+        return encode_cursor(prediction)
+
+    @staticmethod
+    def _globalize(number: int, row) -> dict:
+        data = dict(row)
+        data["id"] = (number << LOCAL_ID_BITS) | data["id"]
+        return data
@@ -2,35 +2,121 @@
 # Section 04 — Prediction Repository (CRUD)
 # Guide: docs/curriculum/20-capstone-project.md
 #
-# Exercise: Implement repository pattern for prediction storage.
+# Repository pattern for prediction storage.
 #
-# TODO:
-# 1. Implement save_prediction(input_text, result, confidence) -> int
+# 1. save_prediction(input_text, result, confidence) -> int
 #    - Insert into predictions table
 #    - Return the new row ID
-# 2. Implement get_prediction(prediction_id) -> dict | None
+# 2. save_predictions(rows) -> list[int]
+#    - Insert many rows with executemany in ONE transaction (group commit)
+#    - Used by the write-behind buffer in appcore.db.write_buffer
+# 3. get_prediction(prediction_id) -> dict | None
 #    - Fetch single prediction by ID
 #    - Return dict or None if not found
-# 3. Implement list_predictions(limit=50) -> list[dict]
+# 4. list_predictions(limit=50, before=None) -> list[dict]
 #    - Return recent predictions ordered by created_at DESC
+#    - Keyset pagination: `before` is an opaque cursor from encode_cursor();
+#      each page is an index range scan, so page 10,000 costs the same as
+#      page 1 (no OFFSET)
 # =============================================================================
 
-from appcore.db.database import get_db
+import base64
+import json
 
+from appcore.db.database import get_db, init_db
+from appcore.monitoring.tracing import traced
 
+# The prediction store interface (see appcore.api.dependencies); init_db is
+# re-exported so this module and PartitionRouter are interchangeable
+__all__ = [
+    "init_db",
+    "save_prediction",
+    "save_predictions",
+    "get_prediction",
+    "list_predictions",
+    "encode_cursor",
+    "decode_cursor",
+]
+
+# SQLite INTEGER range; larger ids raise OverflowError in the driver
+MIN_ID, MAX_ID = -2**63, 2**63 - 1
+
+INSERT_PREDICTION = (
+    "INSERT INTO predictions (input_text, result, confidence) VALUES (?, ?, ?)"
+)
+
+
+@traced("db")
 def save_prediction(input_text: str, result: str, confidence: float) -> int:
     """Save a prediction and return its ID."""
-    # TODO: INSERT into predictions table
-    pass
+    with get_db() as conn:
+        cursor = conn.execute(INSERT_PREDICTION, (input_text, result, confidence))
+        return cursor.lastrowid
+
+
+@traced("db")
+def save_predictions(rows: list[tuple[str, str, float]]) -> list[int]:
+    """Save many predictions in a single transaction and return their IDs.
 
+    The INSERT takes SQLite's write lock, so no other writer can interleave
+    and the AUTOINCREMENT IDs of the batch are contiguous, ending at
+    last_insert_rowid().
+    """
+    if not rows:
+        return []
+    with get_db() as conn:
+        conn.executemany(INSERT_PREDICTION, rows)
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    first_id = last_id - len(rows) + 1
+    return list(range(first_id, last_id + 1))
 
+
+@traced("db")
 def get_prediction(prediction_id: int) -> dict | None:
     """Fetch a single prediction by ID."""
-    # TODO: SELECT by ID
-    pass
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT * FROM predictions WHERE id = ?", (prediction_id,)
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def encode_cursor(prediction: dict) -> str:
+    """Build an opaque page cursor pointing just past `prediction`."""
+    raw = json.dumps([prediction["created_at"], prediction["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """Decode a cursor from encode_cursor(); raise ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, prediction_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if (
+        not isinstance(created_at, str)
+        or not isinstance(prediction_id, int)
+        or not MIN_ID <= prediction_id <= MAX_ID
+    ):
+        raise ValueError("Invalid cursor")
+    return created_at, prediction_id
 
 
-def list_predictions(limit: int = 50) -> list[dict]:
-    """List recent predictions."""
-    # TODO: SELECT with ORDER BY and LIMIT
-    pass
+@traced("db")
+def list_predictions(limit: int = 50, before: str | None = None) -> list[dict]:
+    """List recent predictions, optionally starting after a page cursor."""
+    with get_db() as conn:
+        if before is None:
+            rows = conn.execute(
+                "SELECT * FROM predictions ORDER BY created_at DESC, id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        else:
+            created_at, prediction_id = decode_cursor(before)
+            rows = conn.execute(
+                "SELECT * FROM predictions WHERE (created_at, id) < (?, ?) "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (created_at, prediction_id, limit),
+            ).fetchall()
+    return [dict(row) for row in rows]
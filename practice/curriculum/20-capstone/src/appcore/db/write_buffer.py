@@ -0,0 +1,128 @@
+# =============================================================================
+# Section 04 — Write-Behind Buffer (group commit)
+# Guide: docs/curriculum/20-capstone-project.md
+#
+# One INSERT + COMMIT per /predict means one fsync per request, which caps
+# SQLite at a few hundred writes/second. The buffer collects rows in memory
+# and flushes them with executemany() in ONE transaction when either:
+#    - WRITE_BATCH_SIZE rows are pending, or
+#    - WRITE_BATCH_DELAY_MS milliseconds passed since the first pending row
+#
+# Usage:
+#    row_id = await prediction_buffer.save(text, result, confidence)  # wait
+#    prediction_buffer.submit(text, result, confidence)                # fire
+#
+# The app lifespan calls start() on startup and stop() on shutdown, which
+# flushes whatever is still pending. `writer` is the batch insert function:
+# repository.save_predictions, or PartitionRouter.save_predictions.
+# =============================================================================
+
+import asyncio
+import logging
+import os
+
+from appcore import deadline
+from appcore.db.repository import save_predictions
+
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "500"))
+WRITE_BATCH_DELAY_MS = float(os.getenv("WRITE_BATCH_DELAY_MS", "10"))
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionWriteBuffer:
+    """Async write-behind buffer that group-commits prediction rows."""
+
+    def __init__(
+        self,
+        max_batch: int = WRITE_BATCH_SIZE,
+        max_delay_ms: float = WRITE_BATCH_DELAY_MS,
+        writer=save_predictions,
+    ):
+        self.writer = writer
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._pending: list[tuple[tuple[str, str, float], asyncio.Future]] = []
+        self._has_rows: asyncio.Event | None = None
+        self._full: asyncio.Event | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self.running:
+            return
+        self._has_rows = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run(), name="prediction-write-buffer")
+
+    async def stop(self) -> None:
+        """Stop the flusher and commit everything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def submit(self, input_text: str, result: str, confidence: float) -> asyncio.Future:
+        """Queue a row and return a future that resolves to its row ID."""
+        if not self.running:
+            raise RuntimeError("PredictionWriteBuffer is not started")
+        deadline.check("db")  # don't write rows for a request nobody awaits
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(((input_text, result, confidence), future))
+        self._has_rows.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return future
+
+    async def save(self, input_text: str, result: str, confidence: float) -> int:
+        """Queue a row and wait until it is committed; return its row ID."""
+        return await self.submit(input_text, result, confidence)
+
+    async def flush(self) -> None:
+        """Commit all pending rows now."""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            self._full.clear()
+            self._has_rows.clear()
+            if not batch:
+                return
+            try:
+                ids = await asyncio.to_thread(self.writer, [row for row, _ in batch])
+            except Exception as exc:
+                logger.exception("Failed to flush %d buffered predictions", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+            for (_, future), row_id in zip(batch, ids):
+                if not future.done():
+                    future.set_result(row_id)
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_rows.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            # Shielded so stop() cannot cancel a batch halfway through commit.
+            await asyncio.shield(self.flush())
+
+
+prediction_buffer = PredictionWriteBuffer()
@@ -0,0 +1,98 @@
+"""
+Capstone — Request deadlines
+
+A client that gives up after 2 s does not want the prediction we finish at
+3 s. DeadlineMiddleware (appcore.api.middleware) reads the caller's budget
+from either header
+
+    X-Request-Timeout:  seconds from now, e.g. "2" or "0.250"
+    X-Request-Deadline: absolute Unix time in seconds
+
+capped by REQUEST_TIMEOUT_S, and stores it in a contextvar for the
+request. The contextvar follows the request into sync handlers and
+asyncio.to_thread, so work can give up early wherever it is:
+
+    check("model")                      # raise DeadlineExceeded if passed
+    timeout(BUSY_TIMEOUT_SECONDS)       # a client timeout that fits the budget
+    outbound_headers()                  # pass the rest of the budget on
+
+The model registry, the DB connection and the cache check it; the
+middleware also cancels the handler when the deadline passes or the
+client disconnects.
+"""
+
+import os
+import time
+from contextvars import ContextVar
+
+# Upper bound (and default) for every request; 0 disables
+REQUEST_TIMEOUT_S = float(os.getenv("REQUEST_TIMEOUT_S", "30"))
+
+TIMEOUT_HEADER = "X-Request-Timeout"
+DEADLINE_HEADER = "X-Request-Deadline"
+
+_deadline: ContextVar[float | None] = ContextVar("appcore_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before `stage` could run."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"deadline exceeded before {stage}")
+        self.stage = stage
+
+
+def parse_timeout(timeout: str | None, deadline: str | None,
+                  default: float = REQUEST_TIMEOUT_S) -> float | None:
+    """Seconds the request may take: the tightest of the headers and `default`.
+
+    Unparseable headers are ignored; None means no deadline at all.
+    """
+    budgets = [default] if default > 0 else []
+    for raw, absolute in ((timeout, False), (deadline, True)):
+        if raw is None:
+            continue
+        try:
+            value = float(raw)
+        except ValueError:
+            continue
+        budgets.append(value - time.time() if absolute else value)
+    return min(budgets) if budgets else None
+
+
+def set_timeout(seconds: float | None):
+    """Start the current request's budget; returns a token for reset()."""
+    return _deadline.set(None if seconds is None else time.monotonic() + seconds)
+
+
+def reset(token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left (may be negative), or None without a deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    deadline = _deadline.get()
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def check(stage: str) -> None:
+    """Raise DeadlineExceeded if the current request is out of time."""
+    if expired():
+        raise DeadlineExceeded(stage)
+
+
+def timeout(default: float) -> float:
+    """`default`, shortened to what is left of the request's budget."""
+    left = remaining()
+    return default if left is None else max(0.0, min(default, left))
+
+
+def outbound_headers() -> dict[str, str]:
+    """Headers that hand the remaining budget to a downstream service."""
+    left = remaining()
+    return {} if left is None else {TIMEOUT_HEADER: f"{max(0.0, left):.3f}"}
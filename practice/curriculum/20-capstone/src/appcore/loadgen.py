@@ -0,0 +1,458 @@
+"""
+Capstone — Open-loop load generator
+
+A closed-loop tester (N workers, each sending its next request when the
+last one returns) slows down exactly when the server does: a 2 s stall
+delays a handful of requests instead of the thousands real users would
+have sent meanwhile, so the tail looks fine. That is coordinated omission.
+
+This tool is open loop: request i of a stage is *due* at start + i / rate,
+whether or not earlier ones came back, and its latency is measured from
+when it was due. Time spent waiting for the generator or for a free
+connection counts against the server, as it would for a user. The
+uncorrected latency (from the actual send) is reported alongside, so the
+difference is visible.
+
+Latencies go into HDR-style log-linear histograms (LatencyHistogram):
+constant relative precision from microseconds to minutes, cheap to merge.
+
+Run against a local uvicorn (appcore, crud_api, ...):
+
+    python -m appcore.loadgen http://127.0.0.1:8000 \\
+        --request "GET /health" --stages 200:10,400:10,800:10 \\
+        --json report.json
+
+Stages are "rate:seconds" (constant) or "from-to:seconds" (linear ramp).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import ssl
+import sys
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+USER_AGENT = "appcore-loadgen/1.0"
+
+
+class LatencyHistogram:
+    """Log-linear histogram of integer microseconds (HdrHistogram layout).
+
+    Values below 2 * 10**digits are exact; above, each power-of-two range
+    is split into 10**digits-ish linear sub-buckets, so any recorded value
+    is off by less than 10**-digits relative.
+    """
+
+    def __init__(self, significant_digits: int = 2):
+        self.sub_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.sub_count = 1 << self.sub_bits
+        self.half = self.sub_count >> 1
+        self.counts: list[int] = []
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half + (value >> shift) - self.half
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self.sub_count:
+            return index
+        shift, offset = divmod(index - self.sub_count, self.half)
+        shift += 1
+        return ((offset + self.half + 1) << shift) - 1
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        value = max(0, int(seconds * 1e6))
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += count
+        self.total += count
+        self.sum += value * count
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """Seconds at or below which `p` percent of values fall."""
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(self.total * p / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max) / 1e6
+        return self.max / 1e6
+
+    def summary_ms(self) -> dict:
+        ms = {f"p{p:g}": round(self.percentile(p) * 1000, 3) for p in (50, 90, 99, 99.9)}
+        ms["max"] = round(self.max / 1000, 3)
+        ms["mean"] = round(self.sum / self.total / 1000, 3) if self.total else 0.0
+        return ms
+
+
+# --- HTTP/1.1 keep-alive client (no dependencies, little overhead) ----------
+
+
+@dataclass
+class Target:
+    """One request to send: 'GET /health' or 'POST /predict {"features": [1]}'."""
+
+    method: str
+    path: str
+    body: bytes = b""
+    headers: dict[str, str] = field(default_factory=dict)
+    weight: float = 1.0
+
+    @classmethod
+    def parse(cls, spec: str, headers: dict[str, str] | None = None) -> "Target":
+        method, _, rest = spec.strip().partition(" ")
+        path, _, body = rest.strip().partition(" ")
+        weight = 1.0
+        if "@" in method:
+            method, _, raw = method.partition("@")
+            weight = float(raw)
+        target_headers = dict(headers or {})
+        if body:
+            target_headers.setdefault("Content-Type", "application/json")
+        return cls(method.upper(), path or "/", body.encode(), target_headers, weight)
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+    def encode(self, host: str) -> bytes:
+        lines = [f"{self.method} {self.path} HTTP/1.1", f"Host: {host}",
+                 f"User-Agent: {USER_AGENT}", f"Content-Length: {len(self.body)}"]
+        lines += [f"{key}: {value}" for key, value in self.headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+class HttpClient:
+    """A pool of keep-alive connections to one origin."""
+
+    def __init__(self, url: str, max_connections: int = 1000):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.netloc = parts.netloc
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def request(self, raw: bytes) -> tuple[int, float]:
+        """Send a pre-encoded request; return (status, loop time it was written)."""
+        async with self._slots:
+            if self._idle:
+                reader, writer = self._idle.pop()
+            else:
+                reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+            try:
+                sent = asyncio.get_running_loop().time()
+                writer.write(raw)
+                status, keep_alive = await _read_response(reader)
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+            return status, sent
+
+    async def close(self) -> None:
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[int, bool]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed by server")
+    status = int(status_line.split(b" ", 2)[1])
+    length, chunked, keep_alive = None, False, True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"transfer-encoding":
+            chunked = b"chunked" in value
+        elif name == b"connection":
+            keep_alive = value != b"close"
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()  # body until EOF
+        keep_alive = False
+    return status, keep_alive
+
+
+# --- open-loop driver ---------------------------------------------------------
+
+
+@dataclass
+class Stage:
+    start_rate: float
+    end_rate: float
+    seconds: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "Stage":
+        rates, _, seconds = spec.partition(":")
+        low, _, high = rates.partition("-")
+        return cls(float(low), float(high or low), float(seconds))
+
+    def due_times(self):
+        """Offsets (s) of each request; a linear ramp integrates the rate."""
+        a, b, t = self.start_rate, self.end_rate, self.seconds
+        slope = (b - a) / t if t else 0.0
+        i = 0
+        while True:
+            i += 1
+            # solve a*x + slope*x^2/2 = i for x
+            if slope:
+                disc = a * a + 2 * slope * i
+                if disc < 0:
+                    return
+                x = (math.sqrt(disc) - a) / slope
+            elif a > 0:
+                x = i / a
+            else:
+                return
+            if x > t:
+                return
+            yield x
+
+
+@dataclass
+class TargetStats:
+    corrected: LatencyHistogram = field(default_factory=LatencyHistogram)
+    uncorrected: LatencyHistogram = field(default_factory=LatencyHistogram)
+    statuses: dict[str, int] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> int:
+        return sum(n for status, n in self.statuses.items() if int(status) < 400)
+
+    @property
+    def failed(self) -> int:
+        return sum(self.errors.values()) + sum(
+            n for status, n in self.statuses.items() if int(status) >= 500
+        )
+
+    def merge(self, other: "TargetStats") -> None:
+        self.corrected.merge(other.corrected)
+        self.uncorrected.merge(other.uncorrected)
+        for mine, theirs in ((self.statuses, other.statuses), (self.errors, other.errors)):
+            for key, n in theirs.items():
+                mine[key] = mine.get(key, 0) + n
+
+
+@dataclass
+class StageResult:
+    stage: Stage
+    elapsed: float = 0.0
+    sent: int = 0
+    max_send_lag: float = 0.0
+    targets: dict[str, TargetStats] = field(default_factory=dict)
+
+    def overall(self) -> TargetStats:
+        total = TargetStats()
+        for stats in self.targets.values():
+            total.merge(stats)
+        return total
+
+    def to_dict(self) -> dict:
+        def describe(stats: TargetStats) -> dict:
+            completed = stats.corrected.total
+            return {
+                "completed": completed,
+                "ok": stats.ok,
+                "failed": stats.failed,
+                "error_rate": round(stats.failed / completed, 6) if completed else 0.0,
+                "throughput_rps": round(stats.ok / self.elapsed, 3) if self.elapsed else 0.0,
+                "statuses": stats.statuses,
+                "errors": stats.errors,
+                "latency_ms": stats.corrected.summary_ms(),
+                "uncorrected_latency_ms": stats.uncorrected.summary_ms(),
+            }
+
+        return {
+            "target_rps": [self.stage.start_rate, self.stage.end_rate],
+            "seconds": self.stage.seconds,
+            "elapsed": round(self.elapsed, 3),
+            "sent": self.sent,
+            "offered_rps": round(self.sent / self.elapsed, 3) if self.elapsed else 0.0,
+            "max_send_lag_ms": round(self.max_send_lag * 1000, 3),
+            **describe(self.overall()),
+            "targets": {name: describe(stats) for name, stats in self.targets.items()},
+        }
+
+
+async def run_stage(
+    client: HttpClient,
+    targets: list[Target],
+    stage: Stage,
+    timeout: float = 10.0,
+    seed: int | None = None,
+) -> StageResult:
+    """Offer `stage`'s arrival rate regardless of how the server keeps up."""
+    result = StageResult(stage, targets={target.name: TargetStats() for target in targets})
+    encoded = [target.encode(client.netloc) for target in targets]
+    weights = [target.weight for target in targets]
+    pick = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    in_flight: set[asyncio.Task] = set()
+
+    async def one(index: int, due: float) -> None:
+        stats = result.targets[targets[index].name]
+        sent = None
+        try:
+            status, sent = await asyncio.wait_for(client.request(encoded[index]), timeout)
+            key = str(status)
+            stats.statuses[key] = stats.statuses.get(key, 0) + 1
+        except asyncio.TimeoutError:
+            stats.errors["timeout"] = stats.errors.get("timeout", 0) + 1
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as exc:
+            key = type(exc).__name__
+            stats.errors[key] = stats.errors.get(key, 0) + 1
+        done = loop.time()
+        stats.corrected.record(done - due)
+        stats.uncorrected.record(done - (due if sent is None else sent))
+
+    start = loop.time()
+    for offset in stage.due_times():
+        due = start + offset
+        # sleep(0) when behind still lets in-flight requests progress
+        await asyncio.sleep(max(0.0, due - loop.time()))
+        result.max_send_lag = max(result.max_send_lag, loop.time() - due)
+        index = pick.choices(range(len(targets)), weights)[0] if len(targets) > 1 else 0
+        task = loop.create_task(one(index, due))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        result.sent += 1
+    remaining = start + stage.seconds - loop.time()
+    if remaining > 0:
+        await asyncio.sleep(remaining)
+    if in_flight:
+        await asyncio.wait(in_flight)
+    result.elapsed = loop.time() - start
+    return result
+
+
+async def run(
+    url: str,
+    targets: list[Target],
+    stages: list[Stage],
+    timeout: float = 10.0,
+    max_connections: int = 1000,
+    on_stage=None,
+) -> list[StageResult]:
+    """Run each stage in turn on one connection pool."""
+    client = HttpClient(url, max_connections)
+    results = []
+    try:
+        for stage in stages:
+            result = await run_stage(client, targets, stage, timeout)
+            results.append(result)
+            if on_stage is not None:
+                on_stage(result)
+    finally:
+        await client.close()
+    return results
+
+
+def format_stage(result: StageResult) -> str:
+    data = result.to_dict()
+    latency = data["latency_ms"]
+    low, high = data["target_rps"]
+    rate = f"{low:g}" if low == high else f"{low:g}-{high:g}"
+    return (
+        f"{rate:>11} {data['offered_rps']:9.1f} {data['throughput_rps']:9.1f} "
+        f"{data['error_rate'] * 100:6.2f}% {latency['p50']:9.2f} {latency['p90']:9.2f} "
+        f"{latency['p99']:9.2f} {latency['p99.9']:9.2f} {latency['max']:9.2f} "
+        f"{data['uncorrected_latency_ms']['p99']:11.2f}"
+    )
+
+
+TEXT_HEADER = (
+    f"{'target rps':>11} {'offered':>9} {'good rps':>9} {'errors':>7} {'p50 ms':>9} "
+    f"{'p90 ms':>9} {'p99 ms':>9} {'p99.9 ms':>9} {'max ms':>9} {'p99 uncorr':>11}"
+)
+
+
+def parse_headers(values: list[str]) -> dict[str, str]:
+    headers = {}
+    for value in values:
+        name, _, content = value.partition(":")
+        headers[name.strip()] = content.strip()
+    return headers
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Open-loop HTTP load generator")
+    parser.add_argument("url", help="base URL, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--request", action="append", default=[],
+                        help='"METHOD[@weight] /path [json body]" (repeatable)')
+    parser.add_argument("--header", action="append", default=[], help='"Name: value"')
+    parser.add_argument("--stages", default="100:10", help="comma separated rate:seconds")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--json", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    headers = parse_headers(args.header)
+    targets = [Target.parse(spec, headers) for spec in args.request or ["GET /health"]]
+    stages = [Stage.parse(spec) for spec in args.stages.split(",")]
+
+    print(f"{args.url}: {', '.join(target.name for target in targets)}")
+    print(TEXT_HEADER)
+    results = asyncio.run(run(
+        args.url, targets, stages, args.timeout, args.max_connections,
+        on_stage=lambda result: print(format_stage(result), flush=True),
+    ))
+    if any(result.max_send_lag > 0.1 for result in results):
+        print("warning: the generator fell behind schedule; run it on a less loaded machine",
+              file=sys.stderr)
+    if args.json:
+        report = {
+            "url": args.url,
+            "targets": [target.name for target in targets],
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "stages": [result.to_dict() for result in results],
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
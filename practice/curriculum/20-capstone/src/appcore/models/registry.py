@@ -0,0 +1,204 @@
+"""
+Capstone — Versioned Model Registry (zero-downtime hot reload)
+
+Swapping a model used to mean a restart that dropped in-flight requests.
+The registry instead:
+
+1. Loads the new version in a worker thread (weights are memory-mapped)
+2. Warms it with synthetic inputs before it sees real traffic
+3. Swaps the active reference atomically
+4. Keeps the old version until its in-flight calls drain, then closes it
+
+Weights are read from MODEL_DIR/<version>.bin. A version without a file
+is refused (FileNotFoundError), except the configured MODEL_VERSION,
+which falls back to the unweighted model.
+
+Usage:
+    with model_registry.use() as model:
+        model.predict(features)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from appcore import deadline
+from appcore.models.predict import PredictionModel
+
+MODEL_DIR = Path(os.getenv("MODEL_DIR", "models"))
+MODEL_VERSION = os.getenv("MODEL_VERSION", "1.0.0")
+WARMUP_ROUNDS = int(os.getenv("MODEL_WARMUP_ROUNDS", "100"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelEntry:
+    """One loaded model version and its lifecycle state."""
+
+    version: str
+    model: PredictionModel | None = None
+    state: str = "loading"  # loading → ready → active → draining → retired | failed
+    in_flight: int = 0
+    loaded_at: float | None = None
+    error: str | None = None
+    drained: threading.Event = field(default_factory=threading.Event)
+
+
+class ModelRegistry:
+    """Holds model versions and the reference to the active one."""
+
+    def __init__(
+        self,
+        model_dir: Path = MODEL_DIR,
+        warmup_rounds: int = WARMUP_ROUNDS,
+        default_version: str = MODEL_VERSION,
+    ):
+        self.model_dir = Path(model_dir)
+        self.default_version = default_version
+        self.warmup_rounds = warmup_rounds
+        self._entries: dict[str, ModelEntry] = {}
+        self._active: ModelEntry | None = None
+        self._lock = threading.Lock()
+        self._activate_lock: asyncio.Lock | None = None
+        self._retiring: set[asyncio.Task] = set()
+        self._startup: asyncio.Task | None = None
+
+    @property
+    def active_version(self) -> str | None:
+        return self._active.version if self._active else None
+
+    def versions(self) -> list[dict]:
+        """Snapshot of all known versions for GET /models."""
+        return [
+            {
+                "version": entry.version,
+                "state": entry.state,
+                "active": entry is self._active,
+                "in_flight": entry.in_flight,
+                "loaded_at": entry.loaded_at,
+                "error": entry.error,
+            }
+            for entry in list(self._entries.values())
+        ]
+
+    def _weights(self, version: str) -> Path | None:
+        """Weights file of `version`; None only for the default version."""
+        path = self.model_dir / f"{version}.bin"
+        if path.exists():
+            return path
+        if version == self.default_version:
+            return None
+        raise FileNotFoundError(f"No weights for model {version} at {path}")
+
+    def _load(self, version: str) -> PredictionModel:
+        """Build and warm a model (runs in a worker thread)."""
+        model = PredictionModel(version=version, weights_path=self._weights(version))
+        rng = random.Random(0)
+        for _ in range(self.warmup_rounds):
+            model.predict([rng.random() for _ in range(rng.randint(1, 16))])
+        return model
+
+    def preload(self, version: str) -> ModelEntry:
+        """Load and warm `version` before any event loop exists.
+
+        Used by the pre-fork master (appcore.server): forked workers find
+        the entry ready, so activate() reuses it instead of loading again.
+        """
+        model = self._load(version)
+        entry = ModelEntry(version=version, model=model, state="ready", loaded_at=time.time())
+        self._entries[version] = entry
+        return entry
+
+    async def load(self, version: str) -> ModelEntry:
+        """Load and warm `version` without touching live traffic."""
+        entry = self._entries.get(version)
+        if entry is not None and entry.state in ("ready", "active", "draining"):
+            return entry
+        self._weights(version)  # unknown versions are not even listed
+        entry = ModelEntry(version=version)
+        self._entries[version] = entry
+        try:
+            entry.model = await asyncio.to_thread(self._load, version)
+        except Exception as exc:
+            entry.state, entry.error = "failed", str(exc)
+            logger.exception("Failed to load model %s", version)
+            raise
+        entry.state, entry.loaded_at = "ready", time.time()
+        return entry
+
+    async def activate(self, version: str) -> ModelEntry:
+        """Load (if needed), then atomically make `version` the live model."""
+        if self._activate_lock is None:
+            self._activate_lock = asyncio.Lock()
+        async with self._activate_lock:
+            entry = await self.load(version)
+            with self._lock:
+                previous, self._active = self._active, entry
+                entry.state = "active"
+                entry.drained.set()  # a pending _retire() of this entry gives up
+                if previous is not None and previous is not entry:
+                    previous.state = "draining"
+                    if previous.in_flight == 0:
+                        previous.drained.set()
+                    else:
+                        previous.drained.clear()
+            if previous is not None and previous is not entry:
+                task = asyncio.create_task(self._retire(previous))
+                self._retiring.add(task)
+                task.add_done_callback(self._retiring.discard)
+            logger.info("Activated model %s", version)
+            return entry
+
+    def start_loading(self, version: str) -> asyncio.Task:
+        """Activate `version` in the background so startup is not blocked."""
+        self._startup = asyncio.create_task(self.activate(version))
+        return self._startup
+
+    async def wait_active(self) -> bool:
+        """Wait for the startup load if it is still running; True if a model is live."""
+        if self._active is None and self._startup is not None:
+            try:
+                await asyncio.shield(self._startup)
+            except Exception:
+                pass
+        return self._active is not None
+
+    async def _retire(self, entry: ModelEntry) -> None:
+        """Close the old version once its last in-flight call returns."""
+        await asyncio.to_thread(entry.drained.wait)
+        with self._lock:
+            if entry is self._active:  # re-activated while draining
+                return
+            entry.state = "retired"
+            model, entry.model = entry.model, None
+        model.close()
+        if self._entries.get(entry.version) is entry:
+            del self._entries[entry.version]
+
+    @contextmanager
+    def use(self):
+        """Borrow the active model; the version is pinned until exit."""
+        deadline.check("model")
+        with self._lock:
+            entry = self._active
+            if entry is None:
+                raise RuntimeError("No active model")
+            entry.in_flight += 1
+            entry.drained.clear()
+        try:
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.in_flight -= 1
+                if entry.in_flight == 0 and entry is not self._active:
+                    entry.drained.set()
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,80 @@
+"""
+Capstone — Cached /metrics exposition
+
+Several Prometheus replicas scrape every worker, and rendering all series
+costs milliseconds of CPU. ExpositionCache:
+
+- reuses the rendered body for METRICS_CACHE_TTL_MS (0 = render every scrape)
+- renders in a worker thread, so the event loop keeps serving /predict
+- single-flight: concurrent scrapes of a stale cache share one render
+- gzips a render only when a scraper asks for it (Accept-Encoding: gzip),
+  once per render
+"""
+
+import asyncio
+import gzip
+import os
+import time
+
+from appcore.monitoring.metrics import render_latest
+
+METRICS_CACHE_TTL_MS = float(os.getenv("METRICS_CACHE_TTL_MS", "250"))
+
+
+class ExpositionCache:
+    """Rendered metrics body (plain and gzipped) with a short TTL."""
+
+    def __init__(self, render=render_latest, ttl_ms: float = METRICS_CACHE_TTL_MS):
+        self.render = render
+        self.ttl = ttl_ms / 1000
+        self._body = b""
+        self._gzipped: tuple[bytes, bytes] | None = None  # (body, gzip of it)
+        self._rendered_at: float | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    def fresh(self) -> bool:
+        return self._rendered_at is not None and time.monotonic() - self._rendered_at < self.ttl
+
+    async def _refresh(self) -> None:
+        self._body = (await asyncio.to_thread(self.render)).encode()
+        self._rendered_at = time.monotonic()
+
+    async def get(self, use_gzip: bool = False) -> bytes:
+        """Return the body, rendering at most once per TTL across all callers."""
+        if not self.fresh():
+            task = self._refresh_task
+            if task is None or task.done():
+                task = self._refresh_task = asyncio.create_task(self._refresh())
+            await asyncio.shield(task)
+        body = self._body
+        if not use_gzip:
+            return body
+        if self._gzipped is None or self._gzipped[0] is not body:
+            self._gzipped = (body, await asyncio.to_thread(gzip.compress, body, 1))
+        return self._gzipped[1]
+
+    def invalidate(self) -> None:
+        self._rendered_at = None
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if Accept-Encoding allows gzip: an explicit gzip;q= overrides *."""
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, *params = (item.strip() for item in part.split(";"))
+        coding = coding.lower()
+        if coding not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+exposition_cache = ExpositionCache()
@@ -1,18 +1,353 @@
 """
 Capstone — Structured Logging Setup
+
+Logging must not block the event loop. setup_logging() installs:
+
+    logger.info() ──► DroppingQueueHandler ──► bounded queue ──► BatchingQueueListener
+    (caller thread:    (put_nowait; a full                        (background thread:
+     builds a record)   queue drops + counts)                      format JSON, one write
+                                                                   per batch)
+
+The caller's thread only resolves `msg % args` and any traceback, so the
+line shows the values at logging time and the queue holds no frames.
+JSON encoding, `extra` evaluation and I/O happen on the listener thread.
+Wrap expensive extras in Lazy(...) and they are only computed there:
+
+    logger.info("scored", extra={"features": Lazy(lambda: summarize(x))})
+
+SamplingFilter then thins INFO traffic before it is queued: per-route /
+per-status sample rates, errors and slow requests always kept, and a token
+bucket per log key that reports "suppressed N similar" once it refills.
 """
 
-# import logging
-# from pythonjsonlogger import jsonlogger
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+
+from appcore.monitoring.metrics import LOG_RECORDS_DROPPED, LOG_RECORDS_SUPPRESSED
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+# "<route>:<status>=rate", "<route>=rate" or "<N>xx=rate", comma separated
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "/health=0.01,/ready=0.01,/metrics=0.01")
+LOG_SAMPLE_DEFAULT = float(os.getenv("LOG_SAMPLE_DEFAULT", "1.0"))
+LOG_SLOW_MS = float(os.getenv("LOG_SLOW_MS", "500"))
+LOG_RATE_PER_KEY = float(os.getenv("LOG_RATE_PER_KEY", "50"))
+LOG_BURST_PER_KEY = float(os.getenv("LOG_BURST_PER_KEY", "100"))
+LOG_MAX_KEYS = 10_000
+
+# Attributes every LogRecord has; anything else came from `extra`
+_RESERVED = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+_dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=str).encode
+
+
+class Lazy:
+    """An `extra` value computed only when the record is formatted."""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __call__(self):
+        return self.fn()
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message + extras."""
+
+    def __init__(self):
+        super().__init__()
+        self._second = None
+        self._prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        # strftime once per second; records within it reuse the prefix
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._prefix}.{int((created - second) * 1000):03d}Z"
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "timestamp": self._timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                data[key] = value() if isinstance(value, Lazy) else value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:  # rendered by DroppingQueueHandler.prepare()
+            data["exception"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+        return _dumps(data)
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """'/health=0.01,2xx=0.5' → {'/health': 0.01, '2xx': 0.5}"""
+    rates = {}
+    for item in spec.split(","):
+        if item.strip():
+            key, _, rate = item.rpartition("=")
+            rates[key.strip()] = float(rate)
+    return rates
+
+
+class _TokenBucket:
+    __slots__ = ("tokens", "updated", "suppressed", "last")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.suppressed = 0
+        self.last: logging.LogRecord | None = None  # latest suppressed record
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every problem, a sample of the routine, and bound each log key.
+
+    Always kept: WARNING and above, status >= 500, duration_ms >= slow_ms.
+    Other records are kept with the most specific matching rate
+    ("route:status", "route", "2xx", then default_rate), and then must take a
+    token from their key's bucket. A key is (logger, route, status) for
+    request logs and (logger, message template) otherwise. At most
+    LOG_MAX_KEYS buckets are kept; the least recently used one is evicted,
+    reporting its suppressed count first.
+    """
+
+    def __init__(
+        self,
+        rates: dict[str, float] | None = None,
+        default_rate: float = LOG_SAMPLE_DEFAULT,
+        slow_ms: float = LOG_SLOW_MS,
+        rate_per_key: float = LOG_RATE_PER_KEY,
+        burst_per_key: float = LOG_BURST_PER_KEY,
+        clock=time.monotonic,
+        rng=random.random,
+    ):
+        super().__init__()
+        self.rates = parse_sample_rates(LOG_SAMPLE_RATES) if rates is None else rates
+        self.default_rate = default_rate
+        self.slow_ms = slow_ms
+        self.rate_per_key = rate_per_key
+        self.burst_per_key = burst_per_key
+        self._clock = clock
+        self._random = rng
+        self._buckets: OrderedDict[tuple, _TokenBucket] = OrderedDict()  # LRU first
+        self._lock = threading.Lock()
+
+    def rate_for(self, route: str | None, status: int | None) -> float:
+        rates = self.rates
+        for key in (f"{route}:{status}", route, f"{status // 100}xx" if status else None):
+            if key in rates:
+                return rates[key]
+        return self.default_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "suppressed", None) is not None:
+            return True  # our own summary line
+        status = getattr(record, "status_code", None)
+        if (
+            record.levelno >= logging.WARNING
+            or (status is not None and status >= 500)
+            or getattr(record, "duration_ms", 0) >= self.slow_ms
+        ):
+            return True
+        route = getattr(record, "route", None)
+        rate = self.rate_for(route, status)
+        if rate < 1.0 and self._random() >= rate:
+            LOG_RECORDS_SUPPRESSED.labels(reason="sampled").inc()
+            return False
+        key = (record.name, route, status) if route is not None else (record.name, record.msg)
+        suppressed, last, evicted = self._take(key, record)
+        if evicted is not None:
+            self._summarize(evicted.last, evicted.suppressed)
+        if suppressed is None:
+            LOG_RECORDS_SUPPRESSED.labels(reason="rate_limited").inc()
+            return False
+        if suppressed:
+            self._summarize(last, suppressed)
+        return True
+
+    @staticmethod
+    def _summarize(last: logging.LogRecord, suppressed: int) -> None:
+        """Log "suppressed N similar: ..." for the key of `last`."""
+        route = getattr(last, "route", None)
+        status = getattr(last, "status_code", None)
+        extra = {"suppressed": suppressed, "route": route, "status_code": status}
+        if route is not None:
+            message, args = "suppressed %d similar: %s %s", (suppressed, route, status)
+        else:
+            try:
+                text = last.getMessage()
+            except (TypeError, ValueError):
+                text = str(last.msg)
+            message, args = "suppressed %d similar: %s", (suppressed, text)
+        logging.getLogger(last.name).info(message, *args, extra=extra)
+
+    def _take(self, key: tuple, record: logging.LogRecord):
+        """Take a token from `key`'s bucket.
+
+        Returns (suppressed, last, evicted): suppressed is None if the
+        bucket was empty, else how many were suppressed before (the latest
+        of them is `last`); evicted is a bucket dropped to make room that
+        still has a suppressed count to report.
+        """
+        now = self._clock()
+        evicted = None
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= LOG_MAX_KEYS:
+                    _, oldest = self._buckets.popitem(last=False)
+                    if oldest.suppressed:
+                        evicted = oldest
+                bucket = self._buckets[key] = _TokenBucket(self.burst_per_key, now)
+            else:
+                self._buckets.move_to_end(key)
+            bucket.tokens = min(
+                self.burst_per_key, bucket.tokens + (now - bucket.updated) * self.rate_per_key
+            )
+            bucket.updated = now
+            if bucket.tokens < 1.0:
+                bucket.suppressed += 1
+                bucket.last = record
+                return None, None, evicted
+            bucket.tokens -= 1.0
+            suppressed, bucket.suppressed = bucket.suppressed, 0
+            last, bucket.last = bucket.last, None
+            return suppressed, last, evicted
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Enqueue records without blocking; count what a full queue drops."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._traceback = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Freeze what may change or hold memory; leave the rest to the listener.
+
+        Unlike the stock handler this does not run the formatter here: the
+        message is rendered (args may be mutated after the call) and the
+        traceback turned into text (its frames keep locals alive), but
+        JSON encoding and Lazy extras still happen on the listener thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._traceback.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
+class BatchingQueueListener(QueueListener):
+    """Drain up to `batch_size` records, then write them with one call."""
+
+    def __init__(self, log_queue: queue.Queue, *handlers, batch_size: int = LOG_BATCH_SIZE):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)  # blocking: the queue may be full
+
+    def _monitor(self) -> None:
+        done = False
+        while not done:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not self._sentinel]
+            done = len(records) != len(batch)
+            if records:
+                self.handle_batch(records)
+            for _ in batch:
+                self.queue.task_done()
+
+    def handle_batch(self, records: list[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            wanted = [r for r in records if r.levelno >= handler.level and handler.filter(r)]
+            if not wanted:
+                continue
+            if not isinstance(handler, logging.StreamHandler):
+                for record in wanted:
+                    handler.handle(record)
+                continue
+            lines = []
+            for record in wanted:
+                try:
+                    lines.append(handler.format(record))
+                except Exception:
+                    handler.handleError(record)
+            with handler.lock:
+                handler.stream.write("\n".join(lines) + "\n")
+                handler.flush()
+
+
+_handler: DroppingQueueHandler | None = None
+_listener: BatchingQueueListener | None = None
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    stream=None,
+    queue_size: int = LOG_QUEUE_SIZE,
+    batch_size: int = LOG_BATCH_SIZE,
+    sampling: SamplingFilter | None = None,
+) -> DroppingQueueHandler:
+    """Route root logging through the queue to a JSON writer thread.
+
+    Records pass `sampling` (default: a SamplingFilter from the LOG_* env)
+    before they are queued.
+    """
+    global _handler, _listener
+    shutdown_logging()
+    log_queue: queue.Queue = queue.Queue(queue_size)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter())
+    _handler = DroppingQueueHandler(log_queue)
+    _handler.addFilter(sampling or SamplingFilter())
+    _listener = BatchingQueueListener(log_queue, output, batch_size=batch_size)
+    _listener.start()
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+    return _handler
 
 
-# TODO: Configure structured JSON logging
-# def setup_logging(level: str = "INFO"):
-#     handler = logging.StreamHandler()
-#     formatter = jsonlogger.JsonFormatter(
-#         "%(asctime)s %(levelname)s %(name)s %(message)s"
-#     )
-#     handler.setFormatter(formatter)
-#     root = logging.getLogger()
-#     root.addHandler(handler)
-#     root.setLevel(level)
+def shutdown_logging() -> None:
+    """Detach the queue handler and flush everything still queued."""
+    global _handler, _listener
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
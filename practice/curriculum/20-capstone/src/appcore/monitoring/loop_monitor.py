@@ -0,0 +1,108 @@
+"""
+Capstone — Event-loop lag watchdog
+
+A blocking call in an `async def` (time.sleep, requests.get, a big
+json.dumps) freezes every in-flight request. LoopLagMonitor finds them:
+
+- a probe coroutine sleeps `interval` and measures how late it wakes up;
+  the lateness is the loop's scheduling lag → event_loop_lag_seconds
+- a watchdog thread checks the probe's heartbeat; when the loop has not
+  run for `threshold`, it grabs the loop thread's stack via
+  sys._current_frames() — i.e. the blocking callback, caught in the act —
+  logs it and keeps it for GET /debug/loop/stalls
+
+For tests, see appcore.monitoring.pytest_loop_guard.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from appcore.monitoring.metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "50"))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measures lag of the running loop and reports stalls with their stack."""
+
+    def __init__(
+        self,
+        interval_ms: float = LOOP_LAG_INTERVAL_MS,
+        threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS,
+        keep: int = 20,
+    ):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.stalls: deque[dict] = deque(maxlen=keep)
+        self._beat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._probe())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._thread.join()
+        self._thread = None
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - self.interval))
+            self._beat = time.monotonic()
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopping.wait(self.threshold / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or beat == reported:
+                continue
+            reported = beat  # one report per stall
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            self.stalls.append({
+                "detected_at": time.time(),
+                "blocked_ms": round(blocked * 1000, 1),
+                "stack": stack,
+            })
+            EVENT_LOOP_STALLS.inc()
+            logger.warning(
+                "Event loop blocked for %.0f ms", blocked * 1000, extra={"stack": stack}
+            )
+
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,126 @@
+"""
+Capstone — Memory snapshots for leak hunting
+
+Slow RSS growth in a long-running worker is usually a dict or cache that
+only ever grows. Workflow:
+
+1. take_snapshot()  — starts tracemalloc if needed, records a baseline
+2. let traffic run for a few minutes
+3. diff()           — allocation sites ranked by growth since the
+                      baseline, plus which object types grew (gc census)
+
+tracemalloc slows allocations while it runs; stop() turns it off again.
+"""
+
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "1"))
+
+# Allocations made by the measuring machinery itself
+_IGNORE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def type_census(top: int | None = None) -> Counter[str]:
+    """Live objects tracked by the gc, counted by type."""
+    census = Counter(
+        f"{type(obj).__module__}.{type(obj).__qualname__}" for obj in gc.get_objects()
+    )
+    return Counter(dict(census.most_common(top))) if top else census
+
+
+def rss_bytes(pid: int | str = "self") -> int | None:
+    """Resident set size of `pid` (default: this process) on Linux, or None."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _site(stat) -> str:
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+class MemoryTracker:
+    """Holds the baseline snapshot and census that diff() compares against."""
+
+    def __init__(self, frames: int = MEMORY_TRACE_FRAMES):
+        self.frames = frames
+        self._baseline: tracemalloc.Snapshot | None = None
+        self._baseline_census: Counter[str] | None = None
+        self._taken_at: float | None = None
+        self._lock = threading.Lock()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        return tracemalloc.take_snapshot().filter_traces(_IGNORE)
+
+    def _summary(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        return {"rss_bytes": rss_bytes(), "traced_bytes": current, "traced_peak_bytes": peak}
+
+    def take_snapshot(self, top: int = 20) -> dict:
+        """Record a new baseline; returns the current top allocation sites."""
+        with self._lock:
+            started = not tracemalloc.is_tracing()
+            snapshot = self._snapshot()
+            self._baseline = snapshot
+            self._baseline_census = type_census()
+            self._taken_at = time.time()
+        stats = snapshot.statistics("lineno")[:top]
+        return {
+            **self._summary(),
+            "tracing_started": started,
+            "top_sites": [
+                {"site": _site(stat), "size_bytes": stat.size, "count": stat.count}
+                for stat in stats
+            ],
+            "top_types": dict(self._baseline_census.most_common(top)),
+        }
+
+    def diff(self, top: int = 20) -> dict:
+        """Growth since the baseline, by allocation site and by object type."""
+        with self._lock:
+            if self._baseline is None or not tracemalloc.is_tracing():
+                raise RuntimeError("No baseline snapshot; take one first")
+            baseline, baseline_census = self._baseline, self._baseline_census
+            snapshot = self._snapshot()
+            census = type_census()
+        stats = snapshot.compare_to(baseline, "lineno")[:top]
+        census.subtract(baseline_census)
+        return {
+            **self._summary(),
+            "seconds_since_baseline": round(time.time() - self._taken_at, 3),
+            "top_growth": [
+                {
+                    "site": _site(stat),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats
+            ],
+            "type_growth": {
+                name: delta for name, delta in census.most_common(top) if delta > 0
+            },
+        }
+
+    def stop(self) -> None:
+        with self._lock:
+            self._baseline = self._baseline_census = self._taken_at = None
+            tracemalloc.stop()
+
+
+memory_tracker = MemoryTracker()
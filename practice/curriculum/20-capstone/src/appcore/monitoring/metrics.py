@@ -1,13 +1,838 @@
 """
 Capstone — Prometheus Metrics Module
+
+Counter / Gauge / Histogram primitives that render the Prometheus text
+exposition format themselves, so prometheus_client stays off the import
+path (see tests/test_startup.py).
+
+Values live in-process by default. With METRICS_MULTIPROC_DIR set, every
+value is stored in this worker's mmap file (appcore.monitoring.mmap_store)
+and /metrics merges all workers:
+    counters, histograms  → summed, and kept after a worker dies
+    gauges                → summed over live workers ("sum") or max ("max")
+
+Counters and histograms are sharded per thread: each thread writes its own
+cells without taking a lock, and the shards are only summed at scrape time.
+Gauges stay single-cell because set() has no meaning per shard.
+Benchmark: python scripts/bench_metrics.py
 """
 
-# from prometheus_client import Counter, Histogram, Gauge, Info
+import bisect
+import contextlib
+import json
+import math
+import os
+import threading
+import weakref
+from pathlib import Path
+
+from appcore.monitoring import mmap_store
+
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_MAX_SERIES = int(os.getenv("METRICS_MAX_SERIES", "1000"))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OVERFLOW_LABEL = "__overflow__"
+MAX_REFUSED_TRACKED = 10_000
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Sub-millisecond resolution for event-loop lag and admission queueing
+FINE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+# --- value backends ----------------------------------------------------------
+
+class _MemoryValue:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, amount: float) -> None:
+        with self._lock:
+            self._value += amount
+
+    def add_owned(self, amount: float) -> None:
+        """Lock-free add; only valid when a single thread writes this cell."""
+        self._value += amount
+
+    def set(self, value: float) -> None:
+        self._value = float(value)  # as the mmap cell stores it
+
+    def get(self) -> float:
+        return self._value
+
+
+class _MmapValue:
+    __slots__ = ("_store", "_offset")
+
+    def __init__(self, store: mmap_store.MmapValueStore, key: str):
+        self._store = store
+        self._offset = store.offset(key)
+
+    def add(self, amount: float) -> None:
+        self._store.add(self._offset, amount)
+
+    def add_owned(self, amount: float) -> None:
+        self._store.set(self._offset, self._store.get(self._offset) + amount)
+
+    def set(self, value: float) -> None:
+        self._store.set(self._offset, value)
+
+    def get(self) -> float:
+        return self._store.get(self._offset)
+
+
+class _Shards:
+    """Per-thread groups of cells for one series, summed on read.
+
+    A thread allocates its group on first use (the only locked step), then
+    writes it with add_owned(). Groups outlive their thread so no counts are
+    lost; there is one group per thread that ever touched the series.
+    """
+
+    __slots__ = ("_local", "_groups", "_lock", "_make", "_width")
+
+    def __init__(self, make, width: int):
+        self._local = threading.local()
+        self._groups: list[list] = []
+        self._lock = threading.Lock()
+        self._make = make  # shard index -> list of `width` cells
+        self._width = width
+
+    def mine(self) -> list:
+        try:
+            return self._local.cells
+        except AttributeError:
+            with self._lock:
+                cells = self._make(len(self._groups))
+                self._groups.append(cells)
+            self._local.cells = cells
+            return cells
+
+    def totals(self) -> list[float]:
+        totals = [0.0] * self._width
+        for cells in list(self._groups):
+            for i, cell in enumerate(cells):
+                totals[i] += cell.get()
+        return totals
+
+
+def _sample_key(family: str, sample: str, labels: tuple, shard: int | None = None) -> str:
+    key = [family, sample, labels] if shard is None else [family, sample, labels, shard]
+    return json.dumps(key, separators=(",", ":"))
+
+
+class MetricRegistry:
+    """All metric families plus the value backend they write to."""
+
+    _instances: "weakref.WeakSet[MetricRegistry]" = weakref.WeakSet()
+
+    def __init__(self, multiproc_dir: str | Path | None = None):
+        self.families: dict[str, "_Family"] = {}
+        self.multiproc_dir = Path(multiproc_dir) if multiproc_dir else None
+        self._store: mmap_store.MmapValueStore | None = None
+        self._store_lock = threading.Lock()
+        MetricRegistry._instances.add(self)
+        self.series_dropped = Counter(
+            "metrics_series_dropped_total",
+            "Distinct label sets refused because their metric hit max_series",
+            ["metric"],
+            registry=self,
+            max_series=0,
+        )
+
+    def register(self, family: "_Family") -> None:
+        if family.name in self.families:
+            raise ValueError(f"Duplicate metric: {family.name}")
+        self.families[family.name] = family
+
+    def value(
+        self, family: str, sample: str, labels: tuple, shard: int | None = None
+    ) -> "_MemoryValue | _MmapValue":
+        if self.multiproc_dir is None:
+            return _MemoryValue()
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = mmap_store.MmapValueStore(self.multiproc_dir)
+        return _MmapValue(self._store, _sample_key(family, sample, labels, shard))
+
+    def exclusive(self):
+        """Hold off scrapes while a writer moves counts between cells."""
+        if self.multiproc_dir is None:
+            return contextlib.nullcontext()
+        return mmap_store.dir_lock(self.multiproc_dir, exclusive=True)
+
+    def flush(self) -> None:
+        """Persist this worker's values (multiprocess mode) before it exits."""
+        if self._store is not None:
+            self._store.flush()
+
+    def reset_after_fork(self) -> None:
+        """A forked worker must write to its own file, starting from zero."""
+        if self.multiproc_dir is None:
+            return
+        self._store = None
+        self._store_lock = threading.Lock()
+        for family in self.families.values():
+            family.clear()
+
+    # --- collection ------------------------------------------------------
+
+    def collect(self) -> dict[str, dict[tuple[str, tuple], float]]:
+        """{family: {(sample, labels): value}} merged over all workers."""
+        if self.multiproc_dir is None:
+            return {
+                name: family.finalize(family.collect()) for name, family in self.families.items()
+            }
+
+        def survives_death(key: str) -> bool:
+            family = self.families.get(json.loads(key)[0])
+            return family is not None and family.type != "gauge"
+
+        mmap_store.compact(self.multiproc_dir, survives_death)
+        merged: dict[str, dict[tuple[str, tuple], float]] = {}
+        for _, entries in mmap_store.collect(self.multiproc_dir):
+            for key, value in entries.items():
+                name, sample, labels = json.loads(key)[:3]  # drop the shard index
+                family = self.families.get(name)
+                if family is None:
+                    continue
+                series = merged.setdefault(name, {})
+                sample_key = (sample, tuple(tuple(pair) for pair in labels))
+                if family.type == "gauge" and family.mode == "max":
+                    series[sample_key] = max(series.get(sample_key, -math.inf), value)
+                else:
+                    series[sample_key] = series.get(sample_key, 0.0) + value
+        return {name: self.families[name].finalize(series) for name, series in merged.items()}
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        collected = self.collect()
+        lines = []
+        for name, family in self.families.items():
+            lines.append(f"# HELP {name} {_escape_help(family.documentation)}")
+            lines.append(f"# TYPE {name} {family.type}")
+            for (sample, labels), value in sorted(
+                collected.get(name, {}).items(), key=family.sort_key
+            ):
+                lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", r"\\").replace("\n", r"\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value.is_integer():
+        return f"{value:.1f}"
+    return repr(value)
+
+
+# --- metric families ---------------------------------------------------------
+
+class _Family:
+    """A metric name and its children, one per label set.
+
+    At most `max_series` label sets are created (0 = unlimited); further
+    ones share a single child whose labels are all OVERFLOW_LABEL. Each
+    distinct refused label set is counted once in
+    metrics_series_dropped_total{metric=...} (tracked by hash, up to
+    MAX_REFUSED_TRACKED per metric; past that the count stops growing).
+    """
+
+    type = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames=(), registry=None,
+        max_series: int = METRICS_MAX_SERIES,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry or REGISTRY
+        self.max_series = max_series
+        self._children: dict[tuple, object] = {}
+        self._overflow = None
+        self._refused: set[int] = set()
+        self._lock = threading.Lock()
+        self.registry.register(self)
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    if self.max_series and len(self._children) >= self.max_series:
+                        return self._overflow_child(values)
+                    child = self._new_child(tuple(zip(self.labelnames, values)))
+                    self._children[values] = child
+        return child
+
+    def _overflow_child(self, values: tuple):
+        """Shared child for label sets past the cap (caller holds the lock)."""
+        key = hash(values)
+        if key not in self._refused and len(self._refused) < MAX_REFUSED_TRACKED:
+            self._refused.add(key)
+            self.registry.series_dropped.labels(self.name).inc()
+        if self._overflow is None:
+            self._overflow = self._new_child(
+                tuple((name, OVERFLOW_LABEL) for name in self.labelnames)
+            )
+        return self._overflow
+
+    def clear(self) -> None:
+        self._children.clear()
+        self._overflow = None
+        self._refused.clear()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _value(self, sample: str, labels: tuple, shard: int | None = None):
+        return self.registry.value(self.name, sample, labels, shard)
+
+    def collect(self) -> dict[tuple[str, tuple], float]:
+        samples = {}
+        children = list(self._children.values())
+        if self._overflow is not None:
+            children.append(self._overflow)
+        for child in children:
+            samples.update(child.samples())
+        return samples
+
+    def finalize(self, samples: dict) -> dict:
+        """Hook applied to merged samples before rendering."""
+        return samples
+
+    @staticmethod
+    def sort_key(item):
+        (sample, labels), _ = item
+        return labels, sample
+
+
+class _CounterChild:
+    __slots__ = ("_labels", "_shards", "_sample")
+
+    def __init__(self, family: "Counter", labels: tuple):
+        self._labels = labels
+        self._sample = family.name
+        self._shards = _Shards(lambda i: [family._value(family.name, labels, i)], 1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._shards.mine()[0].add_owned(amount)
+
+    def get(self) -> float:
+        return self._shards.totals()[0]
+
+    def samples(self):
+        return {(self._sample, self._labels): self.get()}
+
+
+class Counter(_Family):
+    """Monotonic counter; the name should end in _total."""
+
+    type = "counter"
+
+    def _new_child(self, labels):
+        return _CounterChild(self, labels)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("_labels", "_value", "_sample")
+
+    def __init__(self, family: "Gauge", labels: tuple):
+        self._labels = labels
+        self._sample = family.name
+        self._value = family._value(family.name, labels)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._value.add(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._value.add(-amount)
+
+    def set(self, value: float) -> None:
+        self._value.set(value)
+
+    def get(self) -> float:
+        return self._value.get()
+
+    def samples(self):
+        return {(self._sample, self._labels): self._value.get()}
+
+
+class Gauge(_Family):
+    """Value that goes up and down. `mode` decides the cross-worker merge."""
+
+    type = "gauge"
+
+    def __init__(
+        self, name, documentation, labelnames=(), registry=None, mode: str = "sum",
+        max_series: int = METRICS_MAX_SERIES,
+    ):
+        if mode not in ("sum", "max"):
+            raise ValueError("Gauge mode must be 'sum' or 'max'")
+        self.mode = mode
+        super().__init__(name, documentation, labelnames, registry, max_series)
+
+    def _new_child(self, labels):
+        return _GaugeChild(self, labels)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("_labels", "_name", "_bounds", "_shards")
+
+    def __init__(self, family: "Histogram", labels: tuple):
+        self._labels = labels
+        self._name = family.name
+        self._bounds = family.buckets
+
+        def make(shard: int) -> list:
+            # One shard: a cell per bucket, then _sum, then _count
+            cells = [
+                family._value(f"{family.name}_bucket", labels + (("le", _format_value(b)),), shard)
+                for b in family.buckets
+            ]
+            cells.append(family._value(f"{family.name}_sum", labels, shard))
+            cells.append(family._value(f"{family.name}_count", labels, shard))
+            return cells
+
+        self._shards = _Shards(make, len(family.buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        cells = self._shards.mine()
+        cells[bisect.bisect_left(self._bounds, value)].add_owned(1.0)
+        cells[-2].add_owned(value)
+        cells[-1].add_owned(1.0)
+
+    def samples(self):
+        # Buckets are stored non-cumulative; finalize() makes them cumulative
+        *buckets, total, count = self._shards.totals()
+        samples = {
+            (f"{self._name}_bucket", self._labels + (("le", _format_value(b)),)): n
+            for b, n in zip(self._bounds, buckets)
+        }
+        samples[(f"{self._name}_sum", self._labels)] = total
+        samples[(f"{self._name}_count", self._labels)] = count
+        return samples
+
+
+class Histogram(_Family):
+    """Classic fixed-bucket histogram."""
+
+    type = "histogram"
+
+    def __init__(
+        self, name, documentation, labelnames=(), registry=None, buckets=DEFAULT_BUCKETS,
+        max_series: int = METRICS_MAX_SERIES,
+    ):
+        buckets = tuple(float(b) for b in buckets)
+        if buckets[-1] != math.inf:
+            buckets += (math.inf,)
+        self.buckets = buckets
+        self._bucket_order = {_format_value(b): i for i, b in enumerate(buckets)}
+        super().__init__(name, documentation, labelnames, registry, max_series)
+
+    def _new_child(self, labels):
+        return _HistogramChild(self, labels)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def finalize(self, samples: dict) -> dict:
+        """Turn per-bucket counts into Prometheus' cumulative le buckets."""
+        order = self._bucket_order
+        running: dict[tuple, float] = {}
+        result = {}
+        bucket_items = sorted(
+            (item for item in samples.items() if item[0][0].endswith("_bucket")),
+            key=lambda item: (item[0][1][:-1], order.get(item[0][1][-1][1], 0)),
+        )
+        for (sample, labels), value in bucket_items:
+            base = labels[:-1]
+            running[base] = running.get(base, 0.0) + value
+            result[(sample, labels)] = running[base]
+        for key, value in samples.items():
+            if not key[0].endswith("_bucket"):
+                result[key] = value
+        return result
+
+    def sort_key(self, item):
+        (sample, labels), _ = item
+        if sample.endswith("_bucket"):
+            return labels[:-1], 0, self._bucket_order.get(labels[-1][1], 0)
+        return labels, 1 if sample.endswith("_sum") else 2, 0
+
+
+# --- native (exponential) histogram -----------------------------------------
+
+class ExponentialBuckets:
+    """Sparse base-2 exponential bucket counts (Prometheus native schema).
+
+    At `schema` s the base is 2**(2**-s) and bucket i covers
+    (base**(i-1), base**i]; values <= zero_threshold go to a zero bucket.
+    Lowering the schema by one merges bucket pairs, so two states merge
+    exactly after both are brought to the smaller schema.
+    """
+
+    MIN_SCHEMA = -4
+    MAX_SCHEMA = 8
+
+    def __init__(self, schema: int, counts: dict[int, float] | None = None, zero: float = 0.0):
+        self.schema = schema
+        self.counts = counts or {}
+        self.zero = zero
+
+    @staticmethod
+    def index(value: float, schema: int) -> int:
+        return math.ceil(math.log2(value) * 2 ** schema)
+
+    def upper_bound(self, index: int) -> float:
+        return 2.0 ** (index * 2.0 ** -self.schema)
+
+    @property
+    def total(self) -> float:
+        return self.zero + sum(self.counts.values())
+
+    def downscale(self, schema: int) -> None:
+        while self.schema > schema:
+            merged: dict[int, float] = {}
+            for index, count in self.counts.items():
+                merged[(index + 1) // 2] = merged.get((index + 1) // 2, 0.0) + count
+            self.counts, self.schema = merged, self.schema - 1
+
+    def fit(self, max_buckets: int) -> None:
+        while len(self.counts) > max_buckets and self.schema > self.MIN_SCHEMA:
+            self.downscale(self.schema - 1)
+
+    def merge(self, other: "ExponentialBuckets") -> None:
+        other = ExponentialBuckets(other.schema, dict(other.counts), other.zero)
+        schema = min(self.schema, other.schema)
+        self.downscale(schema)
+        other.downscale(schema)
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0.0) + count
+        self.zero += other.zero
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile, interpolating log-linearly in a bucket."""
+        total = self.total
+        if total == 0:
+            return math.nan
+        rank = q * total
+        if rank <= self.zero:
+            return 0.0
+        seen = self.zero
+        for index in sorted(self.counts):
+            count = self.counts[index]
+            if count and seen + count >= rank:
+                lower, upper = self.upper_bound(index - 1), self.upper_bound(index)
+                return lower * (upper / lower) ** ((rank - seen) / count)
+            seen += count
+        return self.upper_bound(max(self.counts))
+
+
+class _ExponentialShard:
+    """One thread's cells for one series; only that thread writes them."""
+
+    __slots__ = ("number", "state", "zero", "sum", "count")
+
+    def __init__(self, number, schema, zero, total, count):
+        self.number = number
+        self.state: tuple[int, dict] = (schema, {})  # swapped as one unit
+        self.zero, self.sum, self.count = zero, total, count
+
+
+class _ExponentialHistogramChild:
+    __slots__ = ("_family", "_labels", "_local", "_shards", "_lock")
+
+    def __init__(self, family: "ExponentialHistogram", labels: tuple):
+        self._family = family
+        self._labels = labels
+        self._local = threading.local()
+        self._shards: list[_ExponentialShard] = []
+        self._lock = threading.Lock()
+
+    def _cell(self, shard: _ExponentialShard, schema: int, index: int):
+        labels = self._labels + (("schema", str(schema)), ("index", str(index)))
+        return self._family._value(f"{self._family.name}_native", labels, shard.number)
+
+    def _shard(self) -> _ExponentialShard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        family, labels = self._family, self._labels
+        with self._lock:
+            n = len(self._shards)
+            shard = _ExponentialShard(
+                n,
+                family.schema,
+                family._value(f"{family.name}_native_zero", labels, n),
+                family._value(f"{family.name}_sum", labels, n),
+                family._value(f"{family.name}_count", labels, n),
+            )
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def observe(self, value: float) -> None:
+        if not 0 <= value < math.inf:  # also rejects nan
+            raise ValueError("ExponentialHistogram observes finite non-negative values")
+        shard = self._shard()
+        if value <= self._family.zero_threshold:
+            shard.zero.add_owned(1.0)
+        else:
+            schema, cells = shard.state
+            index = ExponentialBuckets.index(value, schema)
+            cell = cells.get(index)
+            if cell is None:
+                if len(cells) >= self._family.max_buckets:
+                    schema, cells = self._downscale(shard)
+                    index = ExponentialBuckets.index(value, schema)
+                    cell = cells.get(index)
+                if cell is None:
+                    cell = cells[index] = self._cell(shard, schema, index)
+            cell.add_owned(1.0)
+        shard.sum.add_owned(value)
+        shard.count.add_owned(1.0)
+
+    def _downscale(self, shard: _ExponentialShard) -> tuple[int, dict]:
+        """Halve this shard's resolution (rare; bounded by max_buckets)."""
+        schema, old = shard.state
+        schema -= 1
+        with self._family.registry.exclusive():
+            cells = {}
+            for index, cell in old.items():
+                new_index = (index + 1) // 2
+                if new_index not in cells:
+                    cells[new_index] = self._cell(shard, schema, new_index)
+                cells[new_index].add_owned(cell.get())
+            shard.state = (schema, cells)
+            if self._family.registry.multiproc_dir is not None:
+                for cell in old.values():  # mmap slots outlive the dict
+                    cell.set(0.0)
+        return shard.state
+
+    def buckets(self) -> ExponentialBuckets:
+        """This process's state for the series, merged over threads."""
+        merged = ExponentialBuckets(self._family.schema)
+        for shard in list(self._shards):
+            schema, cells = shard.state
+            counts = {index: cell.get() for index, cell in list(cells.items())}
+            merged.merge(ExponentialBuckets(schema, counts, shard.zero.get()))
+        merged.fit(self._family.max_buckets)
+        return merged
+
+    def quantile(self, q: float) -> float:
+        return self.buckets().quantile(q)
+
+    def samples(self):
+        name, labels = self._family.name, self._labels
+        samples = {(f"{name}_native_zero", labels): 0.0, (f"{name}_sum", labels): 0.0,
+                   (f"{name}_count", labels): 0.0}
+        for shard in list(self._shards):
+            schema, cells = shard.state
+            for index, cell in list(cells.items()):
+                key = (f"{name}_native", labels + (("schema", str(schema)), ("index", str(index))))
+                samples[key] = samples.get(key, 0.0) + cell.get()
+            samples[(f"{name}_native_zero", labels)] += shard.zero.get()
+            samples[(f"{name}_sum", labels)] += shard.sum.get()
+            samples[(f"{name}_count", labels)] += shard.count.get()
+        return samples
+
+
+class ExponentialHistogram(_Family):
+    """Sparse base-2 exponential histogram with bounded bucket count.
+
+    Resolution starts at `schema` and drops whenever a series would need
+    more than `max_buckets` buckets, so memory stays bounded for any value
+    range. The text format has no native histograms, so /metrics renders
+    onto the fixed `buckets` bounds: le=b counts the exponential buckets
+    that lie wholly at or below b. Every series, worker and scrape thus
+    exposes the same le set, which rate() and histogram_quantile() need;
+    quantile() still reads the full-resolution buckets.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self, name, documentation, labelnames=(), registry=None, schema: int = 5,
+        max_buckets: int = 160, zero_threshold: float = 1e-9, buckets=DEFAULT_BUCKETS,
+        max_series: int = METRICS_MAX_SERIES,
+    ):
+        if not ExponentialBuckets.MIN_SCHEMA <= schema <= ExponentialBuckets.MAX_SCHEMA:
+            raise ValueError("schema must be between -4 and 8")
+        buckets = tuple(float(b) for b in buckets)
+        if buckets[-1] != math.inf:
+            buckets += (math.inf,)
+        self.buckets = buckets
+        self._le = tuple(_format_value(b) for b in buckets)
+        self.schema = schema
+        self.max_buckets = max_buckets
+        self.zero_threshold = zero_threshold
+        super().__init__(name, documentation, labelnames, registry, max_series)
+
+    def _new_child(self, labels):
+        return _ExponentialHistogramChild(self, labels)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def quantile(self, q: float) -> float:
+        return self._default.quantile(q)
+
+    def finalize(self, samples: dict) -> dict:
+        """Merge raw (schema, index) counts per series onto the fixed le bounds."""
+        series: dict[tuple, ExponentialBuckets] = {}
+        result = {}
+        for (sample, labels), value in samples.items():
+            if sample.endswith("_native"):
+                base, schema, index = labels[:-2], int(labels[-2][1]), int(labels[-1][1])
+                if value:
+                    series.setdefault(base, ExponentialBuckets(self.schema)).merge(
+                        ExponentialBuckets(schema, {index: value})
+                    )
+            elif sample.endswith("_native_zero"):
+                series.setdefault(labels, ExponentialBuckets(self.schema)).zero += value
+            else:
+                result[(sample, labels)] = value
+        for labels, buckets in series.items():
+            ordered = sorted(buckets.counts.items())
+            running, i = buckets.zero, 0
+            for bound, le in zip(self.buckets, self._le):
+                # Tolerance: 2**(i * 2**-s) is not exact where it equals a bound
+                while i < len(ordered) and buckets.upper_bound(ordered[i][0]) <= bound * (1 + 1e-9):
+                    running += ordered[i][1]
+                    i += 1
+                result[(f"{self.name}_bucket", labels + (("le", le),))] = running
+        return result
+
+    def sort_key(self, item):
+        (sample, labels), _ = item
+        if sample.endswith("_bucket"):
+            return labels[:-1], 0, float(labels[-1][1])
+        return labels, 1 if sample.endswith("_sum") else 2, 0
+
+
+def _reset_registries_after_fork() -> None:
+    for registry in list(MetricRegistry._instances):
+        registry.reset_after_fork()
+
+
+REGISTRY = MetricRegistry(METRICS_MULTIPROC_DIR)
+os.register_at_fork(after_in_child=_reset_registries_after_fork)
+
+
+def render_latest(registry: MetricRegistry = REGISTRY) -> str:
+    return registry.render()
+
 
+# --- application metrics -----------------------------------------------------
 
-# TODO: Define application metrics
-# REQUEST_COUNT = Counter(...)
-# REQUEST_DURATION = Histogram(...)
-# ACTIVE_REQUESTS = Gauge(...)
-# PREDICTION_COUNT = Counter(...)
-# PREDICTION_CONFIDENCE = Histogram(...)
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "Total HTTP requests",
+    ["method", "endpoint", "status_code"],
+)
+REQUEST_DURATION = ExponentialHistogram(
+    "http_request_duration_seconds",
+    "HTTP request duration in seconds",
+    ["method", "endpoint"],
+)
+ACTIVE_REQUESTS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+)
+REQUESTS_CANCELLED = Counter(
+    "http_requests_cancelled_total",
+    "Requests whose handler was stopped early",
+    ["reason"],
+)
+PREDICTION_COUNT = Counter(
+    "predictions_total",
+    "Total predictions made",
+    ["model_version", "status"],
+)
+PREDICTION_CONFIDENCE = Histogram(
+    "prediction_confidence",
+    "Confidence of served predictions",
+    ["model_version"],
+    buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.0),
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full",
+)
+LOG_RECORDS_SUPPRESSED = Counter(
+    "log_records_suppressed_total",
+    "Log records skipped by sampling or per-key rate limiting",
+    ["reason"],
+)
+EVENT_LOOP_LAG = ExponentialHistogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer scheduled for now",
+    buckets=FINE_BUCKETS,
+)
+EVENT_LOOP_STALLS = Counter(
+    "event_loop_stalls_total",
+    "Times the event loop was blocked longer than LOOP_BLOCK_THRESHOLD_MS",
+)
+ADMISSION_LIMIT = Gauge(
+    "admission_concurrency_limit",
+    "Current adaptive concurrency limit",
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Requests holding an admission slot",
+)
+ADMISSION_QUEUE_TIME = ExponentialHistogram(
+    "admission_queue_seconds",
+    "Time requests waited for an admission slot",
+    ["priority"],
+    buckets=FINE_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests shed with 503 by admission control",
+    ["priority"],
+)
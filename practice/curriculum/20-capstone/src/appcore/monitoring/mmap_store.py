@@ -0,0 +1,202 @@
+"""
+Capstone — Shared-memory (mmap) metric store for multiple workers
+
+With N uvicorn workers each process has its own counters, so /metrics
+returned whichever worker answered the scrape. Here every worker writes its
+values into its OWN memory-mapped file:
+
+    $METRICS_MULTIPROC_DIR/metrics_<pid>.db
+
+One writer per file means workers never lock each other; a scrape in any
+worker reads every file and merges. File layout (little-endian):
+
+    header:  uint32 used_bytes | uint32 reserved
+    entry:   uint32 key_len | key (utf-8, padded to 8) | float64 value
+
+An entry is fully written before `used_bytes` is bumped, so readers never
+see half an entry. Files of dead workers are compacted: values that must
+survive (counters, histograms) are folded into metrics_archive.db and the
+file is unlinked; gauges of dead workers are simply dropped.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+INITIAL_SIZE = 64 * 1024
+HEADER = struct.Struct("<II")
+KEY_LEN = struct.Struct("<I")
+VALUE = struct.Struct("<d")
+ARCHIVE_NAME = "metrics_archive.db"
+LOCK_NAME = ".metrics.lock"
+
+
+def _padded(n: int) -> int:
+    return n + (-n % 8)
+
+
+def _read_entries(path: Path) -> dict[str, float]:
+    """Parse a store file without mapping it (readers never write)."""
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return {}
+    if len(data) < HEADER.size:
+        return {}
+    used = HEADER.unpack_from(data, 0)[0]
+    entries, pos = {}, HEADER.size
+    while pos < used:
+        (key_len,) = KEY_LEN.unpack_from(data, pos)
+        key_start = pos + KEY_LEN.size
+        value_pos = key_start + _padded(key_len)
+        key = data[key_start:key_start + key_len].decode()
+        entries[key] = VALUE.unpack_from(data, value_pos)[0]
+        pos = value_pos + VALUE.size
+    return entries
+
+
+def _write_entries(path: Path, entries: dict[str, float]) -> None:
+    """Write a complete store file atomically (used for the archive)."""
+    body = bytearray()
+    for key, value in entries.items():
+        raw = key.encode()
+        body += KEY_LEN.pack(len(raw)) + raw + b"\0" * (-len(raw) % 8) + VALUE.pack(value)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(HEADER.pack(HEADER.size + len(body), 0) + body)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MmapValueStore:
+    """Per-process value file; only the owning process writes to it."""
+
+    def __init__(self, directory: Path, pid: int | None = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pid = pid or os.getpid()
+        self.path = self.directory / f"metrics_{self.pid}.db"
+        self._lock = threading.Lock()
+        self._offsets: dict[str, int] = {}
+        self._file = open(self.path, "a+b")
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            self._file.truncate(INITIAL_SIZE)
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), self._size)
+        # Grown mappings stay open: another thread may still write through one
+        self._old_maps: list[mmap.mmap] = []
+        used = HEADER.unpack_from(self._mm, 0)[0]
+        if used == 0:
+            HEADER.pack_into(self._mm, 0, HEADER.size, 0)
+        else:  # pid reuse: continue the existing file
+            pos = HEADER.size
+            while pos < used:
+                (key_len,) = KEY_LEN.unpack_from(self._mm, pos)
+                key_start = pos + KEY_LEN.size
+                value_pos = key_start + _padded(key_len)
+                self._offsets[self._mm[key_start:key_start + key_len].decode()] = value_pos
+                pos = value_pos + VALUE.size
+
+    def offset(self, key: str) -> int:
+        """Return the value offset for `key`, allocating an entry if new."""
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+        with self._lock:
+            if key in self._offsets:
+                return self._offsets[key]
+            raw = key.encode()
+            used = HEADER.unpack_from(self._mm, 0)[0]
+            entry_size = KEY_LEN.size + _padded(len(raw)) + VALUE.size
+            while used + entry_size > self._size:
+                self._grow()
+            KEY_LEN.pack_into(self._mm, used, len(raw))
+            self._mm[used + KEY_LEN.size:used + KEY_LEN.size + len(raw)] = raw
+            offset = used + KEY_LEN.size + _padded(len(raw))
+            VALUE.pack_into(self._mm, offset, 0.0)
+            HEADER.pack_into(self._mm, 0, used + entry_size, 0)
+            self._offsets[key] = offset
+            return offset
+
+    def _grow(self) -> None:
+        self._size *= 2
+        self._file.truncate(self._size)
+        self._old_maps.append(self._mm)
+        self._mm = mmap.mmap(self._file.fileno(), self._size)
+
+    def get(self, offset: int) -> float:
+        return VALUE.unpack_from(self._mm, offset)[0]
+
+    def set(self, offset: int, value: float) -> None:
+        VALUE.pack_into(self._mm, offset, value)
+
+    def add(self, offset: int, amount: float) -> None:
+        with self._lock:
+            VALUE.pack_into(self._mm, offset, VALUE.unpack_from(self._mm, offset)[0] + amount)
+
+    def flush(self) -> None:
+        """Write dirty pages back to the file (on shutdown)."""
+        with self._lock:
+            self._mm.flush()
+
+
+@contextmanager
+def dir_lock(directory: Path, exclusive: bool):
+    """Cross-process lock for scrape/compaction only — never on the write path."""
+    with open(directory / LOCK_NAME, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def compact(directory: Path, survives_death) -> list[int]:
+    """Fold dead workers' files into the archive; return the dead pids.
+
+    `survives_death(key)` says whether a value outlives its process
+    (counters and histograms do; gauges do not).
+    """
+    directory = Path(directory)
+    with dir_lock(directory, exclusive=True):
+        dead = []
+        for path in directory.glob("metrics_*.db"):
+            stem = path.stem.removeprefix("metrics_")
+            if stem.isdigit() and not _pid_alive(int(stem)):
+                dead.append((int(stem), path))
+        if not dead:
+            return []
+        archive_path = directory / ARCHIVE_NAME
+        archive = _read_entries(archive_path)
+        for _, path in dead:
+            for key, value in _read_entries(path).items():
+                if survives_death(key):
+                    archive[key] = archive.get(key, 0.0) + value
+        _write_entries(archive_path, archive)
+        for _, path in dead:
+            path.unlink(missing_ok=True)
+        return [pid for pid, _ in dead]
+
+
+def collect(directory: Path) -> list[tuple[int | None, dict[str, float]]]:
+    """Read the archive and every worker file: [(pid or None, entries)]."""
+    directory = Path(directory)
+    with dir_lock(directory, exclusive=False):
+        results = [(None, _read_entries(directory / ARCHIVE_NAME))]
+        for path in sorted(directory.glob("metrics_*.db")):
+            stem = path.stem.removeprefix("metrics_")
+            if stem.isdigit():
+                results.append((int(stem), _read_entries(path)))
+    return results
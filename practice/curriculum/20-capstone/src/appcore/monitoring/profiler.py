@@ -0,0 +1,88 @@
+"""
+Capstone — In-process sampling profiler
+
+py-spy needs ptrace, which our containers don't grant. This samples from
+inside the process instead: a thread wakes `hz` times a second, walks
+sys._current_frames() and counts each thread's stack. Output is the
+"collapsed" format flamegraph tools read (flamegraph.pl, speedscope,
+inferno), one line per distinct stack:
+
+    MainThread;uvicorn.main:run;...;appcore.models.predict:PredictionModel.predict 42
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_DEFAULT_HZ = 100
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_qualname}"
+
+
+def collapse(frame, thread_name: str) -> str:
+    """Root-first, ';'-joined stack for one thread."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels)).replace(" ", "_")
+
+
+class StackSampler:
+    """Counts stacks of every other thread at a fixed rate."""
+
+    def __init__(self, hz: int = PROFILE_DEFAULT_HZ):
+        self.interval = 1.0 / hz
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+    def sample_once(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                self.stacks[collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+        self.samples += 1
+
+    def run(self, seconds: float, stop: threading.Event | None = None) -> Counter[str]:
+        """Sample for `seconds`, or until `stop` is set (blocking; call from a worker thread)."""
+        stop = stop or threading.Event()
+        deadline = time.monotonic() + seconds
+        next_tick = time.monotonic()
+        while next_tick < deadline and not stop.is_set():
+            self.sample_once()
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                stop.wait(delay)
+        return self.stacks
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+_profile_lock = threading.Lock()
+
+
+def profile(
+    seconds: float, hz: int = PROFILE_DEFAULT_HZ, stop: threading.Event | None = None
+) -> str | None:
+    """Sample all threads; None if another profile is already running.
+
+    Setting `stop` ends sampling early (and frees the profiler for the next
+    caller) when whoever asked is no longer waiting.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        sampler = StackSampler(hz)
+        sampler.run(seconds, stop)
+        return sampler.collapsed()
+    finally:
+        _profile_lock.release()
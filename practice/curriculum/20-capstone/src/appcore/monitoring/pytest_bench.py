@@ -0,0 +1,247 @@
+"""
+Capstone — pytest plugin: microbenchmarks against a stored baseline
+
+A test that takes the `bench` fixture is a benchmark:
+
+    def test_predict(bench):
+        bench(model.predict, [1.0, 2.0, 3.0])
+
+Benchmarks are skipped in a normal run (they take seconds). Run them with:
+
+    pytest --bench            time them and print a table
+    pytest --bench-save       ... and record the timings as the baseline
+    pytest --bench-compare    ... and fail every benchmark that got slower
+
+`-m benchmark` selects only the benchmarks. The baseline lives at
+--bench-baseline (ini: bench_baseline, default benchmarks/baseline.json
+under the rootdir) and is committed, so re-save it when a change is
+meant to cost time.
+
+Noise handling: each benchmark is run in bench_rounds rounds (default 20)
+of enough calls to take ≥ 10 ms, with the GC off, as timeit does. A
+benchmark regresses only if its median per-call time is more than
+--bench-threshold (default 0.2 = 20%) above the baseline's, *and* its
+fastest quarter of rounds is still slower than the baseline's slowest
+quarter (the interquartile ranges do not overlap). A fixed pure-Python
+reference workload is timed in every session and stored with the
+baseline; baseline timings are scaled by the ratio of its fastest
+quarters, so a baseline saved on one machine is still meaningful on
+another.
+
+Disk-bound benchmarks drift more between sessions than within one; give
+them a wider threshold with @pytest.mark.benchmark(threshold=0.5).
+
+Enable in conftest.py:
+    pytest_plugins = ["appcore.monitoring.pytest_bench"]
+
+07-rest-api-crud-labs/tests/bench_plugin.py is a trimmed copy (that lab
+cannot import appcore); carry timing and comparison fixes over to it.
+"""
+
+import gc
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import pytest
+
+MIN_ROUND_SECONDS = 0.01
+
+
+@dataclass
+class Timing:
+    """Per-call seconds: median and interquartile range over the rounds."""
+
+    median: float
+    q1: float
+    q3: float
+    rounds: int
+    loops: int
+
+    @classmethod
+    def from_samples(cls, samples: list[float], loops: int) -> "Timing":
+        q1, median, q3 = statistics.quantiles(samples, n=4, method="inclusive")
+        return cls(median, q1, q3, len(samples), loops)
+
+    def scaled(self, factor: float) -> "Timing":
+        return Timing(self.median * factor, self.q1 * factor, self.q3 * factor,
+                      self.rounds, self.loops)
+
+
+def _time_loops(fn, args, kwargs, loops: int) -> float:
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn(*args, **kwargs)
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def measure(fn, *args, rounds: int = 20, **kwargs) -> Timing:
+    """Time fn(*args, **kwargs): calibrate the loop count, then `rounds` rounds."""
+    loops = 1
+    while (elapsed := _time_loops(fn, args, kwargs, loops)) < MIN_ROUND_SECONDS:
+        loops *= 10 if elapsed < MIN_ROUND_SECONDS / 10 else 2
+    return Timing.from_samples(
+        [_time_loops(fn, args, kwargs, loops) / loops for _ in range(rounds)], loops
+    )
+
+
+def _reference_workload() -> None:
+    data = {str(i): i for i in range(200)}
+    sorted(k for k, v in data.items() if v % 3)
+
+
+def compare(current: Timing, baseline: Timing, threshold: float) -> tuple[float, str]:
+    """Relative change of the median and a verdict: regressed, improved or same."""
+    change = current.median / baseline.median - 1
+    if change > threshold and current.q1 > baseline.q3:
+        return change, "regressed"
+    if change < -threshold and current.q3 < baseline.q1:
+        return change, "improved"
+    return change, "same"
+
+
+class BenchSession:
+    """Timings of this run, the loaded baseline and the verdicts."""
+
+    def __init__(self, path: Path, rounds: int, threshold: float):
+        self.path = path
+        self.rounds = rounds
+        self.threshold = threshold
+        self.results: dict[str, Timing] = {}
+        self.verdicts: dict[str, tuple[float, str]] = {}
+        self._reference: Timing | None = None
+        self.baseline: dict = {}
+        if path.exists():
+            self.baseline = json.loads(path.read_text())
+
+    @property
+    def reference(self) -> Timing:
+        if self._reference is None:
+            # More rounds than a benchmark: its noise goes into every comparison
+            self._reference = measure(_reference_workload, rounds=3 * self.rounds)
+        return self._reference
+
+    def baseline_for(self, key: str) -> Timing | None:
+        """The stored timing, rescaled to this machine's speed."""
+        entry = self.baseline.get("benchmarks", {}).get(key)
+        if entry is None:
+            return None
+        factor = self.reference.q1 / self.baseline["reference"]["q1"]
+        return Timing(**entry).scaled(factor)
+
+    def save(self) -> None:
+        """Write this run's timings, keeping (rescaled) entries it did not run."""
+        kept = {}
+        for key in self.baseline.get("benchmarks", {}):
+            if key not in self.results:
+                kept[key] = asdict(self.baseline_for(key))
+        benchmarks = {**kept, **{key: asdict(timing) for key, timing in self.results.items()}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "reference": asdict(self.reference),
+            "benchmarks": dict(sorted(benchmarks.items())),
+        }, indent=2) + "\n")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "microbenchmarks")
+    group.addoption("--bench", action="store_true", help="Run benchmarks (tests using `bench`)")
+    group.addoption("--bench-save", action="store_true", help="Run benchmarks and save the baseline")
+    group.addoption("--bench-compare", action="store_true",
+                    help="Run benchmarks and fail those slower than the baseline")
+    group.addoption("--bench-baseline", default=None, help="Baseline JSON path")
+    group.addoption("--bench-threshold", type=float, default=None,
+                    help="Allowed slowdown of the median before failing (0.2 = 20%%)")
+    parser.addini("bench_baseline", "Benchmark baseline JSON, relative to rootdir",
+                  default="benchmarks/baseline.json")
+    parser.addini("bench_rounds", "Timed rounds per benchmark", default="20")
+    parser.addini("bench_threshold", "Allowed slowdown before failing", default="0.2")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: a microbenchmark (uses the bench fixture)")
+    opt = config.getoption
+    config._bench = None
+    if opt("--bench") or opt("--bench-save") or opt("--bench-compare"):
+        path = Path(opt("--bench-baseline") or config.rootpath / config.getini("bench_baseline"))
+        threshold = opt("--bench-threshold")
+        config._bench = BenchSession(
+            path,
+            rounds=int(config.getini("bench_rounds")),
+            threshold=float(config.getini("bench_threshold")) if threshold is None else threshold,
+        )
+
+
+def pytest_collection_modifyitems(config, items):
+    skip = pytest.mark.skip(reason="benchmark; run with --bench, --bench-save or --bench-compare")
+    for item in items:
+        if "bench" in getattr(item, "fixturenames", ()):
+            item.add_marker(pytest.mark.benchmark)
+            if config._bench is None:
+                item.add_marker(skip)
+
+
+@pytest.fixture
+def bench(request):
+    """Call bench(fn, *args, **kwargs) once per test to time fn."""
+    session: BenchSession = request.config._bench
+    key = f"{request.node.path.stem}::{request.node.name}"
+    threshold = next(
+        (mark.kwargs["threshold"] for mark in request.node.iter_markers("benchmark")
+         if "threshold" in mark.kwargs),
+        session.threshold,
+    )
+
+    def run(fn, *args, **kwargs) -> Timing:
+        timing = measure(fn, *args, rounds=session.rounds, **kwargs)
+        session.results[key] = timing
+        baseline = session.baseline_for(key)
+        if baseline is not None:
+            session.verdicts[key] = change, verdict = compare(timing, baseline, threshold)
+            if verdict == "regressed" and request.config.getoption("--bench-compare"):
+                pytest.fail(
+                    f"{key}: median {timing.median * 1e6:.2f} µs is {change:+.1%} vs baseline "
+                    f"{baseline.median * 1e6:.2f} µs (threshold {threshold:.0%})",
+                    pytrace=False,
+                )
+        return timing
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    bench = session.config._bench
+    if bench is not None and bench.results and session.config.getoption("--bench-save"):
+        bench.save()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    bench = config._bench
+    if bench is None or not bench.results:
+        return
+    tr = terminalreporter
+    tr.section("benchmarks (per call)")
+    tr.write_line(f"{'benchmark':<50} {'median':>10} {'IQR':>10} {'baseline':>10}  change")
+    for key, timing in sorted(bench.results.items()):
+        baseline = bench.baseline_for(key)
+        line = (f"{key:<50} {timing.median * 1e6:8.2f}µs "
+                f"{(timing.q3 - timing.q1) * 1e6:8.2f}µs ")
+        if baseline is None:
+            line += f"{'-':>10}  new"
+        else:
+            change, verdict = bench.verdicts[key]
+            line += f"{baseline.median * 1e6:8.2f}µs  {change:+.1%} {verdict}"
+        tr.write_line(line)
+    if config.getoption("--bench-save"):
+        tr.write_line(f"baseline saved to {bench.path}")
@@ -0,0 +1,107 @@
+"""
+Capstone — pytest plugin: fail tests that block the event loop
+
+Times every callback the asyncio event loop runs (in any thread, so the
+TestClient's loop counts too). A test fails if one callback ran longer
+than --max-loop-block-ms (ini: max_loop_block_ms, default 200): that is a
+blocking call inside async code. Opt a test out with
+@pytest.mark.allow_loop_block.
+
+Enable in conftest.py:
+    pytest_plugins = ["appcore.monitoring.pytest_loop_guard"]
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+def describe(handle) -> str:
+    """Name the coroutine behind a task step, else fall back to repr()."""
+    owner = getattr(handle._callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        code = getattr(coro, "cr_code", None)
+        if code is not None:
+            return f"{coro.__qualname__} ({code.co_filename}:{code.co_firstlineno})"
+    return repr(handle)
+
+
+class LoopBlockGuard:
+    """Wraps asyncio Handle._run and records callbacks slower than the limit."""
+
+    def __init__(self, limit_ms: float):
+        self.limit = limit_ms / 1000
+        self.blocks: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._original = None
+
+    def install(self) -> None:
+        if self._original is not None:
+            return
+        original = self._original = asyncio.events.Handle._run
+        guard = self
+
+        def _run(handle):
+            start = time.perf_counter()
+            try:
+                return original(handle)
+            finally:
+                elapsed = time.perf_counter() - start
+                if elapsed > guard.limit:
+                    with guard._lock:
+                        guard.blocks.append((elapsed, describe(handle)))
+
+        asyncio.events.Handle._run = _run
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            asyncio.events.Handle._run = self._original
+            self._original = None
+
+    def take(self) -> list[tuple[float, str]]:
+        with self._lock:
+            blocks, self.blocks = self.blocks, []
+        return blocks
+
+
+def pytest_addoption(parser):
+    parser.addini("max_loop_block_ms", "Fail tests blocking the event loop this long", default="200")
+    parser.addoption(
+        "--max-loop-block-ms", type=float, default=None,
+        help="Fail tests whose event-loop callbacks run longer than this (ms)",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "allow_loop_block: do not fail this test for blocking the event loop"
+    )
+    limit = config.getoption("--max-loop-block-ms") or float(config.getini("max_loop_block_ms"))
+    guard = LoopBlockGuard(limit)
+    guard.install()
+    config._loop_block_guard = guard
+
+
+def pytest_unconfigure(config):
+    guard = getattr(config, "_loop_block_guard", None)
+    if guard is not None:
+        guard.uninstall()
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    guard = item.config._loop_block_guard
+    guard.take()
+    result = yield
+    blocks = guard.take()
+    if blocks and item.get_closest_marker("allow_loop_block") is None:
+        worst = max(blocks)
+        pytest.fail(
+            f"event loop blocked {len(blocks)} time(s) beyond {guard.limit * 1000:.0f} ms; "
+            f"worst {worst[0] * 1000:.0f} ms in {worst[1]}",
+            pytrace=False,
+        )
+    return result
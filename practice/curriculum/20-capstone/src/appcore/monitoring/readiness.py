@@ -0,0 +1,165 @@
+"""
+Capstone — Readiness checks, refreshed in the background
+
+Load balancers probe readiness every second from every node. Checking
+SQLite and Redis inside the probe turns probe traffic into database load,
+and a slow dependency makes the probe itself time out. Instead:
+
+- ReadinessChecker runs every registered check concurrently every
+  READY_CHECK_INTERVAL_S, each bounded by READY_CHECK_TIMEOUT_S
+- GET /ready returns the cached result instantly, with each check's age
+
+A check is a callable that returns normally when healthy and raises
+otherwise; sync checks run in a thread. A check still running from the
+previous round is not started again (a hung dependency costs one thread,
+not one per round). Results older than READY_STALE_AFTER_S count as failed,
+so a wedged checker cannot report "ready" forever.
+
+drain() makes /ready fail at once, whatever the checks say, so the load
+balancer stops routing here while in-flight requests finish
+(appcore.api.shutdown).
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+READY_CHECK_INTERVAL_S = float(os.getenv("READY_CHECK_INTERVAL_S", "2"))
+READY_CHECK_TIMEOUT_S = float(os.getenv("READY_CHECK_TIMEOUT_S", "1"))
+READY_STALE_AFTER_S = float(os.getenv("READY_STALE_AFTER_S", "10"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CheckResult:
+    ok: bool
+    checked_at: float
+    duration: float
+    error: str | None = None
+
+
+@dataclass
+class _Check:
+    name: str
+    fn: object
+    required: bool
+    result: CheckResult | None = None
+    running: asyncio.Future | None = None
+
+
+class ReadinessChecker:
+    """Runs dependency checks on an interval and caches their results."""
+
+    def __init__(
+        self,
+        interval_s: float = READY_CHECK_INTERVAL_S,
+        timeout_s: float = READY_CHECK_TIMEOUT_S,
+        stale_after_s: float = READY_STALE_AFTER_S,
+        clock=time.monotonic,
+    ):
+        self.interval = interval_s
+        self.timeout = timeout_s
+        self.stale_after = stale_after_s
+        self._clock = clock
+        self._checks: dict[str, _Check] = {}
+        self._task: asyncio.Task | None = None
+        self.draining = False
+
+    def register(self, name: str, fn, required: bool = True) -> None:
+        """Add (or replace) a check; optional checks never make us unready."""
+        self._checks[name] = _Check(name, fn, required)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def drain(self) -> None:
+        """Report not-ready from now on (until the next start())."""
+        self.draining = True
+
+    async def start(self) -> None:
+        """Run one round now, then keep refreshing in the background."""
+        self.draining = False
+        if self.running:
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._run(), name="readiness-checker")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for check in self._checks.values():
+            check.running = None  # bound to this loop
+
+    async def refresh(self) -> None:
+        """Run every check concurrently, each bounded by the timeout."""
+        await asyncio.gather(*(self._run_check(check) for check in list(self._checks.values())))
+
+    async def _run_check(self, check: _Check) -> None:
+        start = self._clock()
+        if check.running is None or check.running.done():
+            if inspect.iscoroutinefunction(check.fn):
+                check.running = asyncio.ensure_future(check.fn())
+            else:
+                check.running = asyncio.ensure_future(asyncio.to_thread(check.fn))
+        try:
+            # shield: a timed-out check keeps running instead of piling up
+            await asyncio.wait_for(asyncio.shield(check.running), self.timeout)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout:g}s"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        now = self._clock()
+        if error is not None and (check.result is None or check.result.ok):
+            logger.warning("Readiness check %s failing: %s", check.name, error)
+        check.result = CheckResult(error is None, now, now - start, error)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Readiness refresh failed")
+
+    def snapshot(self) -> dict:
+        """The cached verdict: ready only if every required check passed recently."""
+        now = self._clock()
+        ready = True
+        checks = {}
+        for check in self._checks.values():
+            result = check.result
+            if result is None:
+                ok, entry = False, {"ok": False, "error": "not checked yet"}
+            else:
+                age = now - result.checked_at
+                ok = result.ok and age <= self.stale_after
+                entry = {
+                    "ok": ok,
+                    "age_seconds": round(age, 3),
+                    "duration_ms": round(result.duration * 1000, 3),
+                }
+                if result.error:
+                    entry["error"] = result.error
+                elif not ok:
+                    entry["error"] = "stale"
+            entry["required"] = check.required
+            checks[check.name] = entry
+            if check.required and not ok:
+                ready = False
+        if self.draining:
+            return {"status": "draining", "checks": checks}
+        return {"status": "ready" if ready else "not_ready", "checks": checks}
+
+
+readiness = ReadinessChecker()
@@ -0,0 +1,122 @@
+"""
+Capstone — Startup Profiler
+
+Cold start matters when we autoscale on bursts. This module answers
+"where did startup time go?":
+
+- import_times(): per-module import cost, measured by the interpreter's own
+  `-X importtime` in a fresh subprocess (self and cumulative microseconds)
+- StartupProfiler.step(): wall time of each lifespan step
+- StartupProfiler.watch(): time of background startup work (model load)
+
+Run: python -m appcore.monitoring.startup [module] [--top N]
+"""
+
+import argparse
+import asyncio
+import logging
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Collects lifespan step timings for one process start."""
+
+    def __init__(self):
+        self.steps: list[tuple[str, float]] = []
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def watch(self, name: str, task: asyncio.Task) -> asyncio.Task:
+        """Record how long a background startup task takes to finish."""
+        start = time.perf_counter()
+        task.add_done_callback(
+            lambda _: self.steps.append((f"{name} (background)", time.perf_counter() - start))
+        )
+        return task
+
+    def report(self) -> dict:
+        return {
+            "steps_ms": {name: round(seconds * 1000, 3) for name, seconds in self.steps},
+            "total_ms": round(sum(seconds for _, seconds in self.steps) * 1000, 3),
+        }
+
+    def reset(self) -> None:
+        self.steps.clear()
+
+
+def import_times(module: str = "appcore.api.app", top: int = 20) -> list[dict]:
+    """Import `module` in a fresh interpreter and return the slowest imports."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    rows.sort(key=lambda row: row["cumulative_us"], reverse=True)
+    return rows[:top]
+
+
+async def _profile_lifespan(module: str) -> dict:
+    """Run the app's lifespan startup + shutdown under the profiler."""
+    import importlib
+
+    from appcore.models.registry import model_registry
+    # Import by name: under `python -m` this module is __main__, a copy.
+    from appcore.monitoring.startup import startup_profiler as profiler
+
+    app = importlib.import_module(module).app
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter() - start
+        await model_registry.wait_active()
+        await asyncio.sleep(0)  # let the background step record itself
+    report = profiler.report()
+    report["lifespan_ready_ms"] = round(ready * 1000, 3)
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Profile appcore startup")
+    parser.add_argument("module", nargs="?", default="appcore.api.app")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"Slowest imports for {args.module}:")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for row in import_times(args.module, args.top):
+        print(f"{row['cumulative_us'] / 1000:14.2f} {row['self_us'] / 1000:9.2f}  {row['module']}")
+
+    report = asyncio.run(_profile_lifespan(args.module))
+    print("\nLifespan steps:")
+    for name, ms in report["steps_ms"].items():
+        print(f"{ms:14.2f}  {name}")
+    print(f"{report['lifespan_ready_ms']:14.2f}  until serving")
+
+
+startup_profiler = StartupProfiler()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Capstone — Lightweight request tracing
+
+"Where did this /predict spend its 80 ms?" — auth, rate limiting, the
+model, the DB or the cache. A sampled request gets a Trace in a contextvar;
+code marks its work with spans:
+
+    with span("model"):
+        model.predict(features)
+
+Spans land in the current request's trace, including from sync handlers
+and asyncio.to_thread (both copy the context). With no active trace,
+span() returns a shared no-op, so unsampled requests pay one
+ContextVar.get() per span.
+
+Sampled responses carry a Server-Timing header (visible in browser dev
+tools), and the slowest TRACE_SLOWEST_N traces are kept for /debug/traces.
+"""
+
+import contextlib
+import functools
+import heapq
+import inspect
+import itertools
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_SLOWEST_N = int(os.getenv("TRACE_SLOWEST_N", "50"))
+
+_current: ContextVar["Trace | None"] = ContextVar("appcore_trace", default=None)
+_NOOP = contextlib.nullcontext()
+
+
+class Trace:
+    """Timings for one request; spans are (name, start offset, duration)."""
+
+    __slots__ = ("name", "start", "started_at", "spans", "total", "status_code")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: list[tuple[str, float, float]] = []
+        self.total = 0.0
+        self.status_code: int | None = None
+
+    def finish(self, name: str | None = None, status_code: int | None = None) -> None:
+        self.total = time.perf_counter() - self.start
+        if name:
+            self.name = name
+        self.status_code = status_code
+
+    def server_timing(self) -> str:
+        """Server-Timing value: spans with the same name are summed."""
+        totals: dict[str, float] = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        totals["total"] = self.total
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items())
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "total_ms": round(self.total * 1000, 3),
+            "spans": [
+                {"name": name, "start_ms": round(offset * 1000, 3),
+                 "duration_ms": round(duration * 1000, 3)}
+                for name, offset, duration in self.spans
+            ],
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        now = time.perf_counter()
+        self.trace.spans.append((self.name, self.started - self.trace.start, now - self.started))
+        return False
+
+
+def span(name: str):
+    """Time a block into the current trace (no-op when not sampled)."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name)
+
+
+def traced(name: str):
+    """Decorator form of span() for sync and async functions."""
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+def start_trace(name: str, force: bool = False, sample_rate: float | None = None):
+    """Begin a trace if sampled; returns (trace, token) or (None, None)."""
+    rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    if not force and (rate <= 0.0 or random.random() >= rate):
+        return None, None
+    trace = Trace(name)
+    return trace, _current.set(trace)
+
+
+def end_trace(token) -> None:
+    _current.reset(token)
+
+
+class SlowestTraces:
+    """The N slowest finished traces (a bounded min-heap)."""
+
+    def __init__(self, capacity: int = TRACE_SLOWEST_N):
+        self.capacity = capacity
+        self._heap: list[tuple[float, int, Trace]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def record(self, trace: Trace) -> None:
+        if self.capacity <= 0:
+            return
+        item = (trace.total, next(self._counter), trace)
+        with self._lock:
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, item)
+            elif trace.total > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def slowest(self) -> list[dict]:
+        with self._lock:
+            items = sorted(self._heap, reverse=True)
+        return [trace.to_dict() for _, _, trace in items]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+
+
+slowest_traces = SlowestTraces()
@@ -0,0 +1,223 @@
+"""
+Capstone — Pre-fork server (appcore-serve)
+
+`uvicorn --workers N` starts each worker as a fresh interpreter: every
+worker imports FastAPI, pydantic and the app, loads and warms the model,
+and keeps its own private copy of all of it. Here one master process does
+that work once, then forks the workers:
+
+    master: import app, load + warm the model, bind + listen, gc.freeze()
+       ├── fork → worker 1: uvicorn.Server.run(sockets=[shared socket])
+       ├── fork → worker 2: ...
+       └── ...   supervise: restart crashed workers, forward SIGTERM
+
+Forked workers share the master's memory pages copy-on-write. gc.freeze()
+moves everything allocated so far into a generation the collector never
+scans, so a worker's GC does not write to (and thereby copy) those pages.
+The socket listens before the first fork, so connections that arrive
+while workers start wait in the backlog instead of being refused.
+
+uvloop and httptools are used when installed. With more than one worker
+and no METRICS_MULTIPROC_DIR, a temporary one is created so /metrics
+covers every worker, and removed when the server exits. On SIGTERM each
+worker drains (appcore.api.shutdown); workers still running
+SHUTDOWN_DRAIN_DELAY_S + SHUTDOWN_GRACE_S + 5 s later are killed.
+"""
+
+import gc
+import importlib.util
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+
+APP_HOST = os.getenv("APP_HOST", "127.0.0.1")
+APP_PORT = int(os.getenv("APP_PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))  # 0: one per usable CPU
+# Longer than the load balancer's idle timeout, or it may reuse a
+# connection just as the server closes it (a 502 for that request)
+SERVER_KEEPALIVE_S = int(os.getenv("SERVER_KEEPALIVE_S", "75"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Hard cap on connections + tasks per worker (503 past it); 0 = none,
+# AdmissionMiddleware already sheds load adaptively
+SERVER_LIMIT_CONCURRENCY = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0"))
+SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+
+APP = "appcore.api.app:app"
+RESTART_DELAY_S = 1.0
+
+# appcore's own logging is set up per worker (lifespan); uvicorn's logger
+# is configured as soon as uvicorn.Config exists
+logger = logging.getLogger("uvicorn.error")
+
+
+def default_workers() -> int:
+    """CPUs this process may run on (respects container cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not Linux
+        return os.cpu_count() or 1
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def preload() -> None:
+    """Import the app and load the model in this (master) process."""
+    from appcore.models.registry import MODEL_VERSION, model_registry
+
+    try:
+        model_registry.preload(MODEL_VERSION)
+    except Exception:
+        logger.exception("Model preload failed; each worker will load it")
+
+
+class Master:
+    """Forks `workers` uvicorn servers on one socket and keeps them running."""
+
+    def __init__(self, config, workers: int, preload_app: bool, kill_after_s: float):
+        self.config = config
+        self.workers = workers
+        self.preload_app = preload_app
+        self.kill_after = kill_after_s
+        self.children: dict[int, int] = {}  # pid → worker index
+        self.stopping_since: float | None = None
+
+    def run(self) -> int:
+        # gc off while preloading leaves no freed holes between the
+        # long-lived objects; the children turn it back on
+        gc.disable()
+        if self.preload_app:
+            started = time.perf_counter()
+            self.config.load()
+            preload()
+            logger.info("Preloaded app and model in %.2fs", time.perf_counter() - started)
+        sock = self.config.bind_socket()
+        sock.listen(self.config.backlog)
+        gc.freeze()
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self._handle_stop)
+        for index in range(self.workers):
+            self._spawn(index, sock)
+        exit_code = self._supervise(sock)
+        sock.close()
+        return exit_code
+
+    def _spawn(self, index: int, sock) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                for sig in (signal.SIGTERM, signal.SIGINT):
+                    signal.signal(sig, signal.SIG_DFL)
+                gc.enable()
+                import uvicorn
+
+                uvicorn.Server(self.config).run(sockets=[sock])
+                code = 0
+            except BaseException:
+                logger.exception("Worker %d crashed", index)
+            finally:
+                os._exit(code)
+        self.children[pid] = index
+        logger.info("Started worker %d (pid %d)", index, pid)
+
+    def _handle_stop(self, sig, frame) -> None:
+        if self.stopping_since is None:
+            self.stopping_since = time.monotonic()
+            logger.info("Stopping %d worker(s) (%s)", len(self.children), signal.Signals(sig).name)
+        for pid in list(self.children):  # a second signal is passed on too: skips the drain delay
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _supervise(self, sock) -> int:
+        """Reap and restart workers until stopped; 1 if any had to be killed."""
+        exit_code = 0
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                if self.stopping_since is not None and (
+                    time.monotonic() - self.stopping_since > self.kill_after
+                ):
+                    logger.warning("Killing %d worker(s) still running", len(self.children))
+                    for child in self.children:
+                        os.kill(child, signal.SIGKILL)
+                    self.stopping_since = time.monotonic()
+                    exit_code = 1
+                time.sleep(0.1)
+                continue
+            index = self.children.pop(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping_since is not None:
+                continue
+            logger.error("Worker %d (pid %d) exited with %d; restarting", index, pid, code)
+            time.sleep(RESTART_DELAY_S)  # no tight loop if every start fails
+            if self.stopping_since is None:
+                self._spawn(index, sock)
+        return exit_code
+
+
+def run(
+    host: str = APP_HOST,
+    port: int = APP_PORT,
+    workers: int = WEB_CONCURRENCY,
+    keepalive_s: int = SERVER_KEEPALIVE_S,
+    backlog: int = SERVER_BACKLOG,
+    limit_concurrency: int = SERVER_LIMIT_CONCURRENCY,
+    preload_app: bool = SERVER_PRELOAD,
+    log_level: str = "info",
+) -> int:
+    workers = workers or default_workers()
+    metrics_dir = None
+    if workers > 1 and not os.getenv("METRICS_MULTIPROC_DIR"):
+        # Read when appcore.monitoring.metrics is imported, so set it first
+        metrics_dir = os.environ["METRICS_MULTIPROC_DIR"] = tempfile.mkdtemp(
+            prefix="appcore-metrics-"
+        )
+    try:
+        import uvicorn
+
+        from appcore.api.shutdown import SHUTDOWN_DRAIN_DELAY_S, SHUTDOWN_GRACE_S
+
+        config = uvicorn.Config(
+            APP,
+            host=host,
+            port=port,
+            loop=event_loop(),
+            http=http_protocol(),
+            timeout_keep_alive=keepalive_s,
+            backlog=backlog,
+            limit_concurrency=limit_concurrency or None,
+            timeout_graceful_shutdown=int(SHUTDOWN_GRACE_S) or None,
+            access_log=False,  # LoggingHook logs every request already
+            log_level=log_level,
+        )
+        logger.info(
+            "Serving %s on %s:%d: %d worker(s), loop=%s, http=%s, keep-alive=%ds, backlog=%d",
+            APP, host, port, workers, config.loop, config.http, keepalive_s, backlog,
+        )
+        if workers == 1:
+            gc.freeze()  # the imports so far stay out of every collection
+            uvicorn.Server(config).run()
+            return 0
+        kill_after = SHUTDOWN_DRAIN_DELAY_S + SHUTDOWN_GRACE_S + 5
+        return Master(config, workers, preload_app, kill_after).run()
+    finally:
+        # Workers leave through os._exit(), so only the master gets here
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(run())
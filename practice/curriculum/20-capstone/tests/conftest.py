@@ -0,0 +1,38 @@
+"""
+Capstone — Shared test fixtures
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from appcore.api import security
+from appcore.api.app import app
+from appcore.api.rate_limiter import rate_limiter
+from appcore.db import database
+
+pytest_plugins = ["appcore.monitoring.pytest_loop_guard", "appcore.monitoring.pytest_bench"]
+
+TEST_API_KEY = "test-key"
+TEST_ADMIN_KEY = "test-admin-key"
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    """Every test runs with a known API key and a fresh rate-limit window."""
+    monkeypatch.setattr(security, "API_KEY", TEST_API_KEY)
+    monkeypatch.setattr(security, "ADMIN_API_KEY", TEST_ADMIN_KEY)
+    rate_limiter.requests.clear()
+    return TEST_API_KEY
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client with the lifespan running against a temporary database."""
+    monkeypatch.setattr(database, "DATABASE_PATH", tmp_path / "test.db")
+    with TestClient(app, headers={"X-API-Key": TEST_API_KEY}) as client:
+        yield client
+
+
+@pytest.fixture
+def admin_headers():
+    return {"X-API-Key": TEST_ADMIN_KEY}
@@ -0,0 +1,82 @@
+"""
+Capstone — Tests: Admission control
+Run: pytest tests/test_admission.py -v
+"""
+
+import asyncio
+
+from starlette.responses import PlainTextResponse
+
+from appcore.api.admission import AdaptiveLimiter, AdmissionMiddleware, Priority, priority_for
+
+
+def test_route_priorities():
+    assert priority_for("/health") is Priority.CRITICAL
+    assert priority_for("/debug/traces") is Priority.CRITICAL
+    assert priority_for("/predictions/7") is Priority.LOW
+    assert priority_for("/predict") is Priority.NORMAL
+    assert priority_for("/healthz") is Priority.NORMAL
+
+
+def test_limit_grows_when_fast_and_backs_off_once_per_interval():
+    now = 100.0
+    limiter = AdaptiveLimiter(
+        initial_limit=10, backoff=0.9, tolerance=2.0, slack_ms=0, clock=lambda: now
+    )
+    for _ in range(10):
+        assert limiter.try_acquire()
+        limiter.release("/predict", 0.010)
+    assert 10.9 < limiter.limit < 11.0  # ≈ +1 after a full round
+
+    grown = limiter.limit
+    limiter.try_acquire(), limiter.try_acquire()
+    limiter.release("/predict", 0.100)
+    limiter.release("/predict", 0.100)  # same congestion episode
+    assert limiter.limit == grown * 0.9
+    first_backoff = limiter.limit
+    now += 1.0
+    limiter.try_acquire()
+    limiter.release("/predict", 0.100)
+    assert limiter.limit < first_backoff
+
+
+def test_baselines_are_per_route():
+    limiter = AdaptiveLimiter(initial_limit=10, slack_ms=0)
+    limiter.try_acquire(), limiter.try_acquire()
+    limiter.release("/models", 0.0001)
+    limiter.release("/predict", 0.050)  # slow route, but not congested
+    assert limiter.limit > 10
+
+
+def test_overload_sheds_with_503_but_never_health():
+    async def app(scope, receive, send):
+        await asyncio.sleep(0.05)
+        await PlainTextResponse("ok")(scope, receive, send)
+
+    middleware = AdmissionMiddleware(
+        app, AdaptiveLimiter(initial_limit=2, min_limit=2), queue_timeout_ms=10
+    )
+
+    async def call(path):
+        scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            sent.append(message)
+
+        await middleware(scope, receive, send)
+        return sent[0]
+
+    async def burst():
+        return await asyncio.gather(*[call("/predict") for _ in range(6)], call("/health"))
+
+    *starts, health = asyncio.run(burst())
+    statuses = sorted(start["status"] for start in starts)
+    assert statuses == [200, 200, 503, 503, 503, 503]
+    shed = next(start for start in starts if start["status"] == 503)
+    assert (b"retry-after", b"1") in shed["headers"]
+    assert health["status"] == 200
+    assert middleware.limiter.in_flight == 0
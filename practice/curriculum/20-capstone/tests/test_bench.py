@@ -0,0 +1,68 @@
+"""
+Capstone — Benchmarks: hot paths against benchmarks/baseline.json
+Run: pytest tests/test_bench.py --bench-compare
+     pytest tests/test_bench.py --bench-save   (after an intended change)
+"""
+
+import itertools
+
+import pytest
+from starlette.responses import JSONResponse
+
+from appcore.api.rate_limiter import InMemoryRateLimiter
+from appcore.api.schemas import PredictionPage
+from appcore.db import database, repository
+from appcore.models.predict import PredictionModel
+from appcore.monitoring.pytest_bench import Timing, compare
+
+# SQLite on a temp file: timings drift more from one session to the next
+DISK_BOUND = pytest.mark.benchmark(threshold=0.5)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", tmp_path / "bench.db")
+    database.init_db()
+    repository.save_predictions([(f"[{i}]", str(i), 0.95) for i in range(500)])
+    return repository
+
+
+def test_regression_needs_a_real_slowdown():
+    baseline = Timing(median=1.0, q1=0.95, q3=1.05, rounds=20, loops=1)
+    assert compare(Timing(1.3, 1.25, 1.35, 20, 1), baseline, 0.2)[1] == "regressed"
+    assert compare(Timing(1.3, 1.0, 1.6, 20, 1), baseline, 0.2)[1] == "same"  # noisy run
+    assert compare(Timing(1.1, 1.08, 1.12, 20, 1), baseline, 0.2)[1] == "same"  # under threshold
+    assert compare(Timing(0.5, 0.45, 0.55, 20, 1), baseline, 0.2)[1] == "improved"
+
+
+def test_rate_limiter_is_allowed(bench):
+    limiter = InMemoryRateLimiter(max_requests=100, window_seconds=60)
+    clients = itertools.cycle([f"10.0.{i // 256}.{i % 256}" for i in range(1000)])
+    bench(lambda: limiter.is_allowed(next(clients)))
+
+
+def test_model_predict(bench):
+    model = PredictionModel()
+    bench(model.predict, [float(i) for i in range(32)])
+
+
+@DISK_BOUND
+def test_repository_get_prediction(bench, store):
+    bench(store.get_prediction, 250)
+
+
+@DISK_BOUND
+def test_repository_list_predictions(bench, store):
+    bench(store.list_predictions, limit=50)
+
+
+@DISK_BOUND
+def test_repository_save_prediction(bench, store):
+    bench(store.save_prediction, "[1.0, 2.0]", "1.5", 0.95)
+
+
+def test_serialize_prediction_page(bench, store):
+    items = store.list_predictions(limit=50)
+    payload = {"items": items, "next_cursor": store.encode_cursor(items[-1])}
+    # What FastAPI does with a response_model: validate, dump, render
+    bench(lambda: JSONResponse(PredictionPage.model_validate(payload).model_dump(mode="json")))
@@ -0,0 +1,69 @@
+"""
+Capstone — Tests: Saturation-point finder
+Run: pytest tests/test_capacity.py -v
+"""
+
+import asyncio
+
+from appcore import capacity
+from appcore.cli import build_parser
+from appcore.loadgen import Target
+
+BEFORE = """\
+event_loop_lag_seconds_bucket{le="0.001"} 10.0
+event_loop_lag_seconds_bucket{le="0.01"} 10.0
+event_loop_lag_seconds_bucket{le="+Inf"} 10.0
+event_loop_lag_seconds_sum 0.005
+event_loop_lag_seconds_count 10.0
+"""
+
+AFTER = """\
+event_loop_lag_seconds_bucket{le="0.001"} 100.0
+event_loop_lag_seconds_bucket{le="0.01"} 110.0
+event_loop_lag_seconds_bucket{le="+Inf"} 110.0
+event_loop_lag_seconds_sum 0.205
+event_loop_lag_seconds_count 110.0
+"""
+
+
+def test_loop_lag_between_two_scrapes():
+    buckets, total, count = capacity.parse_histogram(AFTER, "event_loop_lag_seconds")
+    assert buckets[0] == (0.001, 100.0) and total == 0.205 and count == 110.0
+    mean_ms, p99_ms = capacity.lag_between(BEFORE, AFTER)
+    assert mean_ms == 2.0
+    assert p99_ms == 10.0  # 90 of the 100 new samples were under 1 ms
+    assert capacity.lag_between(AFTER, AFTER) == (None, None)
+
+
+def _step(rate, passed, goodput):
+    return capacity.Step(rate, passed, "ok" if passed else "p99", goodput, 1.0, 0.0,
+                         None, None, None, None)
+
+
+def test_find_knee_steps_up_then_bisects(monkeypatch):
+    async def fake_measure(client, target, rate, seconds, slo, pid):
+        return _step(rate, rate <= 300, min(rate, 300))
+
+    monkeypatch.setattr(capacity, "measure_step", fake_measure)
+    result = asyncio.run(capacity.find_knee(
+        None, Target("GET", "/health"), capacity.Slo(), start_rate=100, factor=2,
+        step_seconds=0, refine=2,
+    ))
+    assert [step.rate for step in result.steps] == [100, 200, 400, 300, 350]
+    assert result.max_sustainable_rps == 300
+
+
+def test_report_round_trip_and_compare(tmp_path):
+    routes = [capacity.RouteCapacity("GET /health", 1000.0, [_step(1000, True, 1000.0)])]
+    previous = capacity.save_report(tmp_path / "a.json", "v1", capacity.Slo(), routes)
+    routes = [capacity.RouteCapacity("GET /health", 1200.0), capacity.RouteCapacity("POST /predict", 80.0)]
+    current = capacity.save_report(tmp_path / "b.json", "v2", capacity.Slo(), routes)
+    lines = capacity.compare(previous, current)
+    assert "+20.0%" in lines[1]
+    assert lines[2].endswith("new")
+
+
+def test_cli_parses_knee_options():
+    args = build_parser().parse_args(["knee", "--request", "GET /health", "--slo-p99-ms", "25"])
+    assert args.func.__name__ == "knee"
+    assert args.request == ["GET /health"] and args.slo_p99_ms == 25.0
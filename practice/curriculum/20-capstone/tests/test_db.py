@@ -2,42 +2,230 @@
 # Section 04 — Database Tests
 # Guide: docs/curriculum/20-capstone-project.md
 #
-# Exercise: Write tests for the database layer.
+# Tests for the database layer.
 #
-# TODO:
 # 1. Test init_db creates the predictions table
 # 2. Test save_prediction returns an ID
 # 3. Test get_prediction retrieves saved data
 # 4. Test list_predictions returns correct order and limit
 # 5. Test get_prediction returns None for missing ID
+# 6. Test the write-behind buffer group-commits and returns row IDs
+# 7. Test keyset pagination (cursor, index use, GET /predictions)
+# 8. Test the Redis cache backs off while Redis is down
 # =============================================================================
 
-# import pytest
-# from appcore.db.database import init_db, get_db
-# from appcore.db.repository import save_prediction, get_prediction, list_predictions
+import asyncio
+import sys
+import types
 
+import pytest
+from fastapi.testclient import TestClient
 
-# @pytest.fixture(autouse=True)
-# def setup_db(tmp_path, monkeypatch):
-#     """Use a temporary database for each test."""
-#     # TODO: Monkeypatch DATABASE_PATH to tmp_path / "test.db"
-#     # TODO: Call init_db()
-#     pass
+from appcore.api.app import app
+from appcore.db import cache, database
+from appcore.db.database import init_db, get_db
+from appcore.db.repository import (
+    save_prediction,
+    save_predictions,
+    get_prediction,
+    list_predictions,
+    encode_cursor,
+    decode_cursor,
+)
+from appcore.db.write_buffer import PredictionWriteBuffer
 
 
-# def test_save_and_get_prediction():
-#     """Save a prediction and retrieve it."""
-#     # TODO: Implement
-#     pass
+@pytest.fixture(autouse=True)
+def setup_db(tmp_path, monkeypatch):
+    """Use a temporary database for each test."""
+    monkeypatch.setattr(database, "DATABASE_PATH", tmp_path / "test.db")
+    init_db()
 
 
-# def test_list_predictions_order():
-#     """Predictions should be returned newest first."""
-#     # TODO: Implement
-#     pass
+def test_init_db_creates_table():
+    with get_db() as conn:
+        tables = {
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        }
+    assert "predictions" in tables
 
 
-# def test_get_missing_prediction():
-#     """Getting a non-existent prediction should return None."""
-#     # TODO: Implement
-#     pass
+def test_save_and_get_prediction():
+    """Save a prediction and retrieve it."""
+    prediction_id = save_prediction("hello", "positive", 0.9)
+    assert isinstance(prediction_id, int)
+    row = get_prediction(prediction_id)
+    assert row["input_text"] == "hello"
+    assert row["result"] == "positive"
+    assert row["confidence"] == 0.9
+
+
+def test_list_predictions_order():
+    """Predictions should be returned newest first."""
+    ids = [save_prediction(f"text-{i}", "ok", 0.5) for i in range(3)]
+    rows = list_predictions(limit=2)
+    assert [row["id"] for row in rows] == [ids[2], ids[1]]
+
+
+def test_get_missing_prediction():
+    """Getting a non-existent prediction should return None."""
+    assert get_prediction(9999) is None
+
+
+def test_save_predictions_returns_contiguous_ids():
+    save_prediction("before", "ok", 0.1)
+    ids = save_predictions([(f"text-{i}", "ok", 0.5) for i in range(5)])
+    assert len(ids) == 5
+    for i, prediction_id in enumerate(ids):
+        assert get_prediction(prediction_id)["input_text"] == f"text-{i}"
+
+
+def test_write_buffer_flushes_on_batch_size():
+    """A full batch is committed without waiting for the delay."""
+
+    async def scenario():
+        buffer = PredictionWriteBuffer(max_batch=10, max_delay_ms=60_000)
+        await buffer.start()
+        ids = await asyncio.wait_for(
+            asyncio.gather(*(buffer.save(f"t{i}", "ok", 0.5) for i in range(10))),
+            timeout=5,
+        )
+        await buffer.stop()
+        return ids
+
+    ids = asyncio.run(scenario())
+    assert len(set(ids)) == 10
+    assert get_prediction(ids[3])["input_text"] == "t3"
+
+
+def test_write_buffer_flushes_on_delay():
+    """A partial batch is committed once the delay expires."""
+
+    async def scenario():
+        buffer = PredictionWriteBuffer(max_batch=1000, max_delay_ms=5)
+        await buffer.start()
+        prediction_id = await asyncio.wait_for(buffer.save("late", "ok", 0.5), timeout=5)
+        await buffer.stop()
+        return prediction_id
+
+    prediction_id = asyncio.run(scenario())
+    assert get_prediction(prediction_id)["input_text"] == "late"
+
+
+def test_write_buffer_stop_flushes_pending():
+    """Fire-and-forget rows are committed on shutdown."""
+
+    async def scenario():
+        buffer = PredictionWriteBuffer(max_batch=1000, max_delay_ms=60_000)
+        await buffer.start()
+        futures = [buffer.submit(f"t{i}", "ok", 0.5) for i in range(3)]
+        assert buffer.pending == 3
+        await buffer.stop()
+        return [f.result() for f in futures]
+
+    ids = asyncio.run(scenario())
+    assert len(list_predictions(limit=10)) == 3
+    assert sorted(ids) == ids
+
+
+def test_write_buffer_requires_start():
+    buffer = PredictionWriteBuffer()
+    with pytest.raises(RuntimeError):
+        buffer.submit("x", "ok", 0.5)
+
+
+def test_list_predictions_keyset_pages():
+    """Walking `before` cursors visits every row exactly once, newest first."""
+    ids = save_predictions([(f"t{i}", "ok", 0.5) for i in range(7)])
+    seen, cursor = [], None
+    while True:
+        page = list_predictions(limit=3, before=cursor)
+        if not page:
+            break
+        seen.extend(row["id"] for row in page)
+        cursor = encode_cursor(page[-1])
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_list_predictions_uses_index():
+    """Paging must be an index scan, not a full-table sort."""
+    with get_db() as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM predictions "
+            "WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 5",
+            ("2030-01-01", 1),
+        ).fetchall()
+    detail = " ".join(row["detail"] for row in plan)
+    assert "idx_predictions_created_at_id" in detail
+    assert "TEMP B-TREE" not in detail
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_predictions_endpoint_pages():
+    save_predictions([(f"t{i}", "ok", 0.5) for i in range(3)])
+    client = TestClient(app)
+    first = client.get("/predictions", params={"limit": 2}).json()
+    assert len(first["items"]) == 2
+    assert first["next_cursor"]
+    second = client.get(
+        "/predictions", params={"limit": 2, "before": first["next_cursor"]}
+    ).json()
+    assert [item["input_text"] for item in second["items"]] == ["t0"]
+    assert second["next_cursor"] is None
+
+
+def test_predictions_endpoint_bad_cursor():
+    client = TestClient(app)
+    assert client.get("/predictions", params={"before": "???"}).status_code == 400
+    huge = encode_cursor({"created_at": "2026-10-01 00:00:00", "id": 10**30})
+    response = client.get("/predictions", params={"before": huge})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_prediction_id_out_of_sqlite_range():
+    client = TestClient(app)
+    assert client.get("/predictions/99999999999999999999999").status_code == 422
+    assert client.get("/predictions/0").status_code == 422
+
+
+class _DownRedis:
+    """Stand-in for the optional redis package while the server is down."""
+
+    class RedisError(Exception):
+        pass
+
+    connects = 0
+
+    class Redis:
+        @classmethod
+        def from_url(cls, url, **kwargs):
+            _DownRedis.connects += 1
+            return cls()
+
+        def ping(self):
+            raise _DownRedis.RedisError("connection refused")
+
+
+def test_cache_backs_off_while_redis_is_down(monkeypatch):
+    module = types.ModuleType("redis")
+    module.Redis, module.RedisError = _DownRedis.Redis, _DownRedis.RedisError
+    monkeypatch.setitem(sys.modules, "redis", module)
+    monkeypatch.setattr(cache, "_client", None)
+    monkeypatch.setattr(cache, "_unavailable", False)
+    monkeypatch.setattr(cache, "_retry_at", 0.0)
+    _DownRedis.connects = 0
+
+    for _ in range(5):
+        assert cache.cache_get("k") is None
+        cache.cache_set("k", {"v": 1})
+    assert _DownRedis.connects == 1
+
+    monkeypatch.setattr(cache, "_retry_at", 0.0)  # retry period over
+    assert cache.get_redis_client() is None
+    assert _DownRedis.connects == 2
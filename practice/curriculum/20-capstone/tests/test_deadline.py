@@ -0,0 +1,103 @@
+"""
+Capstone — Tests: Request deadlines and cancellation
+Run: pytest tests/test_deadline.py -v
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from appcore import deadline
+from appcore.api.middleware import CANCELLED_SCOPE_KEY, DeadlineMiddleware
+from appcore.db.database import get_db
+
+
+def test_parse_timeout_takes_the_tightest_budget():
+    assert deadline.parse_timeout("2", None, default=30) == 2
+    assert deadline.parse_timeout("60", None, default=30) == 30
+    assert 0.9 < deadline.parse_timeout(None, str(time.time() + 1), default=30) <= 1
+    assert deadline.parse_timeout("soon", None, default=30) == 30
+    assert deadline.parse_timeout(None, None, default=0) is None
+
+
+def test_check_raises_once_the_deadline_passed():
+    token = deadline.set_timeout(-0.001)
+    try:
+        with pytest.raises(deadline.DeadlineExceeded, match="before model"):
+            deadline.check("model")
+        assert deadline.timeout(5.0) == 0.0
+        assert deadline.outbound_headers() == {"X-Request-Timeout": "0.000"}
+    finally:
+        deadline.reset(token)
+    deadline.check("model")  # no deadline outside a request
+    assert deadline.timeout(5.0) == 5.0
+
+
+def test_spent_budget_returns_504_without_running_the_handler(client):
+    response = client.post("/predict", json={"features": [1.0]}, headers={"X-Request-Timeout": "0"})
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Request deadline exceeded"
+
+
+def _run(app, *, messages, headers=()):
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": list(headers)}
+    sent = []
+    pending = list(messages)
+
+    async def receive():
+        if pending:
+            return pending.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    started = time.perf_counter()
+    asyncio.run(DeadlineMiddleware(app, default_timeout=0)(scope, receive, send))
+    return scope, sent, time.perf_counter() - started
+
+
+def test_handler_is_cancelled_when_the_deadline_passes():
+    cancelled = []
+
+    async def slow(scope, receive, send):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    scope, sent, elapsed = _run(
+        slow, messages=[{"type": "http.request", "body": b""}],
+        headers=[(b"x-request-timeout", b"0.05")],
+    )
+    assert elapsed < 1 and cancelled
+    assert scope[CANCELLED_SCOPE_KEY] == "deadline"
+    assert sent[0]["status"] == 504
+
+
+def test_handler_is_cancelled_when_the_client_disconnects():
+    async def slow(scope, receive, send):
+        await receive()
+        await asyncio.sleep(5)
+
+    scope, sent, elapsed = _run(
+        slow, messages=[{"type": "http.request", "body": b"{}"}, {"type": "http.disconnect"}]
+    )
+    assert elapsed < 1
+    assert scope[CANCELLED_SCOPE_KEY] == "disconnect"
+    assert sent == []
+
+
+def test_running_query_is_interrupted_at_the_deadline(tmp_path):
+    token = deadline.set_timeout(0.05)
+    try:
+        with pytest.raises(deadline.DeadlineExceeded):
+            with get_db(tmp_path / "slow.db") as conn:
+                conn.execute(
+                    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+                    "SELECT count(*) FROM n"
+                ).fetchone()
+    finally:
+        deadline.reset(token)
@@ -0,0 +1,61 @@
+"""
+Capstone — Tests: Open-loop load generator
+Run: pytest tests/test_loadgen.py -v
+"""
+
+import asyncio
+import random
+
+from appcore.loadgen import HttpClient, LatencyHistogram, Stage, Target, run_stage
+
+
+def test_histogram_percentiles_within_one_percent():
+    hist = LatencyHistogram()
+    values = [random.uniform(0.0001, 2.0) for _ in range(20_000)]
+    for value in values:
+        hist.record(value)
+    values.sort()
+    for p in (50, 90, 99, 99.9):
+        exact = values[int(len(values) * p / 100) - 1]
+        assert abs(hist.percentile(p) - exact) / exact < 0.01
+    assert hist.percentile(100) == int(max(values) * 1e6) / 1e6
+
+
+def test_stage_schedules():
+    assert len(list(Stage.parse("100:1").due_times())) == 100
+    ramp = list(Stage.parse("0-100:2").due_times())
+    assert len(ramp) == 100
+    assert ramp[10] - ramp[9] > ramp[-1] - ramp[-2]  # speeds up
+
+
+def test_target_parse():
+    target = Target.parse('POST@3 /predict {"features": [1]}', {"X-API-Key": "k"})
+    assert (target.method, target.path, target.weight) == ("POST", "/predict", 3.0)
+    raw = target.encode("localhost:8000")
+    assert raw.startswith(b"POST /predict HTTP/1.1\r\nHost: localhost:8000\r\n")
+    assert b"X-API-Key: k\r\n" in raw and raw.endswith(b'{"features": [1]}')
+
+
+def test_queueing_shows_in_corrected_latency_only():
+    async def scenario():
+        async def handle(reader, writer):
+            while await reader.readuntil(b"\r\n\r\n"):
+                await asyncio.sleep(0.02)  # 50 requests/s per connection
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = HttpClient(f"http://127.0.0.1:{port}", max_connections=1)
+        try:
+            # 100/s offered to a 50/s server: the backlog grows all stage long
+            return await run_stage(client, [Target.parse("GET /")], Stage.parse("100:0.5"))
+        finally:
+            await client.close()
+            server.close()
+
+    result = asyncio.run(scenario())
+    data = result.to_dict()
+    assert data["sent"] == 50 and data["ok"] == 50
+    assert data["uncorrected_latency_ms"]["p99"] < 100
+    assert data["latency_ms"]["p99"] > 5 * data["uncorrected_latency_ms"]["p99"]
@@ -0,0 +1,179 @@
+"""
+Capstone — Tests: Structured Logging
+Run: pytest tests/test_logging.py -v
+"""
+
+import io
+import json
+import logging
+import queue
+import sys
+from contextlib import contextmanager
+
+from appcore.monitoring import logging_config
+from appcore.monitoring.logging_config import (
+    BatchingQueueListener,
+    DroppingQueueHandler,
+    JSONFormatter,
+    Lazy,
+    SamplingFilter,
+    parse_sample_rates,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+def _record(msg="hello %s", args=("world",), **extra):
+    record = logging.makeLogRecord({"name": "appcore.test", "levelno": logging.INFO,
+                                    "levelname": "INFO", "msg": msg, "args": args})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extras_and_evaluates_lazy_ones():
+    calls = []
+    record = _record(path="/predict", summary=Lazy(lambda: calls.append(1) or {"n": 3}))
+    assert calls == []  # not evaluated when the record is created
+    data = json.loads(JSONFormatter().format(record))
+    assert data["message"] == "hello world"
+    assert data["path"] == "/predict"
+    assert data["summary"] == {"n": 3}
+    assert data["timestamp"].endswith("Z")
+    assert "args" not in data
+
+
+def test_full_queue_drops_and_counts():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    for _ in range(5):
+        handler.emit(_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_queued_record_is_frozen_at_logging_time():
+    handler = DroppingQueueHandler(queue.Queue())
+    features = [1.0]
+    handler.emit(_record("features %s", (features,), features=Lazy(lambda: len(features))))
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        handler.emit(_record("failed", (), exc_info=sys.exc_info()))
+    features.append(2.0)  # mutated after the call
+
+    queued, failed = handler.queue.get_nowait(), handler.queue.get_nowait()
+    assert queued.getMessage() == "features [1.0]"
+    assert failed.exc_info is None  # no frames held while queued
+    data = json.loads(JSONFormatter().format(failed))
+    assert "RuntimeError: boom" in data["exception"]
+    # Lazy extras are still evaluated on the listener side
+    assert json.loads(JSONFormatter().format(queued))["features"] == 2
+
+
+class _CountingStream(io.StringIO):
+    writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_listener_writes_batches():
+    stream = _CountingStream()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JSONFormatter())
+    log_queue = queue.Queue()
+    for i in range(10):
+        log_queue.put(_record("line %d", (i,)))
+    listener = BatchingQueueListener(log_queue, output, batch_size=4)
+    listener.start()
+    listener.stop()
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)["message"] for line in lines] == [f"line {i}" for i in range(10)]
+    assert stream.writes == 3  # 4 + 4 + 2
+
+
+def test_setup_logging_flushes_on_shutdown():
+    stream = io.StringIO()
+    setup_logging("INFO", stream=stream)
+    try:
+        logging.getLogger("appcore.test").info("queued", extra={"request_id": "abc"})
+    finally:
+        shutdown_logging()
+    data = json.loads(stream.getvalue())
+    assert data["message"] == "queued"
+    assert data["request_id"] == "abc"
+
+
+def _access(status=200, route="/predict", duration_ms=1.0, level=logging.INFO):
+    record = _record("request", (), route=route, status_code=status, duration_ms=duration_ms)
+    record.levelno = level
+    return record
+
+
+def test_sampling_keeps_errors_and_slow_requests():
+    sampler = SamplingFilter(rates={"/health": 0.0}, rng=lambda: 0.99)
+    assert not sampler.filter(_access(route="/health"))
+    assert sampler.filter(_access(route="/health", status=503))
+    assert sampler.filter(_access(route="/health", duration_ms=10_000))
+    assert sampler.filter(_access(route="/health", level=logging.WARNING))
+
+
+def test_sample_rates_most_specific_wins():
+    sampler = SamplingFilter(
+        rates=parse_sample_rates("/predict:404=0.5, /predict=0.25, 4xx=0.1"), default_rate=1.0
+    )
+    assert sampler.rate_for("/predict", 404) == 0.5
+    assert sampler.rate_for("/predict", 200) == 0.25
+    assert sampler.rate_for("/models", 404) == 0.1
+    assert sampler.rate_for("/models", 200) == 1.0
+
+
+@contextmanager
+def _summaries():
+    summaries = []
+    summary_logger = logging.getLogger("appcore.test")
+    capture = logging.Handler()
+    capture.emit = summaries.append
+    summary_logger.addHandler(capture)
+    summary_logger.setLevel(logging.INFO)
+    try:
+        yield summaries
+    finally:
+        summary_logger.removeHandler(capture)
+
+
+def test_token_bucket_reports_suppressed_similar():
+    now = [0.0]
+    sampler = SamplingFilter(rates={}, rate_per_key=1.0, burst_per_key=2.0, clock=lambda: now[0])
+    with _summaries() as summaries:
+        kept = [sampler.filter(_access()) for _ in range(5)]
+        assert kept == [True, True, False, False, False]
+        now[0] = 1.0  # one token refilled
+        assert sampler.filter(_access())
+    assert [r.getMessage() for r in summaries] == ["suppressed 3 similar: /predict 200"]
+    assert summaries[0].suppressed == 3
+
+
+def test_suppressed_summary_renders_the_template():
+    now = [0.0]
+    sampler = SamplingFilter(rates={}, rate_per_key=1.0, burst_per_key=1.0, clock=lambda: now[0])
+    with _summaries() as summaries:
+        for path in ("/a", "/b", "/c"):
+            sampler.filter(_record("HTTP Request: %s %s", ("GET", path)))
+        now[0] = 1.0
+        assert sampler.filter(_record("HTTP Request: %s %s", ("GET", "/d")))
+    assert [r.getMessage() for r in summaries] == ["suppressed 2 similar: HTTP Request: GET /c"]
+
+
+def test_evicted_key_reports_its_suppressed_count(monkeypatch):
+    monkeypatch.setattr(logging_config, "LOG_MAX_KEYS", 2)
+    sampler = SamplingFilter(rates={}, rate_per_key=0.0, burst_per_key=1.0, clock=lambda: 0.0)
+    with _summaries() as summaries:
+        for _ in range(3):
+            sampler.filter(_access(route="/a"))  # 1 kept, 2 suppressed
+        sampler.filter(_access(route="/b"))
+        sampler.filter(_access(route="/a"))  # /a is now the most recent key
+        sampler.filter(_access(route="/c"))  # evicts /b, which has nothing pending
+        assert summaries == []
+        sampler.filter(_access(route="/d"))  # evicts /a
+    assert [r.getMessage() for r in summaries] == ["suppressed 3 similar: /a 200"]
@@ -0,0 +1,67 @@
+"""
+Capstone — Tests: Event-loop Lag Watchdog
+Run: pytest tests/test_loop_monitor.py -v
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from appcore.monitoring.loop_monitor import LoopLagMonitor
+from appcore.monitoring.metrics import EVENT_LOOP_LAG
+from appcore.monitoring.pytest_loop_guard import LoopBlockGuard
+
+
+def _blocking_handler():
+    time.sleep(0.3)  # the bug: a sync sleep inside async code
+
+
+@pytest.mark.allow_loop_block
+def test_watchdog_captures_blocking_stack():
+    async def scenario():
+        monitor = LoopLagMonitor(interval_ms=10, threshold_ms=100)
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        _blocking_handler()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor
+
+    count_before = EVENT_LOOP_LAG._default.buckets().total
+    monitor = asyncio.run(scenario())
+    assert len(monitor.stalls) == 1
+    assert "_blocking_handler" in monitor.stalls[0]["stack"]
+    assert monitor.stalls[0]["blocked_ms"] >= 100
+    assert EVENT_LOOP_LAG._default.buckets().total > count_before
+    assert EVENT_LOOP_LAG.quantile(1.0) >= 0.25
+
+
+def test_no_stall_when_loop_is_free():
+    async def scenario():
+        monitor = LoopLagMonitor(interval_ms=10, threshold_ms=100)
+        await monitor.start()
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+        return monitor
+
+    assert list(asyncio.run(scenario()).stalls) == []
+
+
+@pytest.mark.allow_loop_block
+def test_guard_records_blocking_callbacks():
+    async def blocks():
+        time.sleep(0.1)
+
+    guard = LoopBlockGuard(limit_ms=50)
+    guard.install()
+    try:
+        asyncio.run(asyncio.sleep(0))
+        assert guard.take() == []
+        asyncio.run(blocks())
+        blocked = guard.take()
+    finally:
+        guard.uninstall()
+    assert len(blocked) == 1
+    assert blocked[0][0] >= 0.1
+    assert "test_guard_records_blocking_callbacks.<locals>.blocks" in blocked[0][1]
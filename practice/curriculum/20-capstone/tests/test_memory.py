@@ -0,0 +1,50 @@
+"""
+Capstone — Tests: Memory Snapshots
+Run: pytest tests/test_memory.py -v
+"""
+
+import tracemalloc
+
+import pytest
+
+from appcore.monitoring.memory import MemoryTracker
+
+_leak = []
+
+
+class LeakyRecord:
+    def __init__(self, n):
+        self.payload = "x" * 100 + str(n)
+
+
+def test_diff_points_at_growing_site_and_type():
+    tracker = MemoryTracker()
+    try:
+        tracker.take_snapshot()
+        _leak.extend(LeakyRecord(i) for i in range(5000))
+        diff = tracker.diff(top=5)
+    finally:
+        tracker.stop()
+        _leak.clear()
+    assert diff["top_growth"][0]["site"].startswith(__file__)
+    assert diff["top_growth"][0]["size_diff_bytes"] > 5000 * 100
+    assert diff["type_growth"]["tests.test_memory.LeakyRecord"] == 5000
+    assert not tracemalloc.is_tracing()
+
+
+def test_diff_without_baseline_raises():
+    with pytest.raises(RuntimeError):
+        MemoryTracker().diff()
+
+
+def test_memory_endpoints(client, admin_headers):
+    assert client.get("/debug/memory/diff", headers=admin_headers).status_code == 409
+    try:
+        snapshot = client.post("/debug/memory/snapshot", headers=admin_headers).json()
+        assert snapshot["tracing_started"] is True
+        client.post("/predict", json={"features": [1.0]})
+        diff = client.get("/debug/memory/diff", params={"top": 5}, headers=admin_headers).json()
+        assert len(diff["top_growth"]) <= 5
+        assert "type_growth" in diff
+    finally:
+        assert client.delete("/debug/memory/snapshot", headers=admin_headers).status_code == 204
@@ -3,16 +3,267 @@ Capstone — Tests: Metrics Endpoint
 Run: pytest tests/test_metrics.py -v
 """
 
+import asyncio
+import gzip
+import math
+import multiprocessing
+import os
+import random
+import threading
 
-def test_metrics_endpoint():
+import pytest
+
+from appcore.monitoring import mmap_store
+from appcore.monitoring.exposition import ExpositionCache, accepts_gzip, exposition_cache
+from appcore.monitoring.metrics import (
+    Counter,
+    ExponentialBuckets,
+    ExponentialHistogram,
+    Gauge,
+    Histogram,
+    MetricRegistry,
+)
+
+
+def test_metrics_endpoint(client):
     """GET /metrics returns Prometheus metrics."""
-    # TODO: response = client.get("/metrics")
-    # assert response.status_code == 200
-    # assert "http_requests_total" in response.text
-    pass
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_requests_total counter" in response.text
 
 
-def test_metrics_after_request():
+def test_metrics_after_request(client):
     """Metrics increment after making requests."""
-    # TODO: Make a request, then check /metrics for updated counters
-    pass
+    client.post("/predict", json={"features": [1.0, 2.0]})
+    client.get("/health")
+    exposition_cache.invalidate()
+    text = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",endpoint="/health",status_code="200"}' in text
+    assert 'predictions_total{model_version="1.0.0",status="success"}' in text
+    assert "http_request_duration_seconds_count" in text
+
+
+def test_metrics_label_route_templates(client):
+    """Ids and unknown paths must not create a series each."""
+    for prediction_id in (101, 102, 103):
+        client.get(f"/predictions/{prediction_id}")
+    client.get("/wp-login.php")
+    client.get("/.env")
+    exposition_cache.invalidate()
+    text = client.get("/metrics").text
+    assert 'endpoint="/predictions/{prediction_id}",status_code="404"}' in text
+    assert 'endpoint="<unmatched>",status_code="404"}' in text
+    assert "/predictions/101" not in text
+    assert "wp-login" not in text
+
+
+def test_max_series_overflow_is_counted():
+    registry = MetricRegistry()
+    counter = Counter("calls_total", "Calls", ["user"], registry=registry, max_series=2)
+    for user in ("a", "b", "c", "d", "c", "c"):
+        counter.labels(user).inc()
+    text = registry.render()
+    assert 'calls_total{user="a"} 1.0' in text
+    assert 'calls_total{user="__overflow__"} 4.0' in text
+    # Distinct label sets: a hot refused label is counted once
+    assert 'metrics_series_dropped_total{metric="calls_total"} 2.0' in text
+    assert 'user="c"' not in text
+
+
+def test_metrics_gzip_negotiation(client):
+    response = client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "http_requests_total" in response.text  # httpx decompresses
+    plain = client.get("/metrics", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert accepts_gzip("br, gzip;q=0.5")
+    assert not accepts_gzip("gzip;q=0, br")
+    assert accepts_gzip("br, *")
+    assert not accepts_gzip("*, gzip;q=0")
+    assert accepts_gzip("*;q=0, gzip")
+
+
+def test_exposition_cache_renders_once_per_ttl():
+    calls = []
+
+    def render():
+        calls.append(threading.current_thread())
+        return f"render {len(calls)}\n"
+
+    async def scrape(cache):
+        return await asyncio.gather(*(cache.get() for _ in range(10)))
+
+    cache = ExpositionCache(render, ttl_ms=60_000)
+    bodies = asyncio.run(scrape(cache))
+    assert set(bodies) == {b"render 1\n"}  # single flight
+    assert calls[0] is not threading.main_thread()  # off the event loop
+    assert cache._gzipped is None  # no gzip client yet: nothing compressed
+    gzipped = asyncio.run(cache.get(use_gzip=True))
+    assert gzip.decompress(gzipped) == b"render 1\n"
+    assert asyncio.run(cache.get(use_gzip=True)) is gzipped
+    assert len(calls) == 1
+    cache.invalidate()
+    assert asyncio.run(cache.get()) == b"render 2\n"
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricRegistry()
+    hist = Histogram("job_seconds", "Job time", registry=registry, buckets=(1, 5))
+    for value in (0.5, 2, 7):
+        hist.observe(value)
+    text = registry.render()
+    assert 'job_seconds_bucket{le="1.0"} 1.0' in text
+    assert 'job_seconds_bucket{le="5.0"} 2.0' in text
+    assert 'job_seconds_bucket{le="+Inf"} 3.0' in text
+    assert "job_seconds_count 3.0" in text
+
+
+def test_sharded_metrics_merge_threads(tmp_path):
+    """Per-thread shards lose no updates and render as one series."""
+    for registry in (MetricRegistry(), MetricRegistry(tmp_path)):
+        counter = Counter("hits_total", "Hits", ["route"], registry=registry).labels("/x")
+        hist = Histogram("hit_seconds", "Hit time", registry=registry, buckets=(1,))
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+                hist.observe(0.5)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        text = registry.render()
+        assert 'hits_total{route="/x"} 8000.0' in text
+        assert 'hit_seconds_bucket{le="1.0"} 8000.0' in text
+        assert text.count("hits_total{") == 1
+
+
+def test_exponential_histogram_quantiles_and_bounded_buckets():
+    registry = MetricRegistry()
+    hist = ExponentialHistogram("latency_seconds", "Latency", registry=registry, max_buckets=64)
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(-4, 1.5) for _ in range(50_000))
+    for value in values:
+        hist.observe(value)
+
+    state = hist._default.buckets()
+    assert len(state.counts) <= 64
+    for q in (0.5, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        # One bucket at the final schema is 2**(2**-schema) wide
+        assert abs(hist.quantile(q) - exact) / exact < 2 ** (2 ** -state.schema) - 1
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="+Inf"} 50000.0' in text
+    assert "latency_seconds_count 50000.0" in text
+    assert text.count("latency_seconds_bucket") == len(hist.buckets)
+    at_100ms = sum(v <= 0.1 for v in values)
+    rendered = float(text.split('latency_seconds_bucket{le="0.1"} ', 1)[1].split("\n", 1)[0])
+    # Only the bucket straddling 0.1 is left out
+    assert at_100ms * (1 - 0.05) <= rendered <= at_100ms
+
+
+def _le_labels(text: str) -> list[str]:
+    return [line.split('le="', 1)[1].split('"', 1)[0]
+            for line in text.splitlines() if "_bucket{" in line]
+
+
+def test_exponential_histogram_rejects_non_finite_values():
+    hist = ExponentialHistogram("latency_seconds", "Latency", registry=MetricRegistry())
+    for value in (-1.0, math.nan, math.inf):
+        with pytest.raises(ValueError):
+            hist.observe(value)
+
+
+def test_exponential_histogram_exposes_fixed_le_bounds():
+    texts = []
+    for seed, scale in ((1, 1e-4), (2, 3.0)):
+        registry = MetricRegistry()
+        hist = ExponentialHistogram("latency_seconds", "Latency", registry=registry, max_buckets=8)
+        rng = random.Random(seed)
+        for _ in range(1000):
+            hist.observe(rng.expovariate(1 / scale))
+        texts.append(registry.render())
+    assert _le_labels(texts[0]) == _le_labels(texts[1])
+    assert _le_labels(texts[0])[-1] == "+Inf"
+
+
+def test_exponential_buckets_merge_across_schemas():
+    fine = ExponentialBuckets(3)
+    coarse = ExponentialBuckets(1)
+    for value in (0.01, 0.2, 3.0):
+        fine.counts[ExponentialBuckets.index(value, 3)] = 1.0
+        coarse.counts[ExponentialBuckets.index(value, 1)] = 1.0
+    fine.merge(coarse)
+    assert fine.schema == 1
+    assert fine.counts == {ExponentialBuckets.index(v, 1): 2.0 for v in (0.01, 0.2, 3.0)}
+
+
+def _observe_latency(hist):
+    for value in (0.001, 0.01, 0.1):
+        hist.observe(value)
+
+
+def test_exponential_histogram_merges_across_workers(tmp_path):
+    registry = MetricRegistry(tmp_path)
+    hist = ExponentialHistogram("latency_seconds", "Latency", registry=registry)
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_observe_latency, args=(hist,)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    _observe_latency(hist)
+
+    text = registry.render()
+    assert "latency_seconds_count 9.0" in text
+    assert 'latency_seconds_bucket{le="+Inf"} 9.0' in text
+    assert "_native" not in text
+
+
+def _worker(counter, hist):
+    counter.labels("worker").inc(2)
+    hist.observe(0.5)
+
+
+def test_multiprocess_counters_merge_across_workers(tmp_path):
+    """Each forked worker writes its own file; a scrape sums them all."""
+    registry = MetricRegistry(tmp_path)
+    counter = Counter("jobs_total", "Jobs", ["source"], registry=registry)
+    hist = Histogram("job_seconds", "Job time", registry=registry, buckets=(1,))
+    counter.labels("worker").inc()
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_worker, args=(counter, hist)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    text = registry.render()
+    # Dead workers were folded into the archive, not lost
+    assert 'jobs_total{source="worker"} 7.0' in text
+    assert 'job_seconds_bucket{le="1.0"} 3.0' in text
+    assert (tmp_path / mmap_store.ARCHIVE_NAME).exists()
+    assert {p.name for p in tmp_path.glob("metrics_*.db")} == {
+        mmap_store.ARCHIVE_NAME, f"metrics_{os.getpid()}.db"
+    }
+
+
+def test_multiprocess_gauges_drop_dead_workers(tmp_path):
+    registry = MetricRegistry(tmp_path)
+    gauge = Gauge("queue_depth", "Depth", registry=registry, mode="max")
+    gauge.set(3)
+
+    live = mmap_store.MmapValueStore(tmp_path, pid=os.getppid())
+    live.set(live.offset('["queue_depth","queue_depth",[]]'), 8)
+    dead = mmap_store.MmapValueStore(tmp_path, pid=2**22 + 1)  # above pid_max
+    dead.set(dead.offset('["queue_depth","queue_depth",[]]'), 50)
+
+    assert "queue_depth 8.0" in registry.render()
+    assert not dead.path.exists()
@@ -0,0 +1,84 @@
+"""
+Capstone — Tests: Fused ASGI middleware
+Run: pytest tests/test_middleware.py -v
+"""
+
+import asyncio
+
+from starlette.responses import PlainTextResponse
+
+from appcore.api.middleware import ObservabilityMiddleware, RequestHook
+
+
+def test_request_id_is_echoed_or_minted(client):
+    echoed = client.get("/health", headers={"X-Request-ID": "req-42"})
+    assert echoed.headers["x-request-id"] == "req-42"
+    minted = client.get("/health").headers["x-request-id"]
+    assert len(minted) == 32 and minted != client.get("/health").headers["x-request-id"]
+
+
+def test_security_headers_on_every_response(client):
+    for response in (client.get("/health"), client.get("/no-such-route")):
+        assert response.headers["x-content-type-options"] == "nosniff"
+        assert response.headers["x-frame-options"] == "DENY"
+
+
+class _Recorder(RequestHook):
+    def __init__(self, name, log, answer=False):
+        self.name, self.log, self.answer = name, log, answer
+
+    def before(self, ctx):
+        self.log.append(f"before {self.name}")
+        return PlainTextResponse("early", status_code=418) if self.answer else None
+
+    def on_headers(self, ctx, headers):
+        self.log.append(f"headers {self.name} {ctx.status_code}")
+
+    def after(self, ctx):
+        self.log.append(f"after {self.name} {ctx.status_code}")
+
+
+def _call(middleware):
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+def test_hooks_run_in_onion_order_and_can_answer_early():
+    log = []
+
+    async def app(scope, receive, send):
+        log.append("app")
+
+    middleware = ObservabilityMiddleware(app, [
+        _Recorder("outer", log), _Recorder("gate", log, answer=True), _Recorder("inner", log),
+    ])
+    sent = _call(middleware)
+    assert sent[0]["status"] == 418
+    assert log == [
+        "before outer", "before gate",
+        "headers gate 418", "headers outer 418",
+        "after gate 418", "after outer 418",
+    ]
+
+
+def test_after_hooks_see_500_when_the_app_raises():
+    log = []
+
+    async def app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    middleware = ObservabilityMiddleware(app, [_Recorder("only", log)])
+    try:
+        _call(middleware)
+    except RuntimeError:
+        pass
+    assert log == ["before only", "after only 500"]
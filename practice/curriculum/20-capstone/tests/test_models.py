@@ -0,0 +1,107 @@
+"""
+Capstone — Tests: Model Registry (hot reload)
+Run: pytest tests/test_models.py -v
+"""
+
+import asyncio
+from array import array
+
+import pytest
+
+from appcore.models.predict import PredictionModel
+from appcore.models.registry import ModelRegistry, model_registry
+
+
+def _write_weights(model_dir, version, weights=(2.0, 0.0)):
+    (model_dir / f"{version}.bin").write_bytes(array("d", weights).tobytes())
+
+
+def test_model_loads_memory_mapped_weights(tmp_path):
+    path = tmp_path / "2.0.0.bin"
+    path.write_bytes(array("d", [2.0, 0.0]).tobytes())
+    model = PredictionModel(version="2.0.0", weights_path=path)
+    assert model.predict([1.0, 5.0])["prediction"] == 1.0
+    model.close()
+
+
+def test_activate_swaps_and_drains_old_version(tmp_path):
+    _write_weights(tmp_path, "2.0.0")
+
+    async def scenario():
+        registry = ModelRegistry(tmp_path, warmup_rounds=5)
+        await registry.activate("1.0.0")
+        with registry.use() as old_model:
+            await registry.activate("2.0.0")
+            assert registry.active_version == "2.0.0"
+            # The in-flight call keeps the old version alive
+            states = {v["version"]: v["state"] for v in registry.versions()}
+            assert states == {"1.0.0": "draining", "2.0.0": "active"}
+            assert old_model.predict([1.0])["model_version"] == "1.0.0"
+        await asyncio.sleep(0.2)
+        return registry.versions()
+
+    versions = asyncio.run(scenario())
+    assert [v["version"] for v in versions] == ["2.0.0"]
+
+
+def test_reactivating_a_draining_version_keeps_it(tmp_path):
+    _write_weights(tmp_path, "2.0.0")
+
+    async def scenario():
+        registry = ModelRegistry(tmp_path, warmup_rounds=1)
+        await registry.activate("1.0.0")
+        with registry.use():
+            await registry.activate("2.0.0")
+            await registry.activate("1.0.0")
+        await asyncio.sleep(0.1)
+        with registry.use() as model:
+            return model.predict([1.0])["model_version"]
+
+    assert asyncio.run(scenario()) == "1.0.0"
+
+
+def test_version_without_weights_is_refused(tmp_path):
+    async def scenario():
+        registry = ModelRegistry(tmp_path, warmup_rounds=1, default_version="1.0.0")
+        await registry.activate("1.0.0")  # the default may run unweighted
+        with pytest.raises(FileNotFoundError):
+            await registry.activate("evil")
+        return registry
+
+    registry = asyncio.run(scenario())
+    assert registry.active_version == "1.0.0"
+    assert [v["version"] for v in registry.versions()] == ["1.0.0"]
+
+
+def test_use_without_active_model(tmp_path):
+    registry = ModelRegistry(tmp_path)
+    with pytest.raises(RuntimeError):
+        with registry.use():
+            pass
+
+
+def test_models_endpoints(client, admin_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "model_dir", tmp_path)
+    _write_weights(tmp_path, "2.0.0")
+    data = client.get("/models").json()
+    assert data["active_version"] == "1.0.0"
+    response = client.post("/models/2.0.0:activate", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["active_version"] == "2.0.0"
+    prediction = client.post("/predict", json={"features": [1.0]}).json()
+    assert prediction["model_version"] == "2.0.0"
+
+
+def test_activate_requires_admin_key(client, admin_headers):
+    del client.headers["X-API-Key"]
+    assert client.post("/models/evil:activate").status_code == 401
+    # The regular API key is not enough
+    response = client.post("/models/evil:activate", headers={"X-API-Key": "test-key"})
+    assert response.status_code == 403
+    assert client.get("/models").json()["active_version"] != "evil"
+
+
+def test_activate_unknown_version_is_404(client, admin_headers):
+    response = client.post("/models/evil:activate", headers=admin_headers)
+    assert response.status_code == 404
+    assert client.get("/models").json()["active_version"] != "evil"
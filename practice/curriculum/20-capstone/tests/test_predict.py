@@ -4,25 +4,34 @@ Run: pytest tests/test_predict.py -v
 """
 
 
-def test_predict_valid_input():
+def test_predict_valid_input(client):
     """Prediction with valid features returns result."""
-    # TODO: Implement
-    pass
+    response = client.post("/predict", json={"features": [1.0, 2.0, 3.0]})
+    assert response.status_code == 201
+    assert response.json()["prediction"] == 2.0
 
 
-def test_predict_invalid_input():
+def test_predict_invalid_input(client):
     """Prediction with invalid input returns 422."""
-    # TODO: Implement
-    pass
+    assert client.post("/predict", json={"features": []}).status_code == 422
+    assert client.post("/predict", json={"features": "nope"}).status_code == 422
 
 
-def test_predict_response_format():
+def test_predict_response_format(client):
     """Prediction response has correct schema."""
-    # TODO: Implement
-    pass
+    data = client.post("/predict", json={"features": [1.0]}).json()
+    assert set(data) == {"id", "prediction", "confidence", "model_version"}
 
 
-def test_predict_confidence_range():
+def test_predict_confidence_range(client):
     """Confidence is between 0 and 1."""
-    # TODO: Implement
-    pass
+    data = client.post("/predict", json={"features": [1.0]}).json()
+    assert 0 <= data["confidence"] <= 1
+
+
+def test_predict_is_stored(client):
+    """The returned ID can be fetched once the write buffer committed it."""
+    data = client.post("/predict", json={"features": [4.0, 6.0]}).json()
+    stored = client.get(f"/predictions/{data['id']}").json()
+    assert stored["input_text"] == "[4.0, 6.0]"
+    assert float(stored["result"]) == 5.0
@@ -0,0 +1,79 @@
+"""
+Capstone — Tests: Sampling Profiler
+Run: pytest tests/test_profiler.py -v
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from appcore.api import debug
+
+from appcore.monitoring import profiler
+from appcore.monitoring.profiler import StackSampler
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_collapses_other_threads_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        sampler = StackSampler(hz=200)
+        sampler.run(0.2)
+    finally:
+        stop.set()
+        worker.join()
+    assert sampler.samples > 10
+    busy = [line for line in sampler.collapsed().splitlines() if line.startswith("busy;")]
+    assert any("tests.test_profiler:_busy_loop" in line for line in busy)
+    stack, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0 and " " not in stack
+
+
+def test_profile_endpoint_is_admin_only(client, admin_headers):
+    assert client.post("/debug/profile", params={"seconds": 0.1}).status_code == 403
+    response = client.post("/debug/profile", params={"seconds": 0.2, "hz": 200}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    # The event loop keeps running (idle in its selector) while sampling
+    assert "asyncio.base_events:BaseEventLoop.run_forever" in response.text
+    assert "StackSampler.run" not in response.text  # the sampler skips itself
+
+
+def test_stop_event_ends_profile_and_frees_the_profiler():
+    stop = threading.Event()
+    started = time.perf_counter()
+    threading.Timer(0.1, stop.set).start()
+    assert profiler.profile(30, hz=100, stop=stop) is not None
+    assert time.perf_counter() - started < 1
+    assert profiler.profile(0.01) is not None  # the lock was released
+
+
+def test_profile_fits_the_request_deadline(client, admin_headers):
+    headers = {**admin_headers, "X-Request-Timeout": "0.5"}
+    started = time.perf_counter()
+    response = client.post("/debug/profile", params={"seconds": 2}, headers=headers)
+    assert response.status_code == 200  # cut short, not a 504
+    assert time.perf_counter() - started < 1
+    # Nothing is left sampling in the background
+    response = client.post("/debug/profile", params={"seconds": 0.1}, headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_timed_out_profile_does_not_block_the_next():
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(debug.profile(seconds=30, hz=100), 0.1)
+        await asyncio.sleep(0.05)  # the sampler sees the stop within one tick
+        return profiler.profile(0.01)
+
+    started = time.perf_counter()
+    assert asyncio.run(scenario()) is not None
+    assert time.perf_counter() - started < 2
@@ -0,0 +1,71 @@
+"""
+Capstone — Tests: Pre-fork server (appcore-serve)
+Run: pytest tests/test_server.py -v
+"""
+
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from appcore.cli import build_parser
+from appcore.models.registry import ModelRegistry
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def test_activate_reuses_the_preloaded_model(tmp_path):
+    registry = ModelRegistry(model_dir=tmp_path, warmup_rounds=1)
+    entry = registry.preload("1.0.0")
+    assert asyncio.run(registry.activate("1.0.0")) is entry
+    assert registry.active_version == "1.0.0"
+
+
+def test_cli_parses_serve_options():
+    args = build_parser().parse_args(["serve", "--workers", "3", "--no-preload", "--keepalive", "30"])
+    assert (args.workers, args.preload, args.keepalive) == (3, False, 30)
+
+
+def test_serve_forks_workers_and_stops_on_sigterm(tmp_path):
+    pytest.importorskip("uvicorn")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(SRC), os.environ.get("PYTHONPATH", "")]),
+        "SHUTDOWN_DRAIN_DELAY_S": "0",
+        "TMPDIR": str(tmp_path),  # the server creates its metrics dir here
+    }
+    env.pop("METRICS_MULTIPROC_DIR", None)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "appcore.cli", "serve", "--port", str(port), "--workers", "2"],
+        env=env, cwd=tmp_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as r:
+                    if r.status == 200:
+                        break
+            except OSError:
+                time.sleep(0.05)
+        else:
+            pytest.fail("appcore serve never became healthy")
+        with open(f"/proc/{proc.pid}/task/{proc.pid}/children") as f:
+            assert len(f.read().split()) == 2
+        assert list(tmp_path.glob("appcore-metrics-*"))
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=15) == 0
+        assert not list(tmp_path.glob("appcore-metrics-*"))  # removed on exit
+    finally:
+        if proc.poll() is None:
+            proc.kill()
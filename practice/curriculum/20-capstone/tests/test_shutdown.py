@@ -0,0 +1,64 @@
+"""
+Capstone — Tests: Graceful shutdown (drain)
+Run: pytest tests/test_shutdown.py -v
+"""
+
+import asyncio
+import os
+import signal
+import time
+
+from appcore.api.shutdown import Drain, drain
+
+
+def test_draining_fails_ready_but_keeps_serving(client):
+    assert client.get("/ready").json()["status"] != "draining"
+    drain.begin("test")
+    ready = client.get("/ready")
+    assert ready.status_code == 503
+    assert ready.json()["status"] == "draining"
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.headers["connection"] == "close"
+
+
+def test_sigterm_drains_before_handing_over():
+    forwarded = []
+    original = signal.signal(signal.SIGTERM, lambda sig, frame: forwarded.append(sig))
+    drained = []
+
+    async def scenario():
+        shutdown = Drain(delay_s=0.1, grace_s=1)
+        await shutdown.start(on_drain=[lambda: drained.append(True)])
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.sleep(0.02)
+        assert shutdown.draining and drained and not forwarded
+        await asyncio.sleep(0.2)
+        assert forwarded == [signal.SIGTERM]
+
+    try:
+        asyncio.run(scenario())
+        os.kill(os.getpid(), signal.SIGTERM)  # the previous handler is back
+        assert forwarded == [signal.SIGTERM, signal.SIGTERM]
+    finally:
+        signal.signal(signal.SIGTERM, original)
+
+
+def test_stop_waits_for_in_flight_requests_up_to_the_grace():
+    async def scenario(grace_s, finishes_after):
+        shutdown = Drain(delay_s=0, grace_s=grace_s)
+        await shutdown.start()
+        shutdown.in_flight = 1
+
+        def finish():
+            shutdown.in_flight -= 1
+
+        asyncio.get_running_loop().call_later(finishes_after, finish)
+        started = time.perf_counter()
+        idle = await shutdown.stop()
+        return idle, time.perf_counter() - started
+
+    idle, elapsed = asyncio.run(scenario(grace_s=2, finishes_after=0.1))
+    assert idle and 0.1 <= elapsed < 1
+    idle, elapsed = asyncio.run(scenario(grace_s=0.1, finishes_after=1))
+    assert not idle and elapsed < 0.5
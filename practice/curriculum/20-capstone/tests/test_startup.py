@@ -0,0 +1,91 @@
+"""
+Capstone — Tests: Startup-time budget
+Run: pytest tests/test_startup.py -v
+
+Fails when a cold process takes longer than STARTUP_BUDGET_SECONDS to
+answer its first /health, or when a heavy optional dependency creeps into
+the import path of the app.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from appcore.monitoring.startup import StartupProfiler, import_times
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "5"))
+LAZY_MODULES = ("prometheus_client", "redis", "numpy")
+
+
+def _env(tmp_path):
+    # The subprocess runs in tmp_path (the database path is relative to it)
+    return {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(SRC), os.environ.get("PYTHONPATH", "")]),
+        "SHUTDOWN_DRAIN_DELAY_S": "0",  # no load balancer to wait for
+        "MODEL_DIR": str(tmp_path / "models"),
+        "PARTITION_DIR": str(tmp_path / "partitions"),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_heavy_imports_stay_lazy(tmp_path):
+    code = (
+        "import sys, appcore.api.app; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=_env(tmp_path), cwd=tmp_path,
+        capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    assert out == ""
+
+
+def test_time_to_first_healthy_response(tmp_path):
+    pytest.importorskip("uvicorn")
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "appcore.api.app:app", "--port", str(port)],
+        env=_env(tmp_path), cwd=tmp_path,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        elapsed = None
+        while time.perf_counter() - start < STARTUP_BUDGET_SECONDS * 2:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as r:
+                    if r.status == 200:
+                        elapsed = time.perf_counter() - start
+                        break
+            except OSError:
+                time.sleep(0.02)
+        assert elapsed is not None, "service never became healthy"
+        assert elapsed < STARTUP_BUDGET_SECONDS, f"first /health after {elapsed:.2f}s"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def test_import_times_reports_modules():
+    rows = import_times("json", top=5)
+    assert rows and rows[0]["cumulative_us"] >= rows[-1]["cumulative_us"]
+
+
+def test_profiler_records_steps():
+    profiler = StartupProfiler()
+    with profiler.step("database"):
+        pass
+    assert list(profiler.report()["steps_ms"]) == ["database"]
@@ -0,0 +1,63 @@
+"""
+Capstone — Tests: Request Tracing
+Run: pytest tests/test_tracing.py -v
+"""
+
+import asyncio
+
+from appcore.monitoring import tracing
+from appcore.monitoring.tracing import SlowestTraces, Trace, span
+
+
+def test_span_is_noop_without_trace():
+    assert tracing.current_trace() is None
+    with span("model") as s:
+        assert s is None
+
+
+def test_spans_follow_context_into_threads():
+    async def handler():
+        trace, token = tracing.start_trace("GET /x", force=True)
+        try:
+            with span("outer"):
+                await asyncio.to_thread(lambda: span("thread").__enter__().__exit__())
+        finally:
+            tracing.end_trace(token)
+        return trace
+
+    trace = asyncio.run(handler())
+    assert [name for name, _, _ in trace.spans] == ["thread", "outer"]
+    assert tracing.current_trace() is None
+
+
+def test_slowest_traces_keeps_top_n():
+    slowest = SlowestTraces(capacity=2)
+    for total in (0.3, 0.1, 0.5, 0.2):
+        trace = Trace(f"t{total}")
+        trace.total = total
+        slowest.record(trace)
+    assert [t["name"] for t in slowest.slowest()] == ["t0.5", "t0.3"]
+
+
+def test_predict_server_timing_breakdown(client, admin_headers):
+    tracing.slowest_traces.clear()
+    response = client.post("/predict", json={"features": [1.0, 2.0]}, headers={"X-Trace": "1"})
+    assert response.status_code == 201
+    timing = response.headers["server-timing"]
+    for name in ("ratelimit", "auth", "model", "db", "total"):
+        assert f"{name};dur=" in timing
+
+    traces = client.get("/debug/traces", headers=admin_headers).json()["traces"]
+    assert traces[0]["name"] == "POST /predict"
+    assert {s["name"] for s in traces[0]["spans"]} >= {"auth", "model", "db"}
+
+
+def test_unsampled_request_has_no_server_timing(client, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    response = client.post("/predict", json={"features": [1.0]})
+    assert "server-timing" not in response.headers
+
+
+def test_debug_traces_requires_admin_key(client):
+    # The regular API key is not enough
+    assert client.get("/debug/traces").status_code == 403
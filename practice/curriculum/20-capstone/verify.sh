@@ -44,6 +44,10 @@ done
 echo ""
 echo "[Section 13] CI/CD pipeline..."
 check ".github/workflows/ci.yml exists" test -f ".github/workflows/ci.yml"
+# Release gate: hot paths no slower than the committed baseline
+check "benchmarks/baseline.json exists" test -f "benchmarks/baseline.json"
+check "No benchmark regressions (pytest --bench-compare)" \
+    env PYTHONPATH=src python -m pytest -q -m benchmark --bench-compare
 
 # --- Section 02: Git ---
 echo ""